@@ -1,5 +1,10 @@
+import zstandard
 from django.contrib import admin
-from .models import Post
+from django.http import Http404, HttpResponse
+from django.template.response import TemplateResponse
+from django.urls import path, reverse
+from django.utils.html import format_html
+from .models import Post, GenerationJob, PregeneratedDraft, RequestProfile
 
 
 @admin.register(Post)
@@ -7,7 +12,7 @@ class PostAdmin(admin.ModelAdmin):
     list_display = ['title', 'status', 'created_by', 'created_at', 'word_count']
     list_filter = ['status', 'created_at', 'created_by']
     search_fields = ['title', 'content', 'original_prompt']
-    readonly_fields = ['created_at', 'updated_at', 'word_count']
+    readonly_fields = ['created_at', 'updated_at', 'word_count', 'conversation_history']
     
     fieldsets = [
         ('Post Details', {
@@ -31,7 +36,129 @@ class PostAdmin(admin.ModelAdmin):
         return obj.word_count
     word_count.short_description = 'Word Count'
     
+    change_list_template = 'admin/agents/post/change_list.html'
+    node_stats_sample_size = 1000
+    
+    def get_urls(self):
+        urls = super().get_urls()
+        custom_urls = [
+            path(
+                'node-stats/',
+                self.admin_site.admin_view(self.node_stats_view),
+                name='agents_post_node_stats',
+            ),
+        ]
+        return custom_urls + urls
+    
+    def node_stats_view(self, request):
+        """p50/p95 latency and mean tokens per graph node across recent runs"""
+        from .agents.instrumentation import summarize_runs
+        
+        metadata_list = list(
+            Post.objects.exclude(generation_metadata=None)
+            .order_by('-created_at')
+            .values_list('generation_metadata', flat=True)[:self.node_stats_sample_size]
+        )
+        context = {
+            **self.admin_site.each_context(request),
+            'opts': self.model._meta,
+            'title': 'Generation latency by node',
+            'stats': summarize_runs(metadata_list),
+            'run_count': len(metadata_list),
+        }
+        return TemplateResponse(request, 'admin/agents/post/node_stats.html', context)
+    
     def save_model(self, request, obj, form, change):
         if not change:  # If creating new object
             obj.created_by = request.user
         super().save_model(request, obj, form, change)
+
+
+
+@admin.register(GenerationJob)
+class GenerationJobAdmin(admin.ModelAdmin):
+    list_display = ['id', 'status', 'created_by', 'created_at', 'finished_at']
+    list_filter = ['status', 'created_at']
+    search_fields = ['prompt']
+    readonly_fields = ['created_at', 'started_at', 'finished_at']
+
+
+@admin.register(PregeneratedDraft)
+class PregeneratedDraftAdmin(admin.ModelAdmin):
+    list_display = ['prompt', 'generated_at', 'expires_at']
+    list_filter = ['generated_at']
+    search_fields = ['prompt', 'final_post']
+    readonly_fields = ['prompt_key', 'search_fingerprint', 'generated_at']
+
+
+@admin.register(RequestProfile)
+class RequestProfileAdmin(admin.ModelAdmin):
+    list_display = ['path', 'view_name', 'method', 'status_code', 'total_ms', 'db_queries', 'db_ms',
+                    'template_ms', 'agent_ms', 'serialize_ms', 'created_at']
+    list_filter = ['view_name', 'method', 'status_code', 'created_at']
+    search_fields = ['path', 'view_name']
+    exclude = ['profile']
+    readonly_fields = ['other_ms', 'profile_summary']
+    
+    change_list_template = 'admin/agents/requestprofile/change_list.html'
+    
+    def has_add_permission(self, request):
+        return False
+    
+    def has_change_permission(self, request, obj=None):
+        return False
+    
+    def other_ms(self, obj):
+        return round(obj.other_ms, 1)
+    other_ms.short_description = 'Other (ms)'
+    
+    def profile_summary(self, obj):
+        from .profiling import format_profile
+        
+        if not obj.profile:
+            return "-"
+        download_url = reverse('admin:agents_requestprofile_download', args=[obj.pk])
+        return format_html(
+            '<a href="{}">Download .prof</a><pre>{}</pre>', download_url, format_profile(obj.profile)
+        )
+    profile_summary.short_description = 'cProfile (top 30 by cumulative time)'
+    
+    def get_urls(self):
+        urls = super().get_urls()
+        custom_urls = [
+            path(
+                'slowest/',
+                self.admin_site.admin_view(self.slowest_view),
+                name='agents_requestprofile_slowest',
+            ),
+            path(
+                '<int:profile_id>/download/',
+                self.admin_site.admin_view(self.download_view),
+                name='agents_requestprofile_download',
+            ),
+        ]
+        return custom_urls + urls
+    
+    def slowest_view(self, request):
+        """Endpoints ranked by p95 total time, with the mean time spent in each part of the request"""
+        from .profiling import summarize_profiles
+        
+        profiles = list(RequestProfile.objects.defer('profile'))
+        context = {
+            **self.admin_site.each_context(request),
+            'opts': self.model._meta,
+            'title': 'Slowest endpoints',
+            'stats': summarize_profiles(profiles),
+            'profile_count': len(profiles),
+        }
+        return TemplateResponse(request, 'admin/agents/requestprofile/slowest.html', context)
+    
+    def download_view(self, request, profile_id):
+        """The cProfile dump in pstats format, for snakeviz or python -m pstats"""
+        profile = RequestProfile.objects.filter(id=profile_id).exclude(profile=None).first()
+        if profile is None:
+            raise Http404("No cProfile dump for this request")
+        data = zstandard.ZstdDecompressor().decompress(bytes(profile.profile))
+        response = HttpResponse(data, content_type='application/octet-stream')
+        response['Content-Disposition'] = f'attachment; filename="request-{profile.id}.prof"'
+        return response
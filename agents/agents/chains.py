@@ -2,28 +2,95 @@ from langchain_core.prompts import ChatPromptTemplate, MessagesPlaceholder
 from dotenv import load_dotenv
 
 load_dotenv()
-from .tools import search_tool, get_system_time
+
+from .llm_cache import SQLiteLLMCache
+from .paths import data_path
+from .ratelimit import ChatRateLimiter, TokenMeteredChatMixin, get_rate_limiter
+from .resilience import ResilientChatMixin, default_resilience_policy
+from .transport import get_transport
 
 from langchain_openai import ChatOpenAI
 from langgraph.prebuilt import create_react_agent
+import os
 
-# Define the LLM model
-llm = ChatOpenAI(
-    model="gpt-4o",
-    temperature=0.3,
-)
 
-# Create tools list
-tools = [search_tool, get_system_time]
+def build_llm_cache():
+    """Build the opt-in persistent response cache (LLM_CACHE_ENABLED=true), or None"""
+    if os.getenv("LLM_CACHE_ENABLED", "false").lower() != "true":
+        return None
+    sampled_ttl = os.getenv("LLM_CACHE_SAMPLED_TTL", "3600")
+    return SQLiteLLMCache(
+        path=data_path("LLM_CACHE_PATH", "llm_cache.sqlite3"),
+        max_bytes=int(os.getenv("LLM_CACHE_MAX_BYTES", str(50 * 1024 * 1024))),
+        sampled_ttl=float(sampled_ttl) if sampled_ttl else None,
+    )
+
+
+class ResilientChatOpenAI(TokenMeteredChatMixin, ResilientChatMixin, ChatOpenAI):
+    """ChatOpenAI whose API calls get deadlines, jittered retries and optional hedging, and are charged to the token budget"""
+
+
+def build_llm(model="gpt-4o", cache=None):
+    """
+    Define the LLM model.
+    
+    Args:
+        model: OpenAI model name
+        cache: Response cache shared with the other tiers' models (built from the LLM_CACHE_* settings if omitted)
+    """
+    # Shared requests/tokens-per-minute admission control (RATE_LIMIT_* / LLM_*_PER_MINUTE settings)
+    limiter = get_rate_limiter("llm")
+    resilience = default_resilience_policy()
+    # Shared keep-alive connection pool (HTTP_* settings); the SDK reads OPENAI_BASE_URL, e.g. to use a stub server
+    transport = get_transport("openai")
+    return ResilientChatOpenAI(
+        model=model,
+        temperature=0.3,
+        http_client=transport.client() if transport else None,
+        http_async_client=transport.async_client() if transport else None,
+        cache=cache or build_llm_cache(),
+        rate_limiter=ChatRateLimiter(limiter) if limiter else None,
+        resilience=resilience,
+        # Retries are handled by the resilience policy (with jitter), so the client's own are turned off
+        timeout=resilience.call_timeout if resilience else None,
+        max_retries=0 if resilience else 2,
+    )
+
+
+def build_generation_chain(model, agent_tools):
+    """
+    Build the tool-using ReAct generation agent for the given model and tools.
+    
+    The agent will use its default prompt and we'll add instructions via system message.
+    """
+    # checkpointer=False: the reflection graph checkpoints once per GENERATE node rather than every ReAct step
+    return create_react_agent(model, agent_tools, checkpointer=False)
+
+
+def __getattr__(name):
+    # llm, tools and the chains are built lazily by the agent factory
+    if name in ("llm", "tools", "generation_chain", "reflection_chain"):
+        from .factory import get_agent
+        return getattr(get_agent(), name)
+    if name == "llm_cache":
+        from .factory import get_agent
+        return get_agent().llm.cache
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
-# Create the generation agent with tools using LangGraph (no custom prompt)
-# The agent will use its default prompt and we'll add instructions via system message
-generation_chain = create_react_agent(llm, tools)
 
 GENERATION_PROMPT_FIRST = """You are a space exploration news reporter and X influencer writing an excellent post about the latest space exploration news. Use the search tool to find the latest space exploration news and the time tool to get current date/time for context. Generate a post that is engaging, informative, and suitable for a wide audience. Always search for current information before generating your post."""
 
+# First-round prompt when the searches were pre-fetched (see prefetch.py) and come with the request
+GENERATION_PROMPT_PREFETCHED = """You are a space exploration news reporter and X influencer writing an excellent post about the latest space exploration news. The current date/time and fresh search results for the request are provided below; base the post on them. Only use the search tool if they do not cover the request. Generate a post that is engaging, informative, and suitable for a wide audience."""
+
 GENERATION_PROMPT_ADJUSTMENTS = """You are a space exploration news reporter and X influencer. Use the search tool if you need updated information and the time tool for current date/time. Generate an improved post based on the feedback provided."""
 
+# Final-model revision of a draft the loop stopped on without a critique (model tiering, see tiers.py)
+GENERATION_PROMPT_FINAL = """Revise your latest draft into the final version of the post. Keep its facts and structure, and polish the wording for impact and clarity. Reply with the post only."""
+
+# Appended to the critique request when the stopping policy uses reflection verdicts
+REFLECTION_VERDICT_INSTRUCTIONS = """After your critique, add a final line that is exactly "VERDICT: APPROVE" if the post is ready to publish as-is, or "VERDICT: REVISE" if it still needs changes."""
+
 # Reflection prompt for critique
 reflection_prompt = ChatPromptTemplate.from_messages(
     [
@@ -38,5 +105,7 @@ reflection_prompt = ChatPromptTemplate.from_messages(
     ]
 )
 
-# Keep reflection chain simple (no tools needed for critique)
-reflection_chain = reflection_prompt | llm
+
+def build_reflection_chain(model):
+    """Build the critique chain for the given model (no tools needed for critique)"""
+    return reflection_prompt | model
@@ -0,0 +1,319 @@
+"""
+SQLite checkpoint storage for resumable reflection runs.
+
+``SQLiteCheckpointSaver`` implements LangGraph's ``BaseCheckpointSaver`` on a
+local SQLite file, so compiling the reflection graph with it saves the
+message state after every GENERATE/REFLECT node under the run's thread id.
+If a later node fails, invoking the graph again with ``None`` input and the
+same thread id continues from the last completed node instead of starting
+over.
+
+Checkpoints of successful runs are deleted as soon as the run finishes;
+those of failed runs are kept for ``retention`` seconds so they can be
+resumed, then pruned.
+
+The async methods run the SQLite work in a thread, so checkpointing does not
+block the event loop under ASGI.
+"""
+import asyncio
+import os
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Iterator, Optional, Sequence
+
+import zstandard
+from langchain_core.runnables import RunnableConfig
+from langgraph.checkpoint.base import (
+    WRITES_IDX_MAP,
+    BaseCheckpointSaver,
+    ChannelVersions,
+    Checkpoint,
+    CheckpointMetadata,
+    CheckpointTuple,
+    get_checkpoint_id,
+    get_checkpoint_metadata,
+)
+
+from .paths import data_path
+
+
+class ResumableRunError(Exception):
+    """A reflection run failed after saving progress; it can be continued with its thread id"""
+
+    def __init__(self, thread_id: str, error: BaseException):
+        super().__init__(str(error))
+        self.thread_id = thread_id
+        self.error = error
+
+
+class SQLiteCheckpointSaver(BaseCheckpointSaver[str]):
+    """LangGraph checkpoint saver backed by a local SQLite file"""
+
+    def __init__(self, path: str, retention: float = 24 * 3600, prune_interval: float = 300, serde=None):
+        super().__init__(serde=serde)
+        self.path = path
+        self.retention = retention
+        self.prune_interval = prune_interval
+        self._last_prune = 0.0
+        self._lock = threading.Lock()
+
+        with self._connect() as conn:
+            # WAL lets readers and the writer proceed concurrently and avoids an fsync per checkpoint
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS checkpoints ("
+                " thread_id TEXT NOT NULL, checkpoint_ns TEXT NOT NULL DEFAULT '',"
+                " checkpoint_id TEXT NOT NULL, parent_checkpoint_id TEXT,"
+                " type TEXT, checkpoint BLOB, metadata_type TEXT, metadata BLOB, created_at REAL NOT NULL,"
+                " PRIMARY KEY (thread_id, checkpoint_ns, checkpoint_id))"
+            )
+            # Files created before metadata had its own serialization type
+            columns = {row[1] for row in conn.execute("PRAGMA table_info(checkpoints)")}
+            if "metadata_type" not in columns:
+                conn.execute("ALTER TABLE checkpoints ADD COLUMN metadata_type TEXT")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS checkpoint_writes ("
+                " thread_id TEXT NOT NULL, checkpoint_ns TEXT NOT NULL DEFAULT '',"
+                " checkpoint_id TEXT NOT NULL, task_id TEXT NOT NULL, idx INTEGER NOT NULL,"
+                " channel TEXT NOT NULL, type TEXT, value BLOB, task_path TEXT NOT NULL DEFAULT '',"
+                " PRIMARY KEY (thread_id, checkpoint_ns, checkpoint_id, task_id, idx))"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS checkpoints_created_at ON checkpoints (created_at)")
+
+    @contextmanager
+    def _connect(self):
+        """A connection for one transaction: committed (or rolled back) and closed at the end of the block"""
+        conn = sqlite3.connect(self.path, timeout=5)
+        try:
+            conn.execute("PRAGMA synchronous=NORMAL")
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    # Serialization: the message state repeats every earlier draft, so it compresses well
+
+    def _dump(self, value) -> tuple:
+        type_, data = self.serde.dumps_typed(value)
+        return type_, zstandard.ZstdCompressor().compress(data)
+
+    def _load(self, type_, data):
+        return self.serde.loads_typed((type_, zstandard.ZstdDecompressor().decompress(data)))
+
+    # BaseCheckpointSaver interface
+
+    def get_tuple(self, config: RunnableConfig) -> Optional[CheckpointTuple]:
+        thread_id = config["configurable"]["thread_id"]
+        checkpoint_ns = config["configurable"].get("checkpoint_ns", "")
+        checkpoint_id = get_checkpoint_id(config)
+        query = (
+            "SELECT checkpoint_id, parent_checkpoint_id, type, checkpoint, metadata_type, metadata FROM checkpoints"
+            " WHERE thread_id = ? AND checkpoint_ns = ?"
+        )
+        params = [thread_id, checkpoint_ns]
+        if checkpoint_id:
+            query += " AND checkpoint_id = ?"
+            params.append(checkpoint_id)
+        else:
+            query += " ORDER BY checkpoint_id DESC LIMIT 1"
+
+        with self._connect() as conn:
+            row = conn.execute(query, params).fetchone()
+            if row is None:
+                return None
+            return self._tuple(conn, thread_id, checkpoint_ns, row)
+
+    def list(
+        self,
+        config: Optional[RunnableConfig],
+        *,
+        filter: Optional[dict[str, Any]] = None,
+        before: Optional[RunnableConfig] = None,
+        limit: Optional[int] = None,
+    ) -> Iterator[CheckpointTuple]:
+        query = (
+            "SELECT checkpoint_id, parent_checkpoint_id, type, checkpoint, metadata_type, metadata,"
+            " thread_id, checkpoint_ns FROM checkpoints WHERE 1 = 1"
+        )
+        params = []
+        if config:
+            query += " AND thread_id = ?"
+            params.append(config["configurable"]["thread_id"])
+            if config["configurable"].get("checkpoint_ns") is not None:
+                query += " AND checkpoint_ns = ?"
+                params.append(config["configurable"]["checkpoint_ns"])
+            if get_checkpoint_id(config):
+                query += " AND checkpoint_id = ?"
+                params.append(get_checkpoint_id(config))
+        if before and get_checkpoint_id(before):
+            query += " AND checkpoint_id < ?"
+            params.append(get_checkpoint_id(before))
+        query += " ORDER BY checkpoint_id DESC"
+
+        items = []
+        with self._connect() as conn:
+            for row in conn.execute(query, params).fetchall():
+                if limit is not None and len(items) >= limit:
+                    break
+                item = self._tuple(conn, row[6], row[7], row[:6])
+                if filter and not all(item.metadata.get(key) == value for key, value in filter.items()):
+                    continue
+                items.append(item)
+        yield from items
+
+    def put(
+        self,
+        config: RunnableConfig,
+        checkpoint: Checkpoint,
+        metadata: CheckpointMetadata,
+        new_versions: ChannelVersions,
+    ) -> RunnableConfig:
+        thread_id = config["configurable"]["thread_id"]
+        checkpoint_ns = config["configurable"].get("checkpoint_ns", "")
+        type_, data = self._dump(checkpoint)
+        metadata_type, metadata_data = self._dump(get_checkpoint_metadata(config, metadata))
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO checkpoints"
+                " (thread_id, checkpoint_ns, checkpoint_id, parent_checkpoint_id, type, checkpoint,"
+                " metadata_type, metadata, created_at)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    thread_id, checkpoint_ns, checkpoint["id"], config["configurable"].get("checkpoint_id"),
+                    type_, data, metadata_type, metadata_data, time.time(),
+                ),
+            )
+        return {
+            "configurable": {
+                "thread_id": thread_id,
+                "checkpoint_ns": checkpoint_ns,
+                "checkpoint_id": checkpoint["id"],
+            }
+        }
+
+    def put_writes(
+        self,
+        config: RunnableConfig,
+        writes: Sequence[tuple[str, Any]],
+        task_id: str,
+        task_path: str = "",
+    ) -> None:
+        thread_id = config["configurable"]["thread_id"]
+        checkpoint_ns = config["configurable"].get("checkpoint_ns", "")
+        checkpoint_id = config["configurable"]["checkpoint_id"]
+        rows = []
+        for idx, (channel, value) in enumerate(writes):
+            type_, data = self._dump(value)
+            rows.append((
+                thread_id, checkpoint_ns, checkpoint_id, task_id,
+                WRITES_IDX_MAP.get(channel, idx), channel, type_, data, task_path,
+            ))
+        # Special writes (errors, interrupts) replace earlier ones; regular writes are kept from the first attempt
+        verb = "REPLACE" if all(channel in WRITES_IDX_MAP for channel, _ in writes) else "IGNORE"
+        with self._connect() as conn:
+            conn.executemany(
+                f"INSERT OR {verb} INTO checkpoint_writes"
+                " (thread_id, checkpoint_ns, checkpoint_id, task_id, idx, channel, type, value, task_path)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                rows,
+            )
+
+    def delete_thread(self, thread_id: str) -> None:
+        with self._connect() as conn:
+            conn.execute("DELETE FROM checkpoints WHERE thread_id = ?", (thread_id,))
+            conn.execute("DELETE FROM checkpoint_writes WHERE thread_id = ?", (thread_id,))
+
+    async def aget_tuple(self, config: RunnableConfig) -> Optional[CheckpointTuple]:
+        return await asyncio.to_thread(self.get_tuple, config)
+
+    async def alist(self, config, *, filter=None, before=None, limit=None):
+        items = await asyncio.to_thread(lambda: list(self.list(config, filter=filter, before=before, limit=limit)))
+        for item in items:
+            yield item
+
+    async def aput(self, config, checkpoint, metadata, new_versions) -> RunnableConfig:
+        return await asyncio.to_thread(self.put, config, checkpoint, metadata, new_versions)
+
+    async def aput_writes(self, config, writes, task_id, task_path: str = "") -> None:
+        return await asyncio.to_thread(self.put_writes, config, writes, task_id, task_path)
+
+    async def adelete_thread(self, thread_id: str) -> None:
+        return await asyncio.to_thread(self.delete_thread, thread_id)
+
+    # Retention
+
+    def has_thread(self, thread_id: str) -> bool:
+        with self._connect() as conn:
+            return conn.execute("SELECT 1 FROM checkpoints WHERE thread_id = ? LIMIT 1", (thread_id,)).fetchone() is not None
+
+    def prune(self, older_than: float = None) -> int:
+        """Delete every thread whose latest checkpoint is older than ``older_than`` seconds; return the count"""
+        cutoff = time.time() - (self.retention if older_than is None else older_than)
+        with self._connect() as conn:
+            stale = [
+                row[0] for row in conn.execute(
+                    "SELECT thread_id FROM checkpoints GROUP BY thread_id HAVING MAX(created_at) < ?", (cutoff,)
+                )
+            ]
+            conn.executemany("DELETE FROM checkpoints WHERE thread_id = ?", [(t,) for t in stale])
+            conn.executemany("DELETE FROM checkpoint_writes WHERE thread_id = ?", [(t,) for t in stale])
+        return len(stale)
+
+    def maybe_prune(self) -> None:
+        """Prune expired threads at most once every ``prune_interval`` seconds"""
+        with self._lock:
+            if time.time() - self._last_prune < self.prune_interval:
+                return
+            self._last_prune = time.time()
+        self.prune()
+
+    def stats(self) -> dict:
+        with self._connect() as conn:
+            threads, checkpoints, size = conn.execute(
+                "SELECT COUNT(DISTINCT thread_id), COUNT(*), COALESCE(SUM(LENGTH(checkpoint)), 0) FROM checkpoints"
+            ).fetchone()
+        return {'threads': threads, 'checkpoints': checkpoints, 'bytes': size}
+
+    def _tuple(self, conn, thread_id, checkpoint_ns, row) -> CheckpointTuple:
+        checkpoint_id, parent_checkpoint_id, type_, data, metadata_type, metadata_data = row
+        writes = conn.execute(
+            "SELECT task_id, channel, type, value FROM checkpoint_writes"
+            " WHERE thread_id = ? AND checkpoint_ns = ? AND checkpoint_id = ? ORDER BY task_id, idx",
+            (thread_id, checkpoint_ns, checkpoint_id),
+        ).fetchall()
+        return CheckpointTuple(
+            config={
+                "configurable": {
+                    "thread_id": thread_id,
+                    "checkpoint_ns": checkpoint_ns,
+                    "checkpoint_id": checkpoint_id,
+                }
+            },
+            checkpoint=self._load(type_, data),
+            # Rows written before the metadata_type column fall back to the checkpoint's type
+            metadata=self._load(metadata_type or type_, metadata_data) if metadata_data else {},
+            pending_writes=[(task_id, channel, self._load(w_type, value)) for task_id, channel, w_type, value in writes],
+            parent_config=(
+                {
+                    "configurable": {
+                        "thread_id": thread_id,
+                        "checkpoint_ns": checkpoint_ns,
+                        "checkpoint_id": parent_checkpoint_id,
+                    }
+                }
+                if parent_checkpoint_id
+                else None
+            ),
+        )
+
+
+def default_checkpointer() -> Optional[SQLiteCheckpointSaver]:
+    """Build the checkpoint saver from the CHECKPOINT_* environment variables, or None if disabled"""
+    if os.getenv("CHECKPOINT_ENABLED", "true").lower() != "true":
+        return None
+    return SQLiteCheckpointSaver(
+        path=data_path("CHECKPOINT_PATH", "checkpoints.sqlite3"),
+        retention=float(os.getenv("CHECKPOINT_RETENTION_HOURS", "24")) * 3600,
+    )
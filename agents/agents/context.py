@@ -0,0 +1,93 @@
+"""
+Context management for later generation rounds.
+
+From the second round on, the generation agent used to receive the whole
+accumulated state (every draft and every critique). A ``ContextPolicy``
+instead keeps the user request, the latest draft and the latest critique,
+optionally with a short rolling summary of earlier critiques, and fits the
+result into a token budget so late-iteration prompts stay flat.
+"""
+import os
+from typing import List, Sequence, Tuple
+
+from langchain_core.messages import BaseMessage, HumanMessage
+
+from .instrumentation import count_tokens
+from .stopping import is_feedback
+
+STRATEGY_FULL = "full"
+STRATEGY_LATEST = "latest"
+STRATEGY_SUMMARY = "summary"
+
+SUMMARY_TOKENS_PER_CRITIQUE = 60
+
+
+def _tokens(messages: Sequence[BaseMessage], model: str) -> int:
+    return sum(count_tokens(str(message.content), model) for message in messages)
+
+
+def _truncate(text: str, max_tokens: int, model: str) -> str:
+    """Cut ``text`` down to roughly ``max_tokens`` tokens"""
+    tokens = count_tokens(text, model)
+    if tokens <= max_tokens:
+        return text
+    keep = max(0, int(len(text) * max_tokens / tokens))
+    return text[:keep].rstrip() + "..."
+
+
+class ContextPolicy:
+    """Decides which messages the generation agent sees on rounds after the first"""
+
+    def __init__(self, strategy: str = STRATEGY_SUMMARY, token_budget: int = 3000, model: str = "gpt-4o"):
+        if strategy not in (STRATEGY_FULL, STRATEGY_LATEST, STRATEGY_SUMMARY):
+            raise ValueError(f"Unknown context strategy: {strategy}")
+        self.strategy = strategy
+        self.token_budget = token_budget
+        self.model = model
+
+    def _summary(self, earlier_feedback: List[BaseMessage]) -> BaseMessage:
+        points = [
+            f"- Round {i}: {_truncate(message.content[len('Feedback:'):].strip(), SUMMARY_TOKENS_PER_CRITIQUE, self.model)}"
+            for i, message in enumerate(earlier_feedback, 1)
+        ]
+        return HumanMessage(content="Summary of earlier feedback already applied:\n" + "\n".join(points))
+
+    def build(self, state: Sequence[BaseMessage]) -> Tuple[List[BaseMessage], int]:
+        """
+        Select the messages to send for the next generation round.
+        
+        Returns:
+            tuple: (messages, tokens saved compared to sending the full state)
+        """
+        if self.strategy == STRATEGY_FULL or len(state) < 3:
+            return list(state), 0
+
+        user_message = state[0]
+        latest_draft = next(msg for msg in reversed(state) if not is_feedback(msg))
+        latest_feedback = state[-1] if is_feedback(state[-1]) else None
+        earlier_feedback = [msg for msg in state[1:] if is_feedback(msg) and msg is not latest_feedback]
+
+        summary = self._summary(earlier_feedback) if self.strategy == STRATEGY_SUMMARY and earlier_feedback else None
+        tail = [latest_draft] + ([latest_feedback] if latest_feedback else [])
+
+        messages = [user_message] + ([summary] if summary else []) + tail
+        if _tokens(messages, self.model) > self.token_budget and summary:
+            # The summary is the first thing to go when over budget
+            messages = [user_message] + tail
+        if _tokens(messages, self.model) > self.token_budget and latest_feedback:
+            # Then trim the critique, keeping the draft it refers to intact
+            remaining = self.token_budget - _tokens([user_message, latest_draft], self.model)
+            trimmed = HumanMessage(content=_truncate(latest_feedback.content, max(remaining, 50), self.model))
+            messages = [user_message, latest_draft, trimmed]
+
+        saved = max(0, _tokens(state, self.model) - _tokens(messages, self.model))
+        return messages, saved
+
+
+def default_context_policy(model: str = "gpt-4o") -> ContextPolicy:
+    """Build the context policy from the CONTEXT_* environment variables"""
+    return ContextPolicy(
+        strategy=os.getenv("CONTEXT_STRATEGY", STRATEGY_SUMMARY),
+        token_budget=int(os.getenv("CONTEXT_TOKEN_BUDGET", "3000")),
+        model=model,
+    )
@@ -0,0 +1,187 @@
+"""
+Lazy, process-wide construction of the agent stack.
+
+Building the stack (ChatOpenAI, the Tavily tool, the ReAct agent and the
+compiled reflection graph) is deferred until the first generation request
+or an explicit ``warm_up()``, so workers that only serve post pages or the
+admin never pay for it. The stack is built once per process under a lock,
+and ``state()`` reports whether that has happened, is in progress or failed.
+This module only imports the standard library, so it is cheap to import.
+"""
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+logger = logging.getLogger(__name__)
+
+STATUS_UNINITIALIZED = "uninitialized"
+STATUS_INITIALIZING = "initializing"
+STATUS_READY = "ready"
+STATUS_FAILED = "failed"
+
+
+class AgentUnavailable(Exception):
+    """Raised when the agent stack could not be built"""
+
+
+class AgentStack:
+    """The built agent runtime: model, tools, chains, stopping policy and compiled graph"""
+
+    def __init__(self, llm, search_tool, tools, generation_chain, reflection_chain, stopping_policy, app, checkpointer=None, tiers=None):
+        self.llm = llm
+        self.search_tool = search_tool
+        self.tools = tools
+        self.generation_chain = generation_chain
+        self.reflection_chain = reflection_chain
+        self.stopping_policy = stopping_policy
+        self.app = app
+        self.checkpointer = checkpointer
+        self.tiers = tiers
+
+
+def build_agent_stack(llm=None, search_tool=None, stopping_policy=None, context_policy=None, checkpointer=None, models=None) -> AgentStack:
+    """
+    Build a complete agent stack, using the configured backends for anything not passed in.
+    
+    Args:
+        llm: Final-draft chat model to use (defaults to chains.build_llm() for LLM_MODEL)
+        search_tool: Search tool to use (defaults to tools.build_search_tool())
+        stopping_policy: Stopping policy (defaults to the REFLECTION_* settings)
+        context_policy: Context policy (defaults to the CONTEXT_* settings)
+        checkpointer: Checkpoint saver for resumable runs (defaults to the CHECKPOINT_* settings)
+        models: Chat model per role besides "final" (defaults to the LLM_*_MODEL settings, or to ``llm`` if that is given)
+    """
+    from . import chains, checkpoints, prefetch, reflect_agent, stopping, tiers as model_tiers, tools
+
+    search_tool = search_tool or tools.build_search_tool()
+    agent_tools = [search_tool, tools.get_system_time]
+    if llm is None:
+        llm = chains.build_llm(os.getenv("LLM_MODEL", "gpt-4o"))
+        tiers = model_tiers.default_model_tiers(llm, agent_tools, lambda model: chains.build_llm(model, cache=llm.cache))
+    else:
+        models = {model_tiers.ROLE_FINAL: llm, **(models or {})}
+        tiers = model_tiers.ModelTiers(
+            {role: model.model_name for role, model in models.items()},
+            agent_tools,
+            llms={model.model_name: model for model in models.values()},
+        )
+    generation_chain = tiers.generation_chain(llm.model_name)
+    reflection_chain = tiers.reflection_chain(llm.model_name)
+    stopping_policy = stopping_policy or stopping.default_stopping_policy()
+    checkpointer = checkpointer or checkpoints.default_checkpointer()
+    app = reflect_agent.create_reflection_graph(
+        generation_chain,
+        reflection_chain,
+        policy=stopping_policy,
+        context_policy=context_policy,
+        model_name=llm.model_name,
+        checkpointer=checkpointer,
+        prefetch=prefetch.default_prefetch(search_tool),
+        tiers=tiers,
+    )
+    return AgentStack(
+        llm, search_tool, agent_tools, generation_chain, reflection_chain, stopping_policy, app, checkpointer, tiers
+    )
+
+
+class AgentFactory:
+    """Thread-safe, build-once holder for the process's AgentStack"""
+
+    def __init__(self, builder=build_agent_stack):
+        self._builder = builder
+        self._lock = threading.Lock()
+        self._stack = None
+        self._override = None
+        self._status = STATUS_UNINITIALIZED
+        self._error = None
+        self._init_ms = None
+        self._initialized_at = None
+
+    def get(self) -> AgentStack:
+        """Return the agent stack, building it on first use"""
+        if self._override is not None:
+            return self._override
+        if self._stack is not None:
+            return self._stack
+
+        with self._lock:
+            if self._stack is None:
+                self._status = STATUS_INITIALIZING
+                start = time.perf_counter()
+                try:
+                    stack = self._builder()
+                except Exception as e:
+                    self._status = STATUS_FAILED
+                    self._error = str(e)
+                    logger.error(f"Agent initialization failed: {str(e)}")
+                    raise AgentUnavailable(f"The generation agent is unavailable: {str(e)}") from e
+                self._init_ms = round((time.perf_counter() - start) * 1000, 1)
+                self._initialized_at = time.time()
+                self._error = None
+                self._stack = stack
+                self._status = STATUS_READY
+                logger.info(f"Agent initialized in {self._init_ms} ms")
+        return self._stack
+
+    def warm_up(self) -> bool:
+        """Build the stack now; returns False (and records the error) if that fails"""
+        try:
+            self.get()
+        except AgentUnavailable:
+            return False
+        return True
+
+    def current(self):
+        """Return the stack in use, or None if it has not been built (never triggers a build)"""
+        if self._override is not None:
+            return self._override
+        return self._stack
+
+    def state(self) -> dict:
+        """Report initialization state without triggering it"""
+        return {
+            'status': STATUS_READY if self._override is not None else self._status,
+            'error': self._error,
+            'init_ms': self._init_ms,
+            'initialized_at': self._initialized_at,
+        }
+
+    @contextmanager
+    def override(self, stack: AgentStack):
+        """Serve ``stack`` instead of the built one inside this block (benchmarks, tooling)"""
+        previous = self._override
+        self._override = stack
+        try:
+            yield stack
+        finally:
+            self._override = previous
+
+    def reset(self) -> None:
+        """Drop the built stack so the next get() rebuilds it"""
+        with self._lock:
+            self._stack = None
+            self._status = STATUS_UNINITIALIZED
+            self._error = None
+            self._init_ms = None
+            self._initialized_at = None
+
+
+agent_factory = AgentFactory()
+
+
+def get_agent() -> AgentStack:
+    """Return the process-wide agent stack, building it on first use"""
+    return agent_factory.get()
+
+
+def cache_stats() -> dict:
+    """Hit/miss metrics of the built stack's LLM response and search result caches (None if not built yet or disabled)"""
+    stack = agent_factory.current()
+    llm_cache = getattr(stack.llm, 'cache', None) if stack else None
+    search_cache = getattr(stack.search_tool, 'cache', None) if stack else None
+    return {
+        'llm': llm_cache.stats() if hasattr(llm_cache, 'stats') else None,
+        'search': search_cache.stats() if hasattr(search_cache, 'stats') else None,
+    }
@@ -0,0 +1,316 @@
+"""
+Per-run latency and token instrumentation for the reflection graph.
+
+``record_run`` opens a ``RunRecorder`` for one ``process_user_request`` call.
+Inside it, ``node_timer`` wraps each GENERATE/REFLECT node: it measures wall
+time and installs a callback handler (through LangChain's configure hook, so
+existing tracing callbacks are left alone) that counts LLM calls, tokens,
+ReAct tool rounds and tool latencies for that node, broken down by model.
+``RunRecorder.as_metadata`` produces the dict stored in
+``Post.generation_metadata``, including per-role totals when the loop uses
+model tiers (see tiers.py).
+"""
+import logging
+import math
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Optional
+from uuid import UUID
+
+from langchain_core.callbacks import BaseCallbackHandler
+from langchain_core.tracers.context import register_configure_hook
+
+from .tiers import ROLE_ROUTER
+
+logger = logging.getLogger(__name__)
+
+_current_recorder: ContextVar[Optional["RunRecorder"]] = ContextVar("run_recorder", default=None)
+_node_metrics: ContextVar[Optional["NodeMetricsHandler"]] = ContextVar("node_metrics_handler", default=None)
+
+# Every callback manager configured while a node is running picks up its metrics handler
+register_configure_hook(_node_metrics, inheritable=True)
+
+_encodings = {}
+
+# Counted by agents.resilience while a run is recorded
+RESILIENCE_EVENTS = ('timeouts', 'retries', 'hedges', 'hedge_wins', 'deadline_exceeded')
+
+
+def count_tokens(text: str, model: str = "gpt-4o") -> int:
+    """Count tokens with tiktoken, falling back to a chars/4 estimate if no encoding is available"""
+    if model not in _encodings:
+        try:
+            import tiktoken
+            try:
+                _encodings[model] = tiktoken.encoding_for_model(model)
+            except KeyError:
+                _encodings[model] = tiktoken.get_encoding("o200k_base")
+        except Exception as e:
+            logger.warning(f"tiktoken unavailable for {model}, estimating tokens: {str(e)}")
+            _encodings[model] = None
+    encoding = _encodings[model]
+    if encoding is None:
+        return max(1, len(text) // 4) if text else 0
+    return len(encoding.encode(text))
+
+
+def _call_model(kwargs: dict, default: str) -> str:
+    # The model a chat model callback is for, from LangSmith metadata or the invocation parameters
+    metadata = kwargs.get('metadata') or {}
+    params = kwargs.get('invocation_params') or {}
+    return metadata.get('ls_model_name') or params.get('model_name') or params.get('model') or default
+
+
+def _message_text(message) -> str:
+    content = getattr(message, 'content', message)
+    if isinstance(content, list):
+        return " ".join(part.get('text', '') if isinstance(part, dict) else str(part) for part in content)
+    return str(content)
+
+
+class NodeMetricsHandler(BaseCallbackHandler):
+    """Collects LLM and tool metrics for a single node execution"""
+
+    def __init__(self, model: str):
+        self.model = model
+        self.llm_calls = 0
+        self.tool_rounds = 0
+        self.input_tokens = 0
+        self.output_tokens = 0
+        self.tools = []
+        self.models = {}
+        self.extra = {}
+        self._calls = {}
+        self._tool_starts = {}
+        self._lock = threading.Lock()
+
+    def on_chat_model_start(self, serialized, messages, *, run_id: UUID, **kwargs: Any) -> None:
+        # Estimated up front; replaced by the provider's usage figures when they are reported
+        estimate = sum(count_tokens(_message_text(m), self.model) for batch in messages for m in batch)
+        with self._lock:
+            self._calls[run_id] = (estimate, _call_model(kwargs, self.model), time.perf_counter())
+
+    def on_llm_end(self, response, *, run_id: UUID, **kwargs: Any) -> None:
+        input_tokens = output_tokens = None
+        used_tools = False
+        for generations in response.generations:
+            for generation in generations:
+                message = getattr(generation, 'message', None)
+                usage = getattr(message, 'usage_metadata', None)
+                if usage:
+                    input_tokens = (input_tokens or 0) + usage.get('input_tokens', 0)
+                    output_tokens = (output_tokens or 0) + usage.get('output_tokens', 0)
+                if getattr(message, 'tool_calls', None):
+                    used_tools = True
+
+        if output_tokens is None:
+            output_tokens = sum(
+                count_tokens(generation.text or _message_text(getattr(generation, 'message', '')), self.model)
+                for generations in response.generations for generation in generations
+            )
+
+        with self._lock:
+            estimate, model, started = self._calls.pop(run_id, (0, self.model, None))
+            input_tokens = input_tokens if input_tokens is not None else estimate
+            self.llm_calls += 1
+            self.input_tokens += input_tokens
+            self.output_tokens += output_tokens
+            if used_tools:
+                self.tool_rounds += 1
+            stats = self.models.setdefault(model, {'llm_calls': 0, 'input_tokens': 0, 'output_tokens': 0, 'llm_ms': 0.0})
+            stats['llm_calls'] += 1
+            stats['input_tokens'] += input_tokens
+            stats['output_tokens'] += output_tokens
+            if started is not None:
+                stats['llm_ms'] = round(stats['llm_ms'] + (time.perf_counter() - started) * 1000, 1)
+
+    def on_llm_error(self, error, *, run_id: UUID, **kwargs: Any) -> None:
+        with self._lock:
+            self._calls.pop(run_id, None)
+
+    def on_tool_start(self, serialized, input_str, *, run_id: UUID, **kwargs: Any) -> None:
+        with self._lock:
+            self._tool_starts[run_id] = ((serialized or {}).get('name') or kwargs.get('name', 'tool'), time.perf_counter())
+
+    def on_tool_end(self, output, *, run_id: UUID, **kwargs: Any) -> None:
+        self._finish_tool(run_id, error=False)
+
+    def on_tool_error(self, error, *, run_id: UUID, **kwargs: Any) -> None:
+        self._finish_tool(run_id, error=True)
+
+    def _finish_tool(self, run_id, error):
+        with self._lock:
+            started = self._tool_starts.pop(run_id, None)
+            if started is None:
+                return
+            name, start = started
+            self.tools.append({
+                'tool': name,
+                'duration_ms': round((time.perf_counter() - start) * 1000, 1),
+                'error': error,
+            })
+
+
+class RunRecorder:
+    """Accumulates node and tool metrics for one reflection run"""
+
+    def __init__(self, model: str):
+        self.model = model
+        self.nodes = []
+        self.tools = []
+        self.events = {}
+        self.started = time.perf_counter()
+        self.total_ms = None
+        self._lock = threading.Lock()
+
+    def add_node(self, record: dict, tools: list) -> None:
+        with self._lock:
+            self.nodes.append(record)
+            self.tools.extend({'node': record['node'], 'iteration': record['iteration'], **tool} for tool in tools)
+
+    def count(self, event: str) -> None:
+        """Count a timeout, retry, hedge or other resilience event during this run"""
+        with self._lock:
+            self.events[event] = self.events.get(event, 0) + 1
+
+    def finish(self) -> None:
+        self.total_ms = round((time.perf_counter() - self.started) * 1000, 1)
+
+    def as_metadata(self) -> dict:
+        """Return a JSON-serializable summary suitable for Post.generation_metadata"""
+        with self._lock:
+            nodes = list(self.nodes)
+            tools = list(self.tools)
+            events = dict(self.events)
+        return {
+            'model': self.model,
+            'total_ms': self.total_ms,
+            'nodes': nodes,
+            'tools': tools,
+            'totals': {
+                'input_tokens': sum(node['input_tokens'] for node in nodes),
+                'output_tokens': sum(node['output_tokens'] for node in nodes),
+                'llm_calls': sum(node['llm_calls'] for node in nodes),
+                'tool_calls': len(tools),
+                'node_ms': round(sum(node['duration_ms'] for node in nodes), 1),
+                'context_tokens_saved': sum(node.get('context_tokens_saved', 0) for node in nodes),
+            },
+            'resilience': {event: events.get(event, 0) for event in RESILIENCE_EVENTS},
+            'roles': role_totals(nodes),
+        }
+
+
+def role_totals(nodes) -> dict:
+    """
+    LLM calls, tokens and LLM time per model role across a run's node records.
+    
+    A node is attributed to its ``role``, except for calls to its ``router_model``
+    (first-round ReAct calls that only pick searches), which count as "router".
+    """
+    roles = {}
+    for node in nodes:
+        for model, stats in (node.get('models') or {}).items():
+            role = ROLE_ROUTER if model == node.get('router_model') else node.get('role')
+            if role is None:
+                continue
+            totals = roles.setdefault(role, {'model': model, 'llm_calls': 0, 'input_tokens': 0, 'output_tokens': 0, 'llm_ms': 0.0})
+            totals['llm_calls'] += stats['llm_calls']
+            totals['input_tokens'] += stats['input_tokens']
+            totals['output_tokens'] += stats['output_tokens']
+            totals['llm_ms'] = round(totals['llm_ms'] + stats['llm_ms'], 1)
+    return roles
+
+
+@contextmanager
+def record_run(model: str):
+    """Record metrics for every node executed inside this block"""
+    recorder = RunRecorder(model)
+    token = _current_recorder.set(recorder)
+    try:
+        yield recorder
+    finally:
+        recorder.finish()
+        _current_recorder.reset(token)
+
+
+def current_recorder() -> Optional[RunRecorder]:
+    """Return the recorder for the run in progress, if any"""
+    return _current_recorder.get()
+
+
+@contextmanager
+def node_timer(node: str, iteration: int):
+    """Time a graph node and attribute the LLM/tool calls made inside it"""
+    recorder = _current_recorder.get()
+    if recorder is None:
+        yield None
+        return
+
+    handler = NodeMetricsHandler(recorder.model)
+    token = _node_metrics.set(handler)
+    start = time.perf_counter()
+    try:
+        yield handler
+    finally:
+        duration_ms = round((time.perf_counter() - start) * 1000, 1)
+        _node_metrics.reset(token)
+        recorder.add_node({
+            'node': node,
+            'iteration': iteration,
+            'duration_ms': duration_ms,
+            'input_tokens': handler.input_tokens,
+            'output_tokens': handler.output_tokens,
+            'llm_calls': handler.llm_calls,
+            'tool_rounds': handler.tool_rounds,
+            'models': handler.models,
+            **handler.extra,
+        }, handler.tools)
+
+
+def percentile(values, pct: float) -> Optional[float]:
+    """Nearest-rank percentile of ``values`` (None when empty)"""
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = max(1, math.ceil(pct / 100 * len(ordered)))
+    return ordered[min(rank, len(ordered)) - 1]
+
+
+def summarize_runs(metadata_list) -> list:
+    """
+    Aggregate latency and token usage across many runs' generation metadata.
+    
+    Returns:
+        list: One row per node type, tool, model role (LLM time) and the whole run, with count, p50/p95 latency and mean tokens
+    """
+    groups = {}
+    for metadata in metadata_list:
+        if not metadata:
+            continue
+        for node in metadata.get('nodes') or []:
+            groups.setdefault(('node', node['node']), []).append(node)
+        for tool in metadata.get('tools') or []:
+            groups.setdefault(('tool', tool['tool']), []).append(tool)
+        for role, totals in (metadata.get('roles') or {}).items():
+            groups.setdefault(('role', f"{role} ({totals['model']})"), []).append({**totals, 'duration_ms': totals['llm_ms']})
+        if metadata.get('total_ms') is not None:
+            totals = metadata.get('totals') or {}
+            groups.setdefault(('run', 'total'), []).append({'duration_ms': metadata['total_ms'], **totals})
+
+    rows = []
+    for (kind, name), records in sorted(groups.items()):
+        durations = [record['duration_ms'] for record in records]
+        input_tokens = [record['input_tokens'] for record in records if 'input_tokens' in record]
+        output_tokens = [record['output_tokens'] for record in records if 'output_tokens' in record]
+        rows.append({
+            'kind': kind,
+            'name': name,
+            'count': len(records),
+            'p50_ms': percentile(durations, 50),
+            'p95_ms': percentile(durations, 95),
+            'mean_input_tokens': round(sum(input_tokens) / len(input_tokens)) if input_tokens else None,
+            'mean_output_tokens': round(sum(output_tokens) / len(output_tokens)) if output_tokens else None,
+        })
+    return rows
@@ -0,0 +1,175 @@
+"""
+Persistent, content-addressed response cache for the chat model.
+
+``SQLiteLLMCache`` plugs into LangChain's ``BaseCache`` extension point, so it
+is enabled simply by passing it as ``cache=`` to ``ChatOpenAI``. Entries are
+keyed on an xxhash digest of the model name, temperature (and any bound
+tools) plus the serialized message list. Deterministic (temperature 0)
+responses are kept until evicted for size; sampled responses (temperature
+> 0) expire after ``sampled_ttl`` so repeated prompts still see fresh
+variations over time.
+"""
+import json
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Optional, Sequence
+
+import xxhash
+from langchain_core.caches import RETURN_VAL_TYPE, BaseCache
+from langchain_core.load import dumps, loads
+
+_bypass_cache = ContextVar("llm_cache_bypass", default=False)
+
+
+@contextmanager
+def bypass_llm_cache():
+    """Skip cache lookups for LLM calls made inside this block (fresh results are still stored)"""
+    token = _bypass_cache.set(True)
+    try:
+        yield
+    finally:
+        _bypass_cache.reset(token)
+
+
+def _strip_message_ids(value):
+    # Message ids are random per run; leaving them in would make every later-round prompt unique
+    if isinstance(value, dict):
+        kwargs = value.get("kwargs")
+        if value.get("lc") == 1 and isinstance(kwargs, dict):
+            value = {**value, "kwargs": {k: v for k, v in kwargs.items() if k != "id"}}
+        return {k: _strip_message_ids(v) for k, v in value.items()}
+    if isinstance(value, list):
+        return [_strip_message_ids(v) for v in value]
+    return value
+
+
+def _llm_params(llm_string: str) -> dict:
+    """Return the serialized constructor kwargs (model name, temperature, ...) from an llm_string"""
+    try:
+        return json.loads(llm_string.split("---", 1)[0]).get("kwargs", {})
+    except (ValueError, AttributeError):
+        return {}
+
+
+class SQLiteLLMCache(BaseCache):
+    """SQLite-backed LLM response cache with size-based eviction and hit-rate stats"""
+
+    def __init__(self, path: str, max_bytes: int = 50 * 1024 * 1024, sampled_ttl: Optional[float] = 3600):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.sampled_ttl = sampled_ttl
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.bypassed = 0
+
+        with self._connect() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS llm_cache ("
+                " key TEXT PRIMARY KEY,"
+                " model TEXT NOT NULL,"
+                " deterministic INTEGER NOT NULL,"
+                " value TEXT NOT NULL,"
+                " size INTEGER NOT NULL,"
+                " created_at REAL NOT NULL,"
+                " last_accessed REAL NOT NULL,"
+                " hit_count INTEGER NOT NULL DEFAULT 0)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS llm_cache_last_accessed ON llm_cache (last_accessed)")
+
+    def _connect(self):
+        return sqlite3.connect(self.path, timeout=5)
+
+    def _key(self, prompt: str, llm_string: str) -> str:
+        try:
+            prompt = json.dumps(_strip_message_ids(json.loads(prompt)), sort_keys=True)
+        except ValueError:
+            pass
+        return xxhash.xxh3_128_hexdigest(f"{llm_string}\x00{prompt}")
+
+    def lookup(self, prompt: str, llm_string: str) -> Optional[RETURN_VAL_TYPE]:
+        if _bypass_cache.get():
+            with self._lock:
+                self.bypassed += 1
+            return None
+
+        key = self._key(prompt, llm_string)
+        now = time.time()
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT value, deterministic, created_at FROM llm_cache WHERE key = ?", (key,)
+            ).fetchone()
+            if row is not None and not row[1] and self.sampled_ttl is not None and row[2] + self.sampled_ttl <= now:
+                conn.execute("DELETE FROM llm_cache WHERE key = ?", (key,))
+                row = None
+            if row is not None:
+                conn.execute(
+                    "UPDATE llm_cache SET last_accessed = ?, hit_count = hit_count + 1 WHERE key = ?", (now, key)
+                )
+
+        with self._lock:
+            if row is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+        return [loads(generation) for generation in json.loads(row[0])]
+
+    def update(self, prompt: str, llm_string: str, return_val: RETURN_VAL_TYPE) -> None:
+        params = _llm_params(llm_string)
+        temperature = params.get("temperature")
+        value = json.dumps([dumps(generation) for generation in return_val])
+        now = time.time()
+
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO llm_cache"
+                " (key, model, deterministic, value, size, created_at, last_accessed)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (
+                    self._key(prompt, llm_string),
+                    params.get("model_name", ""),
+                    int(temperature == 0),
+                    value,
+                    len(value),
+                    now,
+                    now,
+                ),
+            )
+            self._evict(conn)
+
+    def _evict(self, conn):
+        # Drop least recently used entries until the cache fits in max_bytes
+        total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM llm_cache").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        for key, size in conn.execute("SELECT key, size FROM llm_cache ORDER BY last_accessed").fetchall():
+            conn.execute("DELETE FROM llm_cache WHERE key = ?", (key,))
+            total -= size
+            if total <= self.max_bytes:
+                break
+
+    def clear(self, **kwargs: Any) -> None:
+        with self._connect() as conn:
+            conn.execute("DELETE FROM llm_cache")
+
+    def stats(self) -> dict:
+        """Return process-local hit/miss counters plus the on-disk footprint"""
+        with self._connect() as conn:
+            entries, size, deterministic = conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0), COALESCE(SUM(deterministic), 0) FROM llm_cache"
+            ).fetchone()
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'bypassed': self.bypassed,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+                'entries': entries,
+                'deterministic_entries': deterministic,
+                'sampled_entries': entries - deterministic,
+                'bytes': size,
+            }
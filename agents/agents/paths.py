@@ -0,0 +1,20 @@
+"""
+Default locations of the agent's local state files.
+
+The SQLite files that share state between worker processes (rate limit
+buckets, run checkpoints) live in ``AGENT_DATA_DIR``, or next to
+``db.sqlite3`` in the project directory when it is not set, instead of
+wherever the process happens to be started from.
+"""
+import os
+from pathlib import Path
+
+PROJECT_DIR = Path(__file__).resolve().parents[2]
+
+
+def data_path(setting: str, filename: str) -> str:
+    """The path in the ``setting`` environment variable if set (possibly empty), else ``filename`` in the data directory"""
+    value = os.getenv(setting)
+    if value is not None:
+        return value
+    return str(Path(os.getenv("AGENT_DATA_DIR") or PROJECT_DIR) / filename)
@@ -0,0 +1,106 @@
+"""
+Search pre-fetch for the first generation round.
+
+The first-round prompt tells the ReAct agent to always search, so left to
+itself it spends a whole LLM round trip just deciding to call the search
+tool before it starts drafting. ``SearchPrefetch`` runs those searches up
+front instead: it derives a couple of queries from the user's request, runs
+them concurrently through the (cached, rate-limited) search tool, drops
+duplicate and empty results, trims what is left and hands it to the agent as
+context together with the current time, so the first LLM call can go
+straight to drafting. If every search fails the agent searches as before.
+"""
+import logging
+import os
+from datetime import datetime
+from typing import List
+
+from .search_cache import normalize_query
+
+logger = logging.getLogger(__name__)
+
+NEWS_SUFFIX = "latest news"
+
+
+def _shorten(text: str, max_chars: int) -> str:
+    text = " ".join(str(text).split())
+    if len(text) <= max_chars:
+        return text
+    return text[:max_chars].rsplit(" ", 1)[0] + "..."
+
+
+class SearchPrefetch:
+    """Runs the first round's searches before the agent is invoked"""
+
+    def __init__(self, search_tool, max_queries: int = 2, max_results: int = 6, max_chars: int = 600, query_words: int = 12):
+        self.search_tool = search_tool
+        self.max_queries = max_queries
+        self.max_results = max_results
+        self.max_chars = max_chars
+        self.query_words = query_words
+
+    def queries(self, prompt: str) -> List[str]:
+        """Search queries for ``prompt``: the request itself, then the request as a news query"""
+        base = " ".join(prompt.split()[:self.query_words])
+        candidates = [base]
+        if NEWS_SUFFIX not in normalize_query(base):
+            candidates.append(f"{base} {NEWS_SUFFIX}")
+        queries, seen = [], set()
+        for query in candidates:
+            if query and normalize_query(query) not in seen:
+                seen.add(normalize_query(query))
+                queries.append(query)
+        return queries[:self.max_queries]
+
+    def fetch(self, prompt: str) -> list:
+        """Run the queries concurrently and return deduplicated, trimmed results"""
+        queries = self.queries(prompt)
+        outputs = self.search_tool.batch([{"query": query} for query in queries], return_exceptions=True)
+        return self._merge(queries, outputs)
+
+    async def afetch(self, prompt: str) -> list:
+        """Async variant of ``fetch``"""
+        queries = self.queries(prompt)
+        outputs = await self.search_tool.abatch([{"query": query} for query in queries], return_exceptions=True)
+        return self._merge(queries, outputs)
+
+    def _merge(self, queries, outputs) -> list:
+        results, seen = [], set()
+        for query, output in zip(queries, outputs):
+            # Failed searches come back as exceptions or as an error string instead of a result list
+            if not isinstance(output, list):
+                logger.warning(f"Search pre-fetch for {query!r} failed: {str(output)[:200]}")
+                continue
+            for item in output:
+                if not isinstance(item, dict) or not item.get('content'):
+                    continue
+                key = item.get('url') or normalize_query(item['content'])
+                if key in seen:
+                    continue
+                seen.add(key)
+                results.append({
+                    'title': item.get('title', ''),
+                    'url': item.get('url', ''),
+                    'content': _shorten(item['content'], self.max_chars),
+                })
+        return results[:self.max_results]
+
+    def context(self, results: list) -> str:
+        """Render results as the context block added to the first generation request"""
+        lines = [f"Current date/time: {datetime.now():%Y-%m-%d %H:%M:%S}", "", "Search results:"]
+        for number, result in enumerate(results, 1):
+            heading = " - ".join(part for part in (result['title'], result['url']) if part)
+            lines.append(f"[{number}] {heading}\n{result['content']}")
+        return "\n".join(lines)
+
+
+def default_prefetch(search_tool):
+    """Build the pre-fetch stage from the SEARCH_PREFETCH_* environment variables, or None if disabled"""
+    if os.getenv("SEARCH_PREFETCH_ENABLED", "true").lower() != "true":
+        return None
+    return SearchPrefetch(
+        search_tool,
+        max_queries=int(os.getenv("SEARCH_PREFETCH_QUERIES", "2")),
+        max_results=int(os.getenv("SEARCH_PREFETCH_MAX_RESULTS", "6")),
+        max_chars=int(os.getenv("SEARCH_PREFETCH_MAX_CHARS", "600")),
+    )
@@ -0,0 +1,368 @@
+"""
+Admission control for upstream OpenAI and Tavily calls.
+
+Each upstream gets a ``RateLimiter`` made of token buckets: requests per
+minute and, for the LLM, tokens per minute. Bucket state lives in a small
+SQLite file (``RATE_LIMIT_PATH``) updated in ``BEGIN IMMEDIATE``
+transactions, so every worker process on the host draws from the same
+budget; without a path each process keeps its own buckets in memory.
+
+A caller that finds a bucket empty waits for it to refill, but only up to
+``max_wait`` seconds and only while fewer than ``max_queue`` callers in the
+process are already waiting. Beyond that it gets ``RateLimitExceeded``
+carrying ``retry_after``, which the views turn into a "busy, retry in N s"
+response instead of letting the upstream 429 through.
+
+Token usage is only known once a response arrives, so the tokens bucket is
+debited afterwards, from the result of the API call itself (see
+``TokenMeteredChatMixin``), and new calls are admitted while its balance is
+positive. On the async path the SQLite transactions run in a worker thread
+so they never block the event loop.
+"""
+import asyncio
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Optional
+
+from langchain_core.callbacks import AsyncCallbackManagerForToolRun, CallbackManagerForToolRun
+from langchain_core.rate_limiters import BaseRateLimiter
+from langchain_core.tools import BaseTool
+from pydantic import BaseModel, ConfigDict
+
+from .paths import data_path
+
+
+class RateLimitExceeded(Exception):
+    """Raised when an upstream call cannot be admitted soon enough"""
+
+    def __init__(self, name: str, retry_after: float):
+        self.name = name
+        self.retry_after = max(1, int(retry_after + 0.999))
+        super().__init__(f"The {name} service is busy, retry in {self.retry_after} s")
+
+
+class TokenBucket:
+    """Refilling bucket of ``capacity`` units gaining ``capacity / period`` units per second"""
+
+    def __init__(self, name: str, capacity: float, period: float = 60, path: Optional[str] = None):
+        self.name = name
+        self.capacity = capacity
+        self.rate = capacity / period
+        self.path = path
+        self._lock = threading.Lock()
+        self._tokens = capacity
+        self._updated_at = time.time()
+
+        if self.path:
+            with self._connect() as conn:
+                conn.execute(
+                    "CREATE TABLE IF NOT EXISTS rate_buckets ("
+                    " name TEXT PRIMARY KEY, tokens REAL NOT NULL, updated_at REAL NOT NULL)"
+                )
+
+    def _connect(self):
+        return sqlite3.connect(self.path, timeout=5, isolation_level=None)
+
+    def take(self, cost: float, minimum: float = None) -> float:
+        """
+        Take ``cost`` units if the balance allows it.
+
+        Args:
+            cost: Units to remove on success (0 for a pure admission check)
+            minimum: Balance required to succeed (defaults to ``cost``)
+
+        Returns:
+            float: 0 on success, otherwise the seconds until the balance will suffice
+        """
+        minimum = cost if minimum is None else minimum
+        if not self.path:
+            with self._lock:
+                self._tokens, self._updated_at = self._refill(self._tokens, self._updated_at)
+                return self._apply(cost, minimum)
+
+        conn = self._connect()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            row = conn.execute("SELECT tokens, updated_at FROM rate_buckets WHERE name = ?", (self.name,)).fetchone()
+            tokens, updated_at = row if row else (self.capacity, time.time())
+            self._tokens, self._updated_at = self._refill(tokens, updated_at)
+            wait = self._apply(cost, minimum)
+            conn.execute(
+                "INSERT OR REPLACE INTO rate_buckets (name, tokens, updated_at) VALUES (?, ?, ?)",
+                (self.name, self._tokens, self._updated_at),
+            )
+            conn.execute("COMMIT")
+            return wait
+        finally:
+            conn.close()
+
+    def debit(self, cost: float) -> None:
+        """Remove ``cost`` units unconditionally; the balance may go negative"""
+        self.take(cost, minimum=float('-inf'))
+
+    def _refill(self, tokens, updated_at):
+        now = time.time()
+        return min(self.capacity, tokens + (now - updated_at) * self.rate), now
+
+    def _apply(self, cost, minimum):
+        if self._tokens >= minimum:
+            self._tokens -= cost
+            return 0.0
+        return (minimum - self._tokens) / self.rate
+
+
+class RateLimiter:
+    """Requests-per-minute (and optionally tokens-per-minute) admission control for one upstream"""
+
+    def __init__(
+        self,
+        name: str,
+        requests_per_minute: float,
+        tokens_per_minute: float = 0,
+        max_queue: int = 32,
+        max_wait: float = 30,
+        path: Optional[str] = None,
+    ):
+        self.name = name
+        self.max_queue = max_queue
+        self.max_wait = max_wait
+        self.requests = TokenBucket(f"{name}:requests", requests_per_minute, path=path) if requests_per_minute else None
+        self.tokens = TokenBucket(f"{name}:tokens", tokens_per_minute, path=path) if tokens_per_minute else None
+        self.shared = bool(path)
+        self._lock = threading.Lock()
+        self._waiting = 0
+        self._stats = {
+            'admitted': 0,
+            'rejected': 0,
+            'waited': 0,
+            'total_wait_ms': 0.0,
+            'max_wait_ms': 0.0,
+            'max_queue_depth': 0,
+        }
+
+    def _wait_time(self) -> float:
+        # Admission needs a positive token balance and one request; only take the request once both allow it
+        if self.tokens is not None:
+            wait = self.tokens.take(0, minimum=1)
+            if wait:
+                return wait
+        if self.requests is not None:
+            return self.requests.take(1)
+        return 0.0
+
+    async def _await_wait_time(self) -> float:
+        # The shared buckets take a blocking SQLite write lock, which must not stall the event loop
+        if self.shared:
+            return await asyncio.to_thread(self._wait_time)
+        return self._wait_time()
+
+    def _enter_queue(self, wait: float) -> None:
+        with self._lock:
+            if self._waiting >= self.max_queue or wait > self.max_wait:
+                self._stats['rejected'] += 1
+                raise RateLimitExceeded(self.name, wait)
+            self._waiting += 1
+            self._stats['max_queue_depth'] = max(self._stats['max_queue_depth'], self._waiting)
+
+    def _leave_queue(self) -> None:
+        with self._lock:
+            self._waiting -= 1
+
+    def _record(self, waited: float) -> None:
+        with self._lock:
+            self._stats['admitted'] += 1
+            if waited:
+                waited_ms = waited * 1000
+                self._stats['waited'] += 1
+                self._stats['total_wait_ms'] += waited_ms
+                self._stats['max_wait_ms'] = max(self._stats['max_wait_ms'], waited_ms)
+
+    def acquire(self) -> float:
+        """Block until the call is admitted; return the seconds waited or raise RateLimitExceeded"""
+        wait = self._wait_time()
+        if not wait:
+            self._record(0)
+            return 0.0
+
+        started = time.perf_counter()
+        self._enter_queue(wait)
+        try:
+            while wait:
+                time.sleep(min(wait, 1.0))
+                wait = self._wait_time()
+                if wait and time.perf_counter() - started + wait > self.max_wait:
+                    with self._lock:
+                        self._stats['rejected'] += 1
+                    raise RateLimitExceeded(self.name, wait)
+        finally:
+            self._leave_queue()
+        waited = time.perf_counter() - started
+        self._record(waited)
+        return waited
+
+    async def aacquire(self) -> float:
+        """Async variant of ``acquire`` that waits without blocking the event loop"""
+        wait = await self._await_wait_time()
+        if not wait:
+            self._record(0)
+            return 0.0
+
+        started = time.perf_counter()
+        self._enter_queue(wait)
+        try:
+            while wait:
+                await asyncio.sleep(min(wait, 1.0))
+                wait = await self._await_wait_time()
+                if wait and time.perf_counter() - started + wait > self.max_wait:
+                    with self._lock:
+                        self._stats['rejected'] += 1
+                    raise RateLimitExceeded(self.name, wait)
+        finally:
+            self._leave_queue()
+        waited = time.perf_counter() - started
+        self._record(waited)
+        return waited
+
+    def record_tokens(self, tokens: int) -> None:
+        """Charge the tokens a finished call actually used"""
+        if self.tokens is not None and tokens:
+            self.tokens.debit(tokens)
+
+    async def arecord_tokens(self, tokens: int) -> None:
+        """Async variant of ``record_tokens``"""
+        if self.tokens is not None and tokens:
+            if self.shared:
+                await asyncio.to_thread(self.tokens.debit, tokens)
+            else:
+                self.tokens.debit(tokens)
+
+    def stats(self) -> dict:
+        with self._lock:
+            stats = {**self._stats, 'queue_depth': self._waiting}
+        stats['mean_wait_ms'] = round(stats['total_wait_ms'] / stats['waited'], 1) if stats['waited'] else 0.0
+        stats['total_wait_ms'] = round(stats['total_wait_ms'], 1)
+        stats['max_wait_ms'] = round(stats['max_wait_ms'], 1)
+        return stats
+
+
+class ChatRateLimiter(BaseRateLimiter):
+    """Adapter passed as ``rate_limiter=`` to the chat model; only real API calls reach it (not cache hits)"""
+
+    def __init__(self, limiter: RateLimiter):
+        self.limiter = limiter
+
+    def acquire(self, *, blocking: bool = True) -> bool:
+        if not blocking:
+            return not self.limiter._wait_time()
+        self.limiter.acquire()
+        return True
+
+    async def aacquire(self, *, blocking: bool = True) -> bool:
+        if not blocking:
+            return not await self.limiter._await_wait_time()
+        await self.limiter.aacquire()
+        return True
+
+
+def result_tokens(result) -> int:
+    """Total tokens reported for a ChatResult (by its messages' usage metadata, else its llm_output)"""
+    total = 0
+    for generation in result.generations:
+        usage = getattr(getattr(generation, 'message', None), 'usage_metadata', None) or {}
+        total += usage.get('total_tokens', 0)
+    if not total and result.llm_output:
+        total = (result.llm_output.get('token_usage') or {}).get('total_tokens', 0)
+    return total
+
+
+class TokenMeteredChatMixin(BaseModel):
+    """
+    Mixin for a chat model with a ChatRateLimiter that charges each API call's tokens to the limiter.
+
+    ``_generate``/``_agenerate`` are only reached on cache misses, after the
+    rate limiter has admitted the call, so only real API calls are charged.
+    """
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs):
+        result = super()._generate(messages, stop=stop, run_manager=run_manager, **kwargs)
+        if isinstance(self.rate_limiter, ChatRateLimiter):
+            self.rate_limiter.limiter.record_tokens(result_tokens(result))
+        return result
+
+    async def _agenerate(self, messages, stop=None, run_manager=None, **kwargs):
+        result = await super()._agenerate(messages, stop=stop, run_manager=run_manager, **kwargs)
+        if isinstance(self.rate_limiter, ChatRateLimiter):
+            await self.rate_limiter.limiter.arecord_tokens(result_tokens(result))
+        return result
+
+
+class RateLimitedTool(BaseTool):
+    """Tool wrapper that passes every call through a RateLimiter first"""
+
+    model_config = ConfigDict(arbitrary_types_allowed=True)
+
+    tool: BaseTool
+    limiter: RateLimiter
+
+    @classmethod
+    def wrap(cls, tool: BaseTool, limiter: RateLimiter) -> "RateLimitedTool":
+        """Wrap ``tool`` keeping its name, description, argument schema and response format"""
+        return cls(
+            name=tool.name,
+            description=tool.description,
+            args_schema=tool.args_schema,
+            response_format=tool.response_format,
+            tool=tool,
+            limiter=limiter,
+        )
+
+    def _run(self, *args: Any, run_manager: Optional[CallbackManagerForToolRun] = None, **kwargs: Any):
+        self.limiter.acquire()
+        return self.tool._run(*args, run_manager=run_manager, **kwargs)
+
+    async def _arun(self, *args: Any, run_manager: Optional[AsyncCallbackManagerForToolRun] = None, **kwargs: Any):
+        await self.limiter.aacquire()
+        return await self.tool._arun(*args, run_manager=run_manager, **kwargs)
+
+
+_limiters = {}
+_limiters_lock = threading.Lock()
+
+LIMIT_SETTINGS = {
+    'llm': ("LLM_REQUESTS_PER_MINUTE", "500", "LLM_TOKENS_PER_MINUTE", "30000"),
+    'search': ("SEARCH_REQUESTS_PER_MINUTE", "100", None, None),
+}
+
+
+def get_rate_limiter(name: str) -> Optional[RateLimiter]:
+    """Return the process-wide limiter for ``name`` ("llm" or "search") built from the environment, or None if disabled"""
+    with _limiters_lock:
+        if name not in _limiters:
+            _limiters[name] = _build_rate_limiter(name)
+        return _limiters[name]
+
+
+def _build_rate_limiter(name):
+    if os.getenv("RATE_LIMIT_ENABLED", "true").lower() != "true":
+        return None
+    requests_var, requests_default, tokens_var, tokens_default = LIMIT_SETTINGS[name]
+    requests_per_minute = float(os.getenv(requests_var, requests_default))
+    tokens_per_minute = float(os.getenv(tokens_var, tokens_default)) if tokens_var else 0
+    if not requests_per_minute and not tokens_per_minute:
+        return None
+    return RateLimiter(
+        name,
+        requests_per_minute=requests_per_minute,
+        tokens_per_minute=tokens_per_minute,
+        max_queue=int(os.getenv("RATE_LIMIT_MAX_QUEUE", "32")),
+        max_wait=float(os.getenv("RATE_LIMIT_MAX_WAIT", "30")),
+        path=data_path("RATE_LIMIT_PATH", "rate_limits.sqlite3") or None,
+    )
+
+
+def rate_limit_stats() -> dict:
+    """Queue depth and wait-time metrics of every limiter built so far"""
+    with _limiters_lock:
+        return {name: limiter.stats() for name, limiter in _limiters.items() if limiter is not None}
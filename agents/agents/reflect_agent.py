@@ -1,31 +1,132 @@
+import uuid
+from contextlib import ExitStack, contextmanager
 from typing import List, Sequence
 from dotenv import load_dotenv
 from langchain_core.messages import BaseMessage, HumanMessage
+from langchain_core.runnables import RunnableLambda
 from langgraph.graph import END, MessageGraph
-from .chains import generation_chain, reflection_chain, GENERATION_PROMPT_FIRST 
+from .chains import (
+    GENERATION_PROMPT_FINAL,
+    GENERATION_PROMPT_FIRST,
+    GENERATION_PROMPT_PREFETCHED,
+    REFLECTION_VERDICT_INSTRUCTIONS,
+)
+from .checkpoints import ResumableRunError
+from .context import ContextPolicy, default_context_policy
+from .factory import get_agent
+from .instrumentation import node_timer, record_run
+from .llm_cache import bypass_llm_cache
+from .resilience import run_deadline
+from .singleflight import get_singleflight, request_key
+from .stopping import StoppingPolicy, default_stopping_policy, drafts, is_feedback, parse_verdict
+from .tiers import ROLE_DRAFT, ROLE_FINAL, ROLE_REFLECT, ROLE_ROUTER
 
 load_dotenv()
 
 REFLECT = "reflect"
 GENERATE = "generate"
 
-def create_reflection_graph():
-    """Create and return the reflection graph for use in Django views"""
+def create_reflection_graph(
+    generation_chain,
+    reflection_chain,
+    policy: StoppingPolicy = None,
+    context_policy: ContextPolicy = None,
+    model_name: str = "gpt-4o",
+    checkpointer=None,
+    prefetch=None,
+    tiers=None,
+):
+    """
+    Create and return the reflection graph for use in Django views.
+    
+    Nodes are checkpointed if ``checkpointer`` is given; with a ``prefetch``
+    stage the first generation gets search results up front instead of
+    having the agent decide to search. With ``tiers`` each draft, critique
+    and routing call runs on its role's model (see tiers.py); a run's
+    ``configurable["models"]`` overrides them per request.
+    """
+    policy = policy or default_stopping_policy()
+    context_policy = context_policy or default_context_policy(model_name)
     graph = MessageGraph()
 
-    def generate_node(state):
+    def generate_node(state, config):
+        with node_timer(GENERATE, len(drafts(state)) + 1) as metrics:
+            search_results = prefetch.fetch(state[0].content) if prefetch and len(state) == 1 else None
+            chain, role, stop_reason = _generation_plan(state, config, metrics, search_results)
+            response = chain.invoke(_generation_input(state, metrics, search_results, stop_reason))
+            return _tag_draft(_last_message(response), role, stop_reason)
+
+    async def agenerate_node(state, config):
+        with node_timer(GENERATE, len(drafts(state)) + 1) as metrics:
+            search_results = await prefetch.afetch(state[0].content) if prefetch and len(state) == 1 else None
+            chain, role, stop_reason = _generation_plan(state, config, metrics, search_results)
+            response = await chain.ainvoke(_generation_input(state, metrics, search_results, stop_reason))
+            return _tag_draft(_last_message(response), role, stop_reason)
+
+    def _models(config):
+        # The tiers' model per role, as overridden for this run
+        return ((config or {}).get('configurable') or {}).get('models') or tiers.models
+
+    def _generation_plan(state, config, metrics, search_results=None):
+        """Pick the chain for the next draft: returns (chain, role, stop reason if this is the final revision)"""
+        if tiers is None:
+            return generation_chain, None, None
+        models = _models(config)
+        # The loop only gets here after deciding to stop if the last draft needs revising with the final model
+        stop_reason = policy.check(state)
+        planned_last = policy.max_iterations is not None and len(drafts(state)) + 1 >= policy.max_iterations
+        role = ROLE_FINAL if stop_reason or planned_last else ROLE_DRAFT
+        # Without pre-fetched results the first ReAct call only decides what to search for
+        router = models[ROLE_ROUTER] if len(state) == 1 and not search_results else None
+        if metrics is not None:
+            metrics.extra['role'] = role
+            metrics.extra['model'] = models[role]
+            if router and router != models[role]:
+                metrics.extra['router_model'] = router
+        return tiers.generation_chain(models[role], router), role, stop_reason
+
+    def _tag_draft(messages, role, stop_reason):
+        # Remember which tier wrote the draft, and mark the final revision so the loop ends after it
+        if role is None:
+            return messages
+        tags = {'model_role': role, **({'stop_reason': stop_reason} if stop_reason else {})}
+        return [message.model_copy(update={'additional_kwargs': {**message.additional_kwargs, **tags}}) for message in messages]
+
+    def _needs_final_draft(state, config):
+        # Stopping on a draft from a cheaper model: revise it once more with the final model
+        if tiers is None:
+            return False
+        models = _models(config)
+        if models[ROLE_DRAFT] == models[ROLE_FINAL]:
+            return False
+        return drafts(state)[-1].additional_kwargs.get('model_role', ROLE_FINAL) != ROLE_FINAL
+
+    def _generation_input(state, metrics, search_results=None, stop_reason=None):
         # Add system instructions to the first message if this is the initial generation
         if len(state) == 1:
             # First generation - add system instructions
             user_message = state[0].content
             system_instructions = GENERATION_PROMPT_FIRST
             
+            # Pre-fetched search results let the agent draft on its first call
+            if search_results:
+                system_instructions = f"{GENERATION_PROMPT_PREFETCHED}\n\n{prefetch.context(search_results)}"
+                if metrics is not None:
+                    metrics.extra['prefetched_results'] = len(search_results)
+            
             enhanced_message = HumanMessage(content=f"{system_instructions}\n\nUser request: {user_message}")
-            result = generation_chain.invoke({"messages": [enhanced_message]})
-        else:
-            # Subsequent generations - use the current state
-            result = generation_chain.invoke({"messages": state})
+            return {"messages": [enhanced_message]}
         
+        # Subsequent generations - latest draft and critique, within the context budget
+        messages, tokens_saved = context_policy.build(state)
+        if metrics is not None:
+            metrics.extra['context_tokens_saved'] = tokens_saved
+        if stop_reason and not is_feedback(state[-1]):
+            # Final revision of a draft the loop stopped on without a critique
+            messages = messages + [HumanMessage(content=GENERATION_PROMPT_FINAL)]
+        return {"messages": messages}
+
+    def _last_message(result):
         # Extract the final message from the result
         if isinstance(result, dict) and 'messages' in result:
             return result['messages'][-1:]
@@ -34,7 +135,24 @@ def create_reflection_graph():
         else:
             return [result]
 
-    def reflect_node(state):
+    def reflect_node(state, config):
+        with node_timer(REFLECT, len(drafts(state))) as metrics:
+            return _feedback(_reflection_chain(config, metrics).invoke(_critique_input(state)))
+
+    async def areflect_node(state, config):
+        with node_timer(REFLECT, len(drafts(state))) as metrics:
+            return _feedback(await _reflection_chain(config, metrics).ainvoke(_critique_input(state)))
+
+    def _reflection_chain(config, metrics):
+        if tiers is None:
+            return reflection_chain
+        model = _models(config)[ROLE_REFLECT]
+        if metrics is not None:
+            metrics.extra['role'] = ROLE_REFLECT
+            metrics.extra['model'] = model
+        return tiers.reflection_chain(model)
+
+    def _critique_input(state):
         # Get the last message content from the generation chain
         last_message = state[-1]
         if hasattr(last_message, 'content'):
@@ -43,48 +161,109 @@ def create_reflection_graph():
             last_content = str(last_message)
         
         # Create a simple message for reflection
-        reflection_input = [HumanMessage(content=f"Please critique this post: {last_content}")]
-        
-        response = reflection_chain.invoke({
-            "messages": reflection_input
-        })
-        
+        critique_request = f"Please critique this post: {last_content}"
+        if policy.wants_verdict:
+            critique_request = f"{critique_request}\n\n{REFLECTION_VERDICT_INSTRUCTIONS}"
+        return {"messages": [HumanMessage(content=critique_request)]}
+
+    def _feedback(response):
         # Return as a list containing the feedback message
+        if policy.wants_verdict:
+            critique, verdict = parse_verdict(response.content)
+            return [HumanMessage(content=f"Feedback: {critique}", additional_kwargs={'verdict': verdict})]
         return [HumanMessage(content=f"Feedback: {response.content}")]
 
-    graph.add_node(GENERATE, generate_node)
-    graph.add_node(REFLECT, reflect_node)
+    # Each node has a sync and an async implementation: app.invoke runs the former, app.ainvoke the latter
+    graph.add_node(GENERATE, RunnableLambda(generate_node, afunc=agenerate_node, name=GENERATE))
+    graph.add_node(REFLECT, RunnableLambda(reflect_node, afunc=areflect_node, name=REFLECT))
     graph.set_entry_point(GENERATE)
 
-    def should_continue(state):
-        if (len(state) > 6):
-            return END 
+    def should_continue(state, config):
+        if state[-1].additional_kwargs.get('stop_reason'):
+            return END
+        if policy.check(state):
+            return GENERATE if _needs_final_draft(state, config) else END
         return REFLECT
 
-    graph.add_conditional_edges(GENERATE, should_continue)
-    graph.add_edge(REFLECT, GENERATE)
+    def should_revise(state, config):
+        if policy.check(state) and not _needs_final_draft(state, config):
+            return END
+        return GENERATE
+
+    graph.add_conditional_edges(GENERATE, should_continue, [REFLECT, GENERATE, END])
+    graph.add_conditional_edges(REFLECT, should_revise, [GENERATE, END])
+
+    return graph.compile(checkpointer=checkpointer)
 
-    return graph.compile()
+def __getattr__(name):
+    # The compiled app is built lazily by the agent factory (see factory.get_agent)
+    if name in ("app", "stopping_policy"):
+        return getattr(get_agent(), name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
-# Create the compiled app for use in Django
-app = create_reflection_graph()
+@contextmanager
+def _run_context(agent, bypass_cache: bool):
+    """Apply per-run cache settings and deadline, and record node metrics for one reflection run"""
+    with ExitStack() as stack:
+        if bypass_cache:
+            stack.enter_context(bypass_llm_cache())
+        stack.enter_context(run_deadline(agent.llm))
+        yield stack.enter_context(record_run(agent.llm.model_name))
 
-def process_user_request(user_input: str) -> dict:
+@contextmanager
+def _checkpointed(agent, thread_id: str):
     """
-    Process a user request through the reflection agent.
+    Yield the graph config that checkpoints this run under ``thread_id``.
+    
+    A run that fails after saving progress is re-raised as ResumableRunError so
+    the caller can offer to resume it; a finished run's checkpoints are dropped.
+    """
+    if agent.checkpointer is None:
+        yield None
+        return
+    try:
+        yield {"configurable": {"thread_id": thread_id}}
+    except Exception as e:
+        if agent.checkpointer.has_thread(thread_id):
+            raise ResumableRunError(thread_id, e) from e
+        raise
+    agent.checkpointer.delete_thread(thread_id)
+    agent.checkpointer.maybe_prune()
+
+def new_thread_id() -> str:
+    return uuid.uuid4().hex
+
+def _resolve_models(agent, models):
+    """Per-role model overrides for one run, validated against the agent's tiers (ValueError if not allowed)"""
+    if not models or agent.tiers is None:
+        return None
+    return agent.tiers.resolve(models)
+
+def _with_models(config, models):
+    # Per-request model overrides travel to the nodes in the run's configurable settings
+    if not models:
+        return config
+    config = dict(config or {})
+    config['configurable'] = {**config.get('configurable', {}), 'models': models}
+    return config
+
+def build_result(response, recorder=None, policy: StoppingPolicy = None) -> dict:
+    """
+    Extract the final post and conversation history from a list of graph messages.
     
     Args:
-        user_input: The user's content request
+        response: The messages produced by the reflection graph
+        recorder: Optional RunRecorder whose metrics become ``generation_metadata``
+        policy: Stopping policy the run used, to record why it stopped
         
     Returns:
         dict: Contains the full conversation history and final result
     """
-    response = app.invoke(HumanMessage(content=user_input))
-    
-    # Process the response to extract the final post and conversation history
     result = {
         'conversation_history': [],
         'final_post': None,
+        'iterations': 0,
+        'stop_reason': None,
         'raw_response': response
     }
     
@@ -105,14 +284,162 @@ def process_user_request(user_input: str) -> dict:
         
         if not result['final_post'] and response:
             result['final_post'] = response[-1].content if hasattr(response[-1], 'content') else str(response[-1])
+        
+        # Record how many drafts were produced and why the loop stopped (a final-model revision carries the reason)
+        result['iterations'] = len(drafts(response))
+        final_reason = getattr(response[-1], 'additional_kwargs', {}).get('stop_reason')
+        result['stop_reason'] = final_reason or (policy.check(response) if policy else None)
+    
+    if recorder is not None:
+        result['generation_metadata'] = {
+            **recorder.as_metadata(),
+            'iterations': result['iterations'],
+            'stop_reason': result['stop_reason'],
+        }
     
     return result
 
+def process_user_request(user_input: str, bypass_cache: bool = False, thread_id: str = None, models: dict = None) -> dict:
+    """
+    Process a user request through the reflection agent.
+    
+    Args:
+        user_input: The user's content request
+        bypass_cache: Skip LLM response cache lookups for this run
+        thread_id: Checkpoint thread for this run (generated if omitted)
+        models: Model per role ("final", "draft", "reflect", "router") overriding the configured tiers
+        
+    Returns:
+        dict: Contains the full conversation history and final result
+        
+    Raises:
+        ResumableRunError: The run failed after some nodes completed; pass its
+        ``thread_id`` to ``resume_user_request`` to continue it
+    """
+    agent = get_agent()
+    models = _resolve_models(agent, models)
+    
+    def run():
+        with _run_context(agent, bypass_cache) as recorder, _checkpointed(agent, thread_id or new_thread_id()) as config:
+            response = agent.app.invoke(HumanMessage(content=user_input), _with_models(config, models))
+        
+        # Process the response to extract the final post and conversation history
+        return build_result(response, recorder, agent.stopping_policy)
+    
+    # Identical concurrent requests share one run
+    flight = get_singleflight()
+    if flight is None:
+        return run()
+    return flight.do(request_key(user_input, agent, bypass_cache, models), run)
+
+async def aprocess_user_request(user_input: str, bypass_cache: bool = False, thread_id: str = None, models: dict = None) -> dict:
+    """
+    Async variant of process_user_request built on app.ainvoke, for concurrent fan-out.
+    
+    Args:
+        user_input: The user's content request
+        bypass_cache: Skip LLM response cache lookups for this run
+        thread_id: Checkpoint thread for this run (generated if omitted)
+        models: Model per role overriding the configured tiers
+        
+    Returns:
+        dict: Contains the full conversation history and final result
+    """
+    agent = get_agent()
+    models = _resolve_models(agent, models)
+    
+    async def run():
+        with _run_context(agent, bypass_cache) as recorder, _checkpointed(agent, thread_id or new_thread_id()) as config:
+            response = await agent.app.ainvoke(HumanMessage(content=user_input), _with_models(config, models))
+        
+        return build_result(response, recorder, agent.stopping_policy)
+    
+    flight = get_singleflight()
+    if flight is None:
+        return await run()
+    return await flight.ado(request_key(user_input, agent, bypass_cache, models), run)
+
+def resume_user_request(thread_id: str, bypass_cache: bool = False) -> dict:
+    """
+    Continue a failed run from its last completed node.
+    
+    Args:
+        thread_id: The ``thread_id`` of the ResumableRunError the run raised
+        bypass_cache: Skip LLM response cache lookups for this run
+        
+    Returns:
+        dict: The same payload as ``process_user_request``
+    """
+    agent = get_agent()
+    if agent.checkpointer is None or not agent.checkpointer.has_thread(thread_id):
+        raise ValueError("There is no saved progress for this run; it may have expired.")
+    
+    with _run_context(agent, bypass_cache) as recorder, _checkpointed(agent, thread_id) as config:
+        response = agent.app.invoke(None, config)
+    
+    return build_result(response, recorder, agent.stopping_policy)
+
+async def aresume_user_request(thread_id: str, bypass_cache: bool = False) -> dict:
+    """Async variant of resume_user_request built on app.ainvoke"""
+    agent = get_agent()
+    if agent.checkpointer is None or not agent.checkpointer.has_thread(thread_id):
+        raise ValueError("There is no saved progress for this run; it may have expired.")
+    
+    with _run_context(agent, bypass_cache) as recorder, _checkpointed(agent, thread_id) as config:
+        response = await agent.app.ainvoke(None, config)
+    
+    return build_result(response, recorder, agent.stopping_policy)
+
+def stream_user_request(user_input: str, bypass_cache: bool = False, thread_id: str = None, models: dict = None):
+    """
+    Process a user request through the reflection agent, yielding each step as it finishes.
+    
+    Args:
+        user_input: The user's content request
+        bypass_cache: Skip LLM response cache lookups for this run
+        thread_id: Checkpoint thread for this run (generated if omitted)
+        models: Model per role overriding the configured tiers
+        
+    Yields:
+        dict: One event per completed GENERATE/REFLECT node, of the form
+        ``{'type': 'step', 'node': ..., 'content': ..., 'is_feedback': ...}``,
+        followed by a final ``{'type': 'done', **result}`` event carrying the
+        same payload as ``process_user_request``
+    """
+    agent = get_agent()
+    models = _resolve_models(agent, models)
+    user_message = HumanMessage(content=user_input)
+    messages = [user_message]
+    
+    with _run_context(agent, bypass_cache) as recorder, _checkpointed(agent, thread_id or new_thread_id()) as config:
+        for update in agent.app.stream(user_message, _with_models(config, models), stream_mode="updates"):
+            for node, output in update.items():
+                new_messages = output if isinstance(output, list) else [output]
+                for msg in new_messages:
+                    messages.append(msg)
+                    content = msg.content if hasattr(msg, 'content') else str(msg)
+                    yield {
+                        'type': 'step',
+                        'node': node,
+                        'content': content,
+                        'is_feedback': content.startswith("Feedback:"),
+                    }
+    
+    result = build_result(messages, recorder, agent.stopping_policy)
+    yield {
+        'type': 'done',
+        'final_post': result['final_post'],
+        'conversation_history': result['conversation_history'],
+        'generation_metadata': result['generation_metadata'],
+        'iterations': result['iterations'],
+        'stop_reason': result['stop_reason'],
+    }
+
 # For backwards compatibility and testing
 if __name__ == "__main__":
     print("🔄 LangGraph Reflection Agent")
     print("📊 Graph Structure:")
-    print(app.get_graph().draw_mermaid())
+    print(get_agent().app.get_graph().draw_mermaid())
     print("\n" + "="*50)
 
     print("🚀 Starting generation-reflection loop...")
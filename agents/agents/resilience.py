@@ -0,0 +1,346 @@
+"""
+Timeouts, retries and hedged requests for chat model calls.
+
+A ``ResiliencePolicy`` sits underneath the LangChain cache and rate limiter
+(it wraps ``_generate``/``_agenerate`` of the model, see
+``ResilientChatMixin``), so only real API calls are affected:
+
+* every call gets a deadline (``call_timeout``), shortened to whatever is left
+  of the run's overall deadline (``run_timeout``, opened by ``run_deadline``),
+  and passed to the client as the request's own HTTP timeout, so a call that
+  runs out of time ends instead of being left running;
+* transient failures (timeouts, connection errors, 429/5xx responses) are
+  retried up to ``max_retries`` times with full-jitter exponential backoff;
+* with hedging on, a duplicate call is fired once the first one has been
+  running longer than the observed p95 latency, and whichever answers first
+  wins.
+
+Each mechanism that fires is counted on the current ``RunRecorder`` and ends
+up in ``generation_metadata['resilience']``.
+"""
+import asyncio
+import contextvars
+import os
+import random
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Optional
+
+import openai
+from langchain_core.language_models import BaseChatModel
+from pydantic import BaseModel, PrivateAttr
+
+from .instrumentation import current_recorder, percentile
+
+_run_deadline: ContextVar[Optional[float]] = ContextVar("llm_run_deadline", default=None)
+
+# Hedged sync calls run here so the first answer can win. Every call is bounded by its HTTP timeout,
+# so a losing or stalled call gives its thread back within call_timeout; unhedged calls stay in the caller's thread
+_executor = ThreadPoolExecutor(max_workers=32, thread_name_prefix="llm-call")
+
+
+class LLMCallTimeout(TimeoutError):
+    """Raised when a single model call does not answer within its deadline"""
+
+    def __init__(self, timeout: float):
+        self.timeout = timeout
+        super().__init__(f"The language model did not answer within {round(timeout, 1):g} s")
+
+
+class RunDeadlineExceeded(TimeoutError):
+    """Raised when a generation run has used up its overall time budget"""
+
+    def __init__(self, run_timeout: float):
+        self.run_timeout = run_timeout
+        super().__init__(f"The generation did not finish within {round(run_timeout, 1):g} s")
+
+
+TRANSIENT_ERRORS = (
+    LLMCallTimeout,
+    openai.APITimeoutError,
+    openai.APIConnectionError,
+    openai.RateLimitError,
+    openai.InternalServerError,
+)
+
+
+# Client settings derived from the policy; left out of the model's serialized parameters
+TRANSPORT_PARAMS = ('request_timeout', 'timeout', 'max_retries')
+
+
+def _count(event: str) -> None:
+    recorder = current_recorder()
+    if recorder is not None:
+        recorder.count(event)
+
+
+class _PooledCall:
+    """A model call on the hedging pool; its clock starts when a worker picks it up, not when it is queued"""
+
+    def __init__(self, policy: "ResiliencePolicy", fn):
+        self.started = None
+        self.running = threading.Event()
+        self._policy = policy
+        # Each call gets its own context copy; one context cannot be entered by two threads at once
+        self.future = _executor.submit(contextvars.copy_context().run, self._run, fn)
+
+    def _run(self, fn):
+        self.started = time.perf_counter()
+        self.running.set()
+        return fn(self._policy._timeout())
+
+
+class ResiliencePolicy:
+    """Per-call and per-run deadlines, jittered retries and p95 hedging for one chat model"""
+
+    def __init__(
+        self,
+        call_timeout: float = 60,
+        run_timeout: float = 300,
+        max_retries: int = 3,
+        backoff_base: float = 0.5,
+        backoff_max: float = 8,
+        hedging: bool = False,
+        hedge_percentile: float = 95,
+        hedge_min_samples: int = 20,
+        window: int = 200,
+    ):
+        self.call_timeout = call_timeout
+        self.run_timeout = run_timeout
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.hedging = hedging
+        self.hedge_percentile = hedge_percentile
+        self.hedge_min_samples = hedge_min_samples
+        self._latencies = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def run_deadline(self):
+        """Give the model calls made inside this block ``run_timeout`` seconds in total"""
+        token = _run_deadline.set(time.monotonic() + self.run_timeout if self.run_timeout else None)
+        try:
+            yield
+        finally:
+            _run_deadline.reset(token)
+
+    def hedge_delay(self) -> Optional[float]:
+        """Seconds after which to hedge a call, or None until enough latencies have been observed"""
+        if not self.hedging:
+            return None
+        with self._lock:
+            if len(self._latencies) < self.hedge_min_samples:
+                return None
+            return percentile(self._latencies, self.hedge_percentile)
+
+    def _observe(self, seconds: float) -> None:
+        with self._lock:
+            self._latencies.append(seconds)
+
+    def _timeout(self) -> float:
+        deadline = _run_deadline.get()
+        if deadline is None:
+            return self.call_timeout
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            _count('deadline_exceeded')
+            raise RunDeadlineExceeded(self.run_timeout)
+        return min(self.call_timeout, remaining)
+
+    def _backoff(self, attempt: int) -> float:
+        # Full jitter: spreads retries from many workers instead of having them retry in lockstep
+        delay = random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** attempt))
+        deadline = _run_deadline.get()
+        if deadline is not None:
+            delay = min(delay, max(0.0, deadline - time.monotonic()))
+        return delay
+
+    def call(self, fn, rate_limiter=None):
+        """
+        Run ``fn()`` under the policy.
+
+        Args:
+            fn: The model call, taking the request timeout in seconds
+            rate_limiter: The model's rate limiter; retries wait for it, hedges are skipped if it is saturated
+        """
+        for attempt in range(self.max_retries + 1):
+            timeout = self._timeout()
+            if attempt and rate_limiter is not None:
+                rate_limiter.acquire(blocking=True)
+            try:
+                return self._attempt(fn, timeout, rate_limiter)
+            except TRANSIENT_ERRORS as error:
+                if isinstance(error, openai.APITimeoutError):
+                    _count('timeouts')
+                if attempt == self.max_retries:
+                    raise
+                _count('retries')
+                time.sleep(self._backoff(attempt))
+
+    async def acall(self, afn, rate_limiter=None):
+        """Async variant of ``call``: ``afn`` is a coroutine function and losing hedges are cancelled"""
+        for attempt in range(self.max_retries + 1):
+            timeout = self._timeout()
+            if attempt and rate_limiter is not None:
+                await rate_limiter.aacquire(blocking=True)
+            try:
+                return await self._aattempt(afn, timeout, rate_limiter)
+            except TRANSIENT_ERRORS as error:
+                if isinstance(error, openai.APITimeoutError):
+                    _count('timeouts')
+                if attempt == self.max_retries:
+                    raise
+                _count('retries')
+                await asyncio.sleep(self._backoff(attempt))
+
+    def _attempt(self, fn, timeout, rate_limiter):
+        hedge_after = self.hedge_delay()
+        if hedge_after is None or hedge_after >= timeout:
+            # Nothing to race: call in this thread, bounded by the request's HTTP timeout
+            started = time.perf_counter()
+            result = fn(timeout)
+            self._observe(time.perf_counter() - started)
+            return result
+
+        first = _PooledCall(self, fn)
+        calls = {first.future: first}
+        # Queueing for a worker does not count towards the hedge delay
+        first.running.wait()
+        done, _ = wait([first.future], timeout=max(0.0, first.started + hedge_after - time.perf_counter()))
+        if not done and (rate_limiter is None or rate_limiter.acquire(blocking=False)):
+            _count('hedges')
+            hedge = _PooledCall(self, fn)
+            calls[hedge.future] = hedge
+
+        # No timeout here: each call ends by its own HTTP timeout at the latest
+        pending, error = set(calls), None
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                if future.exception() is None:
+                    self._observe(time.perf_counter() - calls[future].started)
+                    if calls[future] is not first:
+                        _count('hedge_wins')
+                    return future.result()
+                error = future.exception()
+        raise error
+
+    async def _aattempt(self, afn, timeout, rate_limiter):
+        started = time.perf_counter()
+        calls = {asyncio.ensure_future(afn(timeout)): started}
+        first = next(iter(calls))
+        hedge_after = self.hedge_delay()
+        try:
+            if hedge_after is not None and hedge_after < timeout:
+                done, _ = await asyncio.wait(calls, timeout=hedge_after)
+                if not done and (rate_limiter is None or await rate_limiter.aacquire(blocking=False)):
+                    _count('hedges')
+                    calls[asyncio.ensure_future(afn(timeout - hedge_after))] = time.perf_counter()
+
+            pending, error = set(calls), None
+            while pending:
+                done, pending = await asyncio.wait(
+                    pending, timeout=timeout - (time.perf_counter() - started), return_when=asyncio.FIRST_COMPLETED
+                )
+                if not done:
+                    break
+                for task in done:
+                    if task.exception() is None:
+                        self._observe(time.perf_counter() - calls[task])
+                        if task is not first:
+                            _count('hedge_wins')
+                        return task.result()
+                    error = task.exception()
+            if error is not None and not pending:
+                raise error
+            _count('timeouts')
+            raise LLMCallTimeout(timeout)
+        finally:
+            for task in calls:
+                if not task.done():
+                    task.cancel()
+
+
+class ResilientChatMixin(BaseModel):
+    """
+    Mixin for a LangChain chat model that runs its API calls under a ResiliencePolicy.
+
+    The policy is a private attribute, so it is not part of the model's
+    serialized parameters (and therefore not of its cache keys).
+    """
+
+    _resilience: Optional[ResiliencePolicy] = PrivateAttr(default=None)
+
+    def __init__(self, resilience: Optional[ResiliencePolicy] = None, **kwargs):
+        super().__init__(**kwargs)
+        self._resilience = resilience
+
+    @property
+    def resilience(self) -> Optional[ResiliencePolicy]:
+        return self._resilience
+
+    def to_json(self):
+        # Serialize (and so key the LLM cache) as the plain model: the policy and the client's
+        # timeout/retry settings it implies don't change what the model answers
+        serialized = super().to_json()
+        if serialized.get('type') == 'constructor':
+            # The first real chat model class, skipping this and any other mixins
+            base = next(
+                cls for cls in type(self).__mro__
+                if issubclass(cls, BaseChatModel) and not issubclass(cls, ResilientChatMixin)
+            )
+            serialized['id'] = [*serialized['id'][:-1], base.__name__]
+            serialized['name'] = base.__name__
+            serialized['kwargs'] = {k: v for k, v in serialized['kwargs'].items() if k not in TRANSPORT_PARAMS}
+        return serialized
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs):
+        generate = super()._generate
+        if self._resilience is None:
+            return generate(messages, stop=stop, run_manager=run_manager, **kwargs)
+        # The timeout goes to the OpenAI client as a per-request option
+        return self._resilience.call(
+            lambda timeout: generate(messages, stop=stop, run_manager=run_manager, timeout=timeout, **kwargs),
+            self.rate_limiter,
+        )
+
+    async def _agenerate(self, messages, stop=None, run_manager=None, **kwargs):
+        agenerate = super()._agenerate
+        if self._resilience is None:
+            return await agenerate(messages, stop=stop, run_manager=run_manager, **kwargs)
+        return await self._resilience.acall(
+            lambda timeout: agenerate(messages, stop=stop, run_manager=run_manager, timeout=timeout, **kwargs),
+            self.rate_limiter,
+        )
+
+
+@contextmanager
+def run_deadline(llm):
+    """Open the run deadline of ``llm``'s resilience policy, if it has one"""
+    policy = getattr(llm, 'resilience', None)
+    if policy is None:
+        yield
+        return
+    with policy.run_deadline():
+        yield
+
+
+def default_resilience_policy() -> Optional[ResiliencePolicy]:
+    """Build the policy from the LLM_* timeout/retry/hedging environment variables, or None if disabled"""
+    if os.getenv("LLM_RESILIENCE_ENABLED", "true").lower() != "true":
+        return None
+    return ResiliencePolicy(
+        call_timeout=float(os.getenv("LLM_CALL_TIMEOUT", "60")),
+        run_timeout=float(os.getenv("LLM_RUN_TIMEOUT", "300")),
+        max_retries=int(os.getenv("LLM_MAX_RETRIES", "3")),
+        backoff_base=float(os.getenv("LLM_RETRY_BACKOFF", "0.5")),
+        backoff_max=float(os.getenv("LLM_RETRY_BACKOFF_MAX", "8")),
+        hedging=os.getenv("LLM_HEDGING_ENABLED", "false").lower() == "true",
+        hedge_percentile=float(os.getenv("LLM_HEDGE_PERCENTILE", "95")),
+        hedge_min_samples=int(os.getenv("LLM_HEDGE_MIN_SAMPLES", "20")),
+    )
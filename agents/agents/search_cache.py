@@ -0,0 +1,190 @@
+"""
+Shared TTL + LRU cache for search tool results.
+
+``CachedSearchTool`` wraps a search tool (Tavily by default) and keeps the
+wrapped tool's name and argument schema, so it can be dropped into
+``chains.tools`` without the agent noticing. Results are cached in memory with
+LRU eviction and, optionally, in a SQLite file that survives restarts and is
+shared by every worker process on the host. On the async path the SQLite tier
+is read and written in a worker thread so it never blocks the event loop.
+"""
+import asyncio
+import json
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Optional
+
+from langchain_core.callbacks import AsyncCallbackManagerForToolRun, CallbackManagerForToolRun
+from langchain_core.tools import BaseTool
+from pydantic import ConfigDict
+
+
+def normalize_query(query: str) -> str:
+    """Normalize a search query so trivially different phrasings share a cache entry"""
+    query = query.lower().strip()
+    query = re.sub(r"\s+", " ", query)
+    return query.strip(" ?!.")
+
+
+class SearchCache:
+    """In-memory LRU cache with per-entry TTL and an optional SQLite tier"""
+
+    def __init__(self, ttl: float = 900, max_entries: int = 256, path: Optional[str] = None):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.path = path
+        self._entries = OrderedDict()
+        self._lock = threading.RLock()
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        if self.path:
+            with self._connect() as conn:
+                conn.execute(
+                    "CREATE TABLE IF NOT EXISTS search_cache ("
+                    " key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL NOT NULL)"
+                )
+
+    def _connect(self):
+        return sqlite3.connect(self.path, timeout=5)
+
+    def get(self, key: str) -> Any:
+        """Return the cached value for ``key``, or None if missing or expired"""
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                expires_at, value = entry
+                if expires_at > now:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self._entries[key]
+
+        if self.path:
+            with self._connect() as conn:
+                row = conn.execute(
+                    "SELECT value, expires_at FROM search_cache WHERE key = ? AND expires_at > ?",
+                    (key, now),
+                ).fetchone()
+            if row is not None:
+                value = json.loads(row[0])
+                with self._lock:
+                    self._store(key, value, row[1])
+                    self.disk_hits += 1
+                return value
+
+        with self._lock:
+            self.misses += 1
+        return None
+
+    async def aget(self, key: str) -> Any:
+        """Async variant of ``get``"""
+        if self.path:
+            return await asyncio.to_thread(self.get, key)
+        return self.get(key)
+
+    def set(self, key: str, value: Any) -> None:
+        """Cache ``value`` under ``key`` for the configured TTL"""
+        expires_at = time.time() + self.ttl
+        with self._lock:
+            self._store(key, value, expires_at)
+
+        if self.path:
+            with self._connect() as conn:
+                conn.execute(
+                    "INSERT OR REPLACE INTO search_cache (key, value, expires_at) VALUES (?, ?, ?)",
+                    (key, json.dumps(value), expires_at),
+                )
+                conn.execute("DELETE FROM search_cache WHERE expires_at <= ?", (time.time(),))
+
+    async def aset(self, key: str, value: Any) -> None:
+        """Async variant of ``set``"""
+        if self.path:
+            await asyncio.to_thread(self.set, key, value)
+        else:
+            self.set(key, value)
+
+    def _store(self, key, value, expires_at):
+        self._entries[key] = (expires_at, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def clear(self) -> None:
+        """Drop every entry from both tiers"""
+        with self._lock:
+            self._entries.clear()
+        if self.path:
+            with self._connect() as conn:
+                conn.execute("DELETE FROM search_cache")
+
+    def stats(self) -> dict:
+        """Return hit/miss counters for monitoring"""
+        with self._lock:
+            lookups = self.hits + self.disk_hits + self.misses
+            return {
+                'hits': self.hits,
+                'disk_hits': self.disk_hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'size': len(self._entries),
+                'hit_rate': (self.hits + self.disk_hits) / lookups if lookups else 0.0,
+            }
+
+
+class CachedSearchTool(BaseTool):
+    """Search tool wrapper that serves repeated queries from a SearchCache"""
+
+    model_config = ConfigDict(arbitrary_types_allowed=True)
+
+    response_format: str = "content_and_artifact"
+    tool: BaseTool
+    cache: SearchCache
+
+    @classmethod
+    def wrap(cls, tool: BaseTool, cache: SearchCache) -> "CachedSearchTool":
+        """Wrap ``tool`` keeping its name, description and argument schema"""
+        return cls(
+            name=tool.name,
+            description=tool.description,
+            args_schema=tool.args_schema,
+            tool=tool,
+            cache=cache,
+        )
+
+    def _cache_key(self, query: str) -> str:
+        # Tool settings are part of the key so differently configured tools never share entries
+        tool = getattr(self.tool, 'tool', self.tool)  # look through a RateLimitedTool wrapper
+        max_results = getattr(tool, 'max_results', '')
+        search_depth = getattr(tool, 'search_depth', '')
+        return f"{self.name}:{max_results}:{search_depth}:{normalize_query(query)}"
+
+    def _run(self, query: str, run_manager: Optional[CallbackManagerForToolRun] = None):
+        key = self._cache_key(query)
+        cached = self.cache.get(key)
+        if cached is not None:
+            return tuple(cached)
+
+        content, artifact = self.tool._run(query, run_manager=run_manager)
+        # Failed searches come back as (repr(error), {}) and must not be cached
+        if artifact:
+            self.cache.set(key, [content, artifact])
+        return content, artifact
+
+    async def _arun(self, query: str, run_manager: Optional[AsyncCallbackManagerForToolRun] = None):
+        key = self._cache_key(query)
+        cached = await self.cache.aget(key)
+        if cached is not None:
+            return tuple(cached)
+
+        content, artifact = await self.tool._arun(query, run_manager=run_manager)
+        if artifact:
+            await self.cache.aset(key, [content, artifact])
+        return content, artifact
@@ -0,0 +1,272 @@
+"""
+Single-flight coalescing of identical generation requests.
+
+When several callers ask for the same prompt under the same agent
+configuration at the same time, only the first one (the leader) runs the
+reflection graph; the others wait for it and receive a copy of its result.
+
+Within a process the waiters share a ``concurrent.futures.Future``. Across
+worker processes on the same host an exclusive ``flock`` on a per-key lock
+file plays the role of a distributed lock: a process that finds the lock
+held waits for it to be released and then reads the result the holder left
+next to the lock file. If the holder died without writing one, the waiter
+simply runs the request itself.
+
+If the leader fails, it gets its own error, e.g. a ResumableRunError with its
+checkpoint thread. Each in-process waiter gets a ``CoalescedRunError`` instead.
+That error wraps the same cause but carries no thread id: the saved progress
+belongs to the leader's run, so only the leader is offered a resume.
+"""
+import asyncio
+import fcntl
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+from concurrent.futures import Future
+
+import xxhash
+
+from .search_cache import normalize_query
+
+logger = logging.getLogger(__name__)
+
+# Results that cannot be shared as JSON with other processes (message objects)
+LOCAL_ONLY_KEYS = ('raw_response',)
+
+
+class CoalescedRunError(Exception):
+    """Raised to a caller that waited for an identical run which failed"""
+
+    def __init__(self, error: BaseException):
+        super().__init__(str(error))
+        # The underlying failure (unwrapping a ResumableRunError), e.g. for its retry_after
+        self.error = getattr(error, 'error', error)
+
+
+def request_key(user_input: str, agent, bypass_cache: bool = False, models: dict = None) -> str:
+    """Return the coalescing key for a prompt run through ``agent``'s configuration (and per-role ``models``)"""
+    fingerprint = {
+        'prompt': normalize_query(user_input),
+        'model': getattr(agent.llm, 'model_name', None),
+        'models': models or getattr(getattr(agent, 'tiers', None), 'models', None),
+        'temperature': getattr(agent.llm, 'temperature', None),
+        'stopping': [
+            [type(criterion).__name__, vars(criterion)]
+            for criterion in getattr(agent.stopping_policy, 'criteria', [])
+        ],
+        'bypass_cache': bypass_cache,
+    }
+    return xxhash.xxh3_128_hexdigest(json.dumps(fingerprint, sort_keys=True, default=str))
+
+
+def _shared_copy(result: dict) -> dict:
+    # Each caller gets its own dict, marked so views and metadata can tell it was not run for them
+    copy = dict(result)
+    if isinstance(copy.get('generation_metadata'), dict):
+        copy['generation_metadata'] = {**copy['generation_metadata'], 'coalesced': True}
+    return copy
+
+
+class SingleFlight:
+    """Runs at most one call per key at a time, in this process and (with ``lock_dir``) across processes"""
+
+    def __init__(self, lock_dir: str = None, result_ttl: float = 60, wait_timeout: float = 600, poll_interval: float = 0.2):
+        self.lock_dir = lock_dir
+        self.result_ttl = result_ttl
+        self.wait_timeout = wait_timeout
+        self.poll_interval = poll_interval
+        self._lock = threading.Lock()
+        self._calls = {}
+        self._stats = {'leaders': 0, 'coalesced': 0, 'cross_process_coalesced': 0}
+        if lock_dir:
+            os.makedirs(lock_dir, exist_ok=True)
+
+    def do(self, key: str, fn):
+        """Return ``fn()``, or the result of an identical call already in flight"""
+        future, leader = self._join(key)
+        if not leader:
+            try:
+                return _shared_copy(future.result())
+            except Exception as exc:
+                raise CoalescedRunError(exc) from exc
+        try:
+            result = self._run_exclusive(key, fn)
+        except BaseException as exc:
+            future.set_exception(exc)
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            self._leave(key)
+
+    async def ado(self, key: str, afn):
+        """Async variant of ``do``: ``afn`` is a coroutine function"""
+        future, leader = self._join(key)
+        if not leader:
+            try:
+                return _shared_copy(await asyncio.wrap_future(future))
+            except Exception as exc:
+                raise CoalescedRunError(exc) from exc
+        try:
+            result = await self._arun_exclusive(key, afn)
+        except BaseException as exc:
+            future.set_exception(exc)
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            self._leave(key)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {**self._stats, 'in_flight': len(self._calls)}
+
+    def _join(self, key):
+        with self._lock:
+            future = self._calls.get(key)
+            if future is not None:
+                self._stats['coalesced'] += 1
+                return future, False
+            future = self._calls[key] = Future()
+            # Failures are re-raised to every waiter; don't warn when nobody was waiting
+            future.add_done_callback(lambda f: f.exception())
+            self._stats['leaders'] += 1
+            return future, True
+
+    def _leave(self, key):
+        with self._lock:
+            self._calls.pop(key, None)
+
+    # Cross-process coordination
+
+    def _paths(self, key):
+        base = os.path.join(self.lock_dir, key)
+        return base + '.lock', base + '.json'
+
+    def _try_lock(self, handle) -> bool:
+        try:
+            fcntl.flock(handle, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            return True
+        except BlockingIOError:
+            return False
+
+    def _read_result(self, key, since: float):
+        _, result_path = self._paths(key)
+        try:
+            with open(result_path, encoding='utf-8') as fh:
+                entry = json.load(fh)
+        except (OSError, ValueError):
+            return None
+        # Only reuse a result finished while we were waiting, not one left over from an earlier request
+        if entry.get('finished_at', 0) < since:
+            return None
+        with self._lock:
+            self._stats['cross_process_coalesced'] += 1
+        return _shared_copy(entry['result'])
+
+    def _write_result(self, key, result):
+        _, result_path = self._paths(key)
+        shareable = {k: v for k, v in result.items() if k not in LOCAL_ONLY_KEYS}
+        tmp_path = f"{result_path}.{os.getpid()}.tmp"
+        try:
+            with open(tmp_path, 'w', encoding='utf-8') as fh:
+                json.dump({'finished_at': time.time(), 'result': shareable}, fh, default=str)
+            os.replace(tmp_path, result_path)
+        except (OSError, TypeError, ValueError) as exc:
+            logger.warning(f"Could not share single-flight result: {exc}")
+        self._cleanup()
+
+    def _cleanup(self):
+        # Drop results nobody can still be waiting for; lock files are only removed when unlocked
+        cutoff = time.time() - max(self.result_ttl, self.wait_timeout)
+        try:
+            entries = os.scandir(self.lock_dir)
+        except OSError:
+            return
+        with entries:
+            for entry in entries:
+                try:
+                    if entry.stat().st_mtime >= cutoff:
+                        continue
+                    if entry.name.endswith('.lock'):
+                        with open(entry.path, 'a') as handle:
+                            if not self._try_lock(handle):
+                                continue
+                    os.unlink(entry.path)
+                except OSError:
+                    continue
+
+    def _run_exclusive(self, key, fn):
+        if not self.lock_dir:
+            return fn()
+        lock_path, _ = self._paths(key)
+        started = time.time()
+        with open(lock_path, 'a') as handle:
+            if not self._try_lock(handle):
+                while not self._try_lock(handle):
+                    if time.time() - started > self.wait_timeout:
+                        logger.warning("Timed out waiting for another process's identical run; running it here")
+                        return fn()
+                    time.sleep(self.poll_interval)
+                result = self._read_result(key, started)
+                if result is not None:
+                    return result
+            try:
+                result = fn()
+                self._write_result(key, result)
+                return result
+            finally:
+                fcntl.flock(handle, fcntl.LOCK_UN)
+
+    async def _arun_exclusive(self, key, afn):
+        if not self.lock_dir:
+            return await afn()
+        lock_path, _ = self._paths(key)
+        started = time.time()
+        with open(lock_path, 'a') as handle:
+            if not self._try_lock(handle):
+                while not self._try_lock(handle):
+                    if time.time() - started > self.wait_timeout:
+                        logger.warning("Timed out waiting for another process's identical run; running it here")
+                        return await afn()
+                    await asyncio.sleep(self.poll_interval)
+                result = self._read_result(key, started)
+                if result is not None:
+                    return result
+            try:
+                result = await afn()
+                self._write_result(key, result)
+                return result
+            finally:
+                fcntl.flock(handle, fcntl.LOCK_UN)
+
+
+def default_singleflight():
+    """Build the single-flight group from the SINGLEFLIGHT_* environment variables, or None if disabled"""
+    if os.getenv("SINGLEFLIGHT_ENABLED", "true").lower() != "true":
+        return None
+    lock_dir = os.getenv("SINGLEFLIGHT_LOCK_DIR", os.path.join(tempfile.gettempdir(), "sen-social-singleflight"))
+    return SingleFlight(
+        lock_dir=lock_dir or None,
+        result_ttl=float(os.getenv("SINGLEFLIGHT_RESULT_TTL", "60")),
+        wait_timeout=float(os.getenv("SINGLEFLIGHT_WAIT_TIMEOUT", "600")),
+    )
+
+
+_singleflight = None
+_singleflight_lock = threading.Lock()
+
+
+def get_singleflight():
+    """Return the process-wide single-flight group (None when coalescing is disabled)"""
+    global _singleflight
+    if _singleflight is None:
+        with _singleflight_lock:
+            if _singleflight is None:
+                _singleflight = default_singleflight() or False
+    return _singleflight or None
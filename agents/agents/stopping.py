@@ -0,0 +1,130 @@
+"""
+Stopping policies for the generate/reflect loop.
+
+A ``StoppingPolicy`` is a list of criteria checked in order after every
+node; the first one that fires ends the run and its name is recorded as the
+run's stop reason. Criteria only look at the message list, so the reason
+can be recomputed from the final state at any time.
+"""
+import difflib
+import os
+import re
+from typing import List, Optional, Sequence
+
+from langchain_core.messages import BaseMessage
+
+VERDICT_APPROVE = "approve"
+VERDICT_REVISE = "revise"
+
+_VERDICT_PATTERN = re.compile(r"^\s*VERDICT:\s*(APPROVE|REVISE)\s*$", re.IGNORECASE | re.MULTILINE)
+
+
+def is_feedback(message: BaseMessage) -> bool:
+    """Return True for reflection feedback messages"""
+    return getattr(message, 'content', '').startswith("Feedback:")
+
+
+def drafts(state: Sequence[BaseMessage]) -> List[BaseMessage]:
+    """Return the generated drafts in order (everything but the user prompt and the feedback)"""
+    return [msg for msg in state[1:] if not is_feedback(msg)]
+
+
+def parse_verdict(text: str):
+    """
+    Split a structured verdict line off a critique.
+    
+    Returns:
+        tuple: (critique without the verdict line, "approve"/"revise" or None)
+    """
+    match = _VERDICT_PATTERN.search(text)
+    if not match:
+        return text, None
+    critique = (text[:match.start()] + text[match.end():]).strip()
+    return critique, match.group(1).lower()
+
+
+def draft_similarity(previous: str, current: str) -> float:
+    """Token-level diff ratio between two drafts (1.0 means identical)"""
+    tokenize = lambda text: re.findall(r"\w+|[^\w\s]", text.lower())
+    return difflib.SequenceMatcher(None, tokenize(previous), tokenize(current), autojunk=False).ratio()
+
+
+class MaxIterations:
+    """Stop once a fixed number of drafts has been generated"""
+    
+    reason = "max_iterations"
+    after_feedback = False
+    
+    def __init__(self, max_iterations: int):
+        self.max_iterations = max_iterations
+    
+    def should_stop(self, state: Sequence[BaseMessage]) -> bool:
+        return len(drafts(state)) >= self.max_iterations
+
+
+class DraftSimilarity:
+    """Stop when the latest draft barely differs from the one before it"""
+    
+    reason = "converged"
+    after_feedback = False
+    
+    def __init__(self, threshold: float):
+        self.threshold = threshold
+    
+    def should_stop(self, state: Sequence[BaseMessage]) -> bool:
+        generated = drafts(state)
+        if len(generated) < 2:
+            return False
+        return draft_similarity(generated[-2].content, generated[-1].content) >= self.threshold
+
+
+class ReflectionApproval:
+    """Stop when the reflection step returns an "approve" verdict for the latest draft"""
+    
+    reason = "approved"
+    after_feedback = True
+    
+    def should_stop(self, state: Sequence[BaseMessage]) -> bool:
+        return state[-1].additional_kwargs.get('verdict') == VERDICT_APPROVE
+
+
+class StoppingPolicy:
+    """Ordered set of stopping criteria for the reflection loop"""
+    
+    def __init__(self, criteria):
+        self.criteria = list(criteria)
+    
+    @property
+    def wants_verdict(self) -> bool:
+        """Whether the reflection step should be asked for a structured verdict"""
+        return any(isinstance(criterion, ReflectionApproval) for criterion in self.criteria)
+    
+    @property
+    def max_iterations(self) -> Optional[int]:
+        """The iteration cap, if any: the draft that reaches it is known in advance to be the last"""
+        caps = [criterion.max_iterations for criterion in self.criteria if isinstance(criterion, MaxIterations)]
+        return min(caps) if caps else None
+    
+    def check(self, state: Sequence[BaseMessage]) -> Optional[str]:
+        """Return the reason to stop after the last message in ``state``, or None to keep going"""
+        if not state:
+            return None
+        after_feedback = is_feedback(state[-1])
+        for criterion in self.criteria:
+            if criterion.after_feedback == after_feedback and criterion.should_stop(state):
+                return criterion.reason
+        return None
+
+
+def default_stopping_policy() -> StoppingPolicy:
+    """Build the stopping policy from the REFLECTION_* environment variables"""
+    criteria = [MaxIterations(int(os.getenv("REFLECTION_MAX_ITERATIONS", "4")))]
+    
+    similarity_threshold = os.getenv("REFLECTION_SIMILARITY_THRESHOLD", "0.9")
+    if similarity_threshold:
+        criteria.append(DraftSimilarity(float(similarity_threshold)))
+    
+    if os.getenv("REFLECTION_APPROVAL", "false").lower() == "true":
+        criteria.append(ReflectionApproval())
+    
+    return StoppingPolicy(criteria)
@@ -0,0 +1,54 @@
+"""
+Tavily API wrapper that sends its requests through the shared HTTP transport.
+
+The stock wrapper posts with ``requests`` (a new connection per call) and
+opens a new ``aiohttp`` session for every async call; this one reuses the
+pooled clients from ``transport.get_transport("tavily")`` and takes its
+endpoint from ``TAVILY_BASE_URL``, so it can point at a local stub server.
+"""
+import os
+
+from langchain_community.utilities.tavily_search import TAVILY_API_URL, TavilySearchAPIWrapper
+from pydantic import Field
+
+from .transport import HTTPTransport
+
+
+class PooledTavilySearchAPIWrapper(TavilySearchAPIWrapper):
+    """TavilySearchAPIWrapper over a pooled HTTPTransport"""
+
+    base_url: str = Field(default_factory=lambda: os.getenv("TAVILY_BASE_URL") or TAVILY_API_URL)
+    transport: HTTPTransport
+
+    model_config = {'arbitrary_types_allowed': True}
+
+    def _params(self, query, max_results, search_depth, include_domains, exclude_domains,
+                include_answer, include_raw_content, include_images) -> dict:
+        return {
+            "api_key": self.tavily_api_key.get_secret_value(),
+            "query": query,
+            "max_results": max_results,
+            "search_depth": search_depth,
+            "include_domains": include_domains,
+            "exclude_domains": exclude_domains,
+            "include_answer": include_answer,
+            "include_raw_content": include_raw_content,
+            "include_images": include_images,
+        }
+
+    def raw_results(self, query, max_results=5, search_depth="advanced", include_domains=[], exclude_domains=[],
+                    include_answer=False, include_raw_content=False, include_images=False) -> dict:
+        params = self._params(query, max_results, search_depth, include_domains, exclude_domains,
+                              include_answer, include_raw_content, include_images)
+        response = self.transport.client().post(f"{self.base_url.rstrip('/')}/search", json=params)
+        response.raise_for_status()
+        return response.json()
+
+    async def raw_results_async(self, query, max_results=5, search_depth="advanced", include_domains=[],
+                                exclude_domains=[], include_answer=False, include_raw_content=False,
+                                include_images=False) -> dict:
+        params = self._params(query, max_results, search_depth, include_domains, exclude_domains,
+                              include_answer, include_raw_content, include_images)
+        response = await self.transport.async_client().post(f"{self.base_url.rstrip('/')}/search", json=params)
+        response.raise_for_status()
+        return response.json()
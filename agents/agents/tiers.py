@@ -0,0 +1,155 @@
+"""
+Per-role model tiering for the reflection loop.
+
+Only the draft the user ends up with needs the strongest model. The loop's
+other calls can go to a cheaper, faster one, once an operator opts in by
+setting that role's model:
+
+* ``final``: the draft that ends the loop (``LLM_MODEL``, default gpt-4o);
+* ``draft``: intermediate drafts that will be critiqued and replaced
+  (``LLM_DRAFT_MODEL``);
+* ``reflect``: the critiques (``LLM_REFLECT_MODEL``);
+* ``router``: the first-round ReAct calls that only decide which searches to
+  run, when no pre-fetched results came with the request
+  (``LLM_ROUTER_MODEL``).
+
+The round that will be the last one (the stopping policy's iteration cap) is
+generated with the final model directly. If the loop stops early on a draft
+written by another model, one more round with the final model revises it, so
+the post handed to the user always comes from the final model. Roles without
+a model of their own use the final one, so tiering is off by default.
+
+``ModelTiers`` builds each model, and the ReAct agents and critique chains
+around them, once per process and hands them out by role; a request can
+override roles with any model in ``LLM_ALLOWED_MODELS``.
+"""
+import os
+import threading
+from typing import Dict, Optional
+
+from langchain_core.messages import ToolMessage
+from langchain_core.runnables import RunnableLambda
+
+ROLE_FINAL = "final"
+ROLE_DRAFT = "draft"
+ROLE_REFLECT = "reflect"
+ROLE_ROUTER = "router"
+ROLES = (ROLE_FINAL, ROLE_DRAFT, ROLE_REFLECT, ROLE_ROUTER)
+
+ROLE_SETTINGS = {
+    ROLE_FINAL: "LLM_MODEL",
+    ROLE_DRAFT: "LLM_DRAFT_MODEL",
+    ROLE_REFLECT: "LLM_REFLECT_MODEL",
+    ROLE_ROUTER: "LLM_ROUTER_MODEL",
+}
+
+
+class ToolRoutingModel:
+    """
+    Chat model for a ReAct agent that sends tool-routing calls to a cheaper model.
+
+    Calls made before any tool has answered go to ``router``; once search
+    results are in the conversation, ``writer`` writes the post.
+    """
+
+    def __init__(self, router, writer):
+        self.router = router
+        self.writer = writer
+
+    def bind_tools(self, tools, **kwargs):
+        router = self.router.bind_tools(tools, **kwargs)
+        writer = self.writer.bind_tools(tools, **kwargs)
+
+        def select(messages):
+            return writer if any(isinstance(message, ToolMessage) for message in messages) else router
+
+        # A RunnableLambda that returns a runnable invokes it with the same input and config
+        return RunnableLambda(select, name="route_tools")
+
+
+class ModelTiers:
+    """The chat model, ReAct agent and critique chain to use for each role"""
+
+    def __init__(self, models: Dict[str, str], tools, llms: Optional[dict] = None, build_llm=None, allowed=()):
+        """
+        Args:
+            models: Model name per role; roles left out use the final model
+            tools: Tools of the ReAct generation agent
+            llms: Already built chat models by name
+            build_llm: Builds a chat model from a model name, for names not in ``llms``
+            allowed: Further model names a request may pick
+        """
+        final = models[ROLE_FINAL]
+        self.models = {role: models.get(role) or final for role in ROLES}
+        self.allowed = set(self.models.values()) | set(allowed)
+        self._tools = tools
+        self._llms = dict(llms or {})
+        self._build_llm = build_llm
+        self._chains = {}
+        self._lock = threading.Lock()
+
+    @property
+    def tiered(self) -> bool:
+        """Whether any role uses a different model than the final draft"""
+        return any(model != self.models[ROLE_FINAL] for model in self.models.values())
+
+    def resolve(self, overrides: Optional[Dict[str, str]] = None) -> Dict[str, str]:
+        """Model name per role with a request's overrides applied; raises ValueError for unknown roles/models"""
+        if not overrides:
+            return dict(self.models)
+        unknown = set(overrides) - set(ROLES)
+        if unknown:
+            raise ValueError(f"Unknown model role(s): {', '.join(sorted(unknown))} (use {', '.join(ROLES)})")
+        for model in overrides.values():
+            if model not in self.allowed:
+                raise ValueError(f"Model {model!r} is not allowed (use one of {', '.join(sorted(self.allowed))})")
+        return {**self.models, **{role: model for role, model in overrides.items() if model}}
+
+    def llm(self, model: str):
+        """The chat model called ``model``, built on first use"""
+        with self._lock:
+            if model not in self._llms:
+                if self._build_llm is None:
+                    raise ValueError(f"No chat model available for {model!r}")
+                self._llms[model] = self._build_llm(model)
+            return self._llms[model]
+
+    def _chain(self, key, build):
+        with self._lock:
+            chain = self._chains.get(key)
+        if chain is None:
+            chain = build()
+            with self._lock:
+                chain = self._chains.setdefault(key, chain)
+        return chain
+
+    def generation_chain(self, writer: str, router: Optional[str] = None):
+        """ReAct agent writing with ``writer``, handing tool routing to ``router`` if that is a different model"""
+        from .chains import build_generation_chain
+
+        if router == writer:
+            router = None
+        model = self.llm(writer) if router is None else ToolRoutingModel(self.llm(router), self.llm(writer))
+        return self._chain(('generate', writer, router), lambda: build_generation_chain(model, self._tools))
+
+    def reflection_chain(self, model: str):
+        """Critique chain running on ``model``"""
+        from .chains import build_reflection_chain
+
+        return self._chain(('reflect', model), lambda: build_reflection_chain(self.llm(model)))
+
+
+def default_model_tiers(llm, tools, build_llm) -> ModelTiers:
+    """
+    Build the tiers from the LLM_*_MODEL environment variables (unset roles use LLM_MODEL).
+
+    Args:
+        llm: The final-draft chat model (LLM_MODEL)
+        tools: Tools of the ReAct generation agent
+        build_llm: Builds the chat model for another model name
+    """
+    models = {ROLE_FINAL: llm.model_name}
+    for role in (ROLE_DRAFT, ROLE_REFLECT, ROLE_ROUTER):
+        models[role] = os.getenv(ROLE_SETTINGS[role]) or None
+    allowed = [name.strip() for name in os.getenv("LLM_ALLOWED_MODELS", "gpt-4o,gpt-4o-mini").split(",") if name.strip()]
+    return ModelTiers(models, tools, llms={llm.model_name: llm}, build_llm=build_llm, allowed=allowed)
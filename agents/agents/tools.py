@@ -1,7 +1,12 @@
 from dotenv import load_dotenv
 from langchain.agents import tool
-from langchain_community.tools import TavilySearchResults
+from .ratelimit import RateLimitedTool, get_rate_limiter
+from .search_cache import CachedSearchTool, SearchCache
+from .transport import get_transport
 import datetime
+import os
+
+load_dotenv()
 
 
 @tool
@@ -13,4 +18,38 @@ def get_system_time(format: str = "%Y-%m-%d %H:%M:%S"):
     return formatted_time
 
 
-search_tool = TavilySearchResults(search_depth="basic")
+def build_search_tool():
+    """Build the Tavily search tool behind the rate limiter, wrapped in the shared result cache unless disabled"""
+    from langchain_community.tools import TavilySearchResults
+
+    # Send searches through the shared connection pool (HTTP_* settings) unless HTTP_POOL_ENABLED=false
+    transport = get_transport("tavily")
+    if transport:
+        from .tavily import PooledTavilySearchAPIWrapper
+
+        search_tool = TavilySearchResults(search_depth="basic", api_wrapper=PooledTavilySearchAPIWrapper(transport=transport))
+    else:
+        search_tool = TavilySearchResults(search_depth="basic")
+
+    # Admission control applies to real Tavily calls only, so it sits inside the cache
+    limiter = get_rate_limiter("search")
+    if limiter:
+        search_tool = RateLimitedTool.wrap(search_tool, limiter)
+
+    # Share search results across requests; set SEARCH_CACHE_ENABLED=false to always hit Tavily
+    if os.getenv("SEARCH_CACHE_ENABLED", "true").lower() == "true":
+        search_cache = SearchCache(
+            ttl=float(os.getenv("SEARCH_CACHE_TTL", "900")),
+            max_entries=int(os.getenv("SEARCH_CACHE_MAX_ENTRIES", "256")),
+            path=os.getenv("SEARCH_CACHE_PATH") or None,
+        )
+        search_tool = CachedSearchTool.wrap(search_tool, search_cache)
+    return search_tool
+
+
+def __getattr__(name):
+    # search_tool is built lazily by the agent factory
+    if name == "search_tool":
+        from .factory import get_agent
+        return get_agent().search_tool
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
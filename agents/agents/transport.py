@@ -0,0 +1,209 @@
+"""
+Shared, pooled HTTP clients for the OpenAI and Tavily APIs.
+
+Left to themselves, the OpenAI SDK and the Tavily wrapper each open their
+own connections (the Tavily wrapper a fresh one per call, the async path a
+new ``aiohttp`` session every time), so a busy worker keeps paying for TCP
+and TLS handshakes. An ``HTTPTransport`` owns one ``httpx.Client`` and one
+``httpx.AsyncClient`` per upstream with explicit pool limits and keep-alive,
+shared by every request and thread of the process.
+
+httpx async connections belong to the event loop that opened them, so the
+async side is one client per running loop behind a single proxy client
+(``async_client()``) that the SDKs are given. Request, connection and TLS
+handshake counts are collected through httpcore's trace hook and reported
+with the live pool sizes by ``transport_stats()``.
+"""
+import asyncio
+import logging
+import os
+import threading
+import weakref
+from typing import Optional
+
+import httpx
+
+logger = logging.getLogger(__name__)
+
+# httpcore trace events counted per transport
+TRACE_EVENTS = {
+    'connection.connect_tcp.complete': 'connections_opened',
+    'connection.start_tls.complete': 'tls_handshakes',
+}
+
+
+def _http2_available() -> bool:
+    try:
+        import h2  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def _pool_connections(client) -> list:
+    # httpx does not expose its pool; read the httpcore connection list if it is there
+    pool = getattr(getattr(client, '_transport', None), '_pool', None)
+    return list(getattr(pool, 'connections', None) or [])
+
+
+class _LoopLocalAsyncClient(httpx.AsyncClient):
+    """The AsyncClient handed to the SDKs: sends through the transport's client for the running loop"""
+
+    def __init__(self, owner: "HTTPTransport"):
+        super().__init__()
+        self._owner = owner
+
+    async def send(self, request, **kwargs):
+        return await self._owner._loop_client().send(request, **kwargs)
+
+    async def aclose(self):
+        # The pooled clients are shared; they are closed by HTTPTransport.close()
+        pass
+
+
+class HTTPTransport:
+    """Pooled sync and async httpx clients for one upstream service"""
+
+    def __init__(
+        self,
+        name: str,
+        max_connections: int = 100,
+        max_keepalive: int = 20,
+        keepalive_expiry: float = 30,
+        timeout: float = 60,
+        connect_timeout: float = 10,
+        http2: bool = False,
+    ):
+        self.name = name
+        self.limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive,
+            keepalive_expiry=keepalive_expiry,
+        )
+        self.timeout = httpx.Timeout(timeout, connect=connect_timeout)
+        if http2 and not _http2_available():
+            logger.warning(f"HTTP/2 requested for {name} but the h2 package is not installed; using HTTP/1.1")
+            http2 = False
+        self.http2 = http2
+        self._client = None
+        self._async_proxy = None
+        self._loop_clients = weakref.WeakKeyDictionary()
+        self._counts = {'requests': 0, 'connections_opened': 0, 'tls_handshakes': 0}
+        self._lock = threading.Lock()
+
+    def client(self) -> httpx.Client:
+        """The shared sync client, created on first use"""
+        with self._lock:
+            if self._client is None:
+                self._client = httpx.Client(
+                    limits=self.limits,
+                    timeout=self.timeout,
+                    http2=self.http2,
+                    follow_redirects=True,
+                    event_hooks={'request': [self._on_request]},
+                )
+            return self._client
+
+    def async_client(self) -> httpx.AsyncClient:
+        """The shared async client; each event loop gets its own pool behind it"""
+        with self._lock:
+            if self._async_proxy is None:
+                self._async_proxy = _LoopLocalAsyncClient(self)
+            return self._async_proxy
+
+    def _loop_client(self) -> httpx.AsyncClient:
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            client = self._loop_clients.get(loop)
+            if client is None:
+                # A client keeps its loop alive through its connections, so drop those of closed loops
+                for closed in [other for other in self._loop_clients if other.is_closed()]:
+                    del self._loop_clients[closed]
+                client = httpx.AsyncClient(
+                    limits=self.limits,
+                    timeout=self.timeout,
+                    http2=self.http2,
+                    follow_redirects=True,
+                    event_hooks={'request': [self._aon_request]},
+                )
+                self._loop_clients[loop] = client
+            return client
+
+    def _count(self, key: str) -> None:
+        with self._lock:
+            self._counts[key] += 1
+
+    def _on_request(self, request) -> None:
+        self._count('requests')
+        request.extensions['trace'] = self._trace
+
+    async def _aon_request(self, request) -> None:
+        self._count('requests')
+        request.extensions['trace'] = self._atrace
+
+    def _trace(self, event: str, info: dict) -> None:
+        if event in TRACE_EVENTS:
+            self._count(TRACE_EVENTS[event])
+
+    async def _atrace(self, event: str, info: dict) -> None:
+        self._trace(event, info)
+
+    def stats(self) -> dict:
+        """Request/connection counters and the current size of the pools"""
+        with self._lock:
+            clients = ([self._client] if self._client is not None else []) + list(self._loop_clients.values())
+            counts = dict(self._counts)
+        connections = [connection for client in clients for connection in _pool_connections(client)]
+        idle = sum(1 for connection in connections if connection.is_idle())
+        return {
+            **counts,
+            # Share of requests that went out on an already open connection
+            'reuse_ratio': round(1 - counts['connections_opened'] / counts['requests'], 3) if counts['requests'] else None,
+            'open_connections': len(connections),
+            'idle_connections': idle,
+            'active_connections': len(connections) - idle,
+            'event_loops': len(self._loop_clients),
+            'max_connections': self.limits.max_connections,
+            'max_keepalive': self.limits.max_keepalive_connections,
+            'http2': self.http2,
+        }
+
+    def close(self) -> None:
+        """Close the sync client; async clients are dropped along with their event loops"""
+        with self._lock:
+            client, self._client = self._client, None
+            self._loop_clients = weakref.WeakKeyDictionary()
+        if client is not None:
+            client.close()
+
+
+_transports = {}
+_transports_lock = threading.Lock()
+
+
+def get_transport(name: str) -> Optional[HTTPTransport]:
+    """Return the process-wide transport for ``name`` ("openai" or "tavily"), or None if pooling is disabled"""
+    with _transports_lock:
+        if name not in _transports:
+            _transports[name] = _build_transport(name)
+        return _transports[name]
+
+
+def _build_transport(name):
+    if os.getenv("HTTP_POOL_ENABLED", "true").lower() != "true":
+        return None
+    return HTTPTransport(
+        name,
+        max_connections=int(os.getenv("HTTP_MAX_CONNECTIONS", "100")),
+        max_keepalive=int(os.getenv("HTTP_MAX_KEEPALIVE", "20")),
+        keepalive_expiry=float(os.getenv("HTTP_KEEPALIVE_EXPIRY", "30")),
+        timeout=float(os.getenv("HTTP_TIMEOUT", "60")),
+        connect_timeout=float(os.getenv("HTTP_CONNECT_TIMEOUT", "10")),
+        http2=os.getenv("HTTP2_ENABLED", "false").lower() == "true",
+    )
+
+
+def transport_stats() -> dict:
+    """Pool metrics of every transport built so far"""
+    with _transports_lock:
+        return {name: transport.stats() for name, transport in _transports.items() if transport is not None}
@@ -1,6 +1,17 @@
+import threading
+
 from django.apps import AppConfig
+from django.conf import settings
 
 
 class AgentsConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "agents"
+
+    def ready(self):
+        from . import signals  # noqa: F401  (connects the search index handlers)
+
+        # Optionally build the agent stack at startup instead of on the first generation request
+        if getattr(settings, 'AGENT_WARMUP', False):
+            from .agents.factory import agent_factory
+            threading.Thread(target=agent_factory.warm_up, name='agent-warmup', daemon=True).start()
@@ -0,0 +1,84 @@
+"""
+Concurrent batch generation.
+
+Prompts are fanned out through the async agent entry point with at most
+``concurrency`` runs in flight; a failing prompt is reported in its own
+result entry and never aborts the rest of the batch. Successful results can
+then be stored as Post drafts with a single bulk insert.
+"""
+import asyncio
+import logging
+
+from django.conf import settings
+
+from .models import Post, PostHistory
+from .search import get_search_backend
+
+logger = logging.getLogger(__name__)
+
+
+def title_from_prompt(prompt):
+    """Derive a draft title from its prompt, as the result page does"""
+    return prompt[:50] + "..." if len(prompt) > 50 else prompt
+
+
+async def _run_batch(prompts, runner, concurrency):
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def run_one(prompt):
+        async with semaphore:
+            try:
+                result = await runner(prompt)
+            except Exception as e:
+                logger.error(f"Batch item failed for prompt {prompt[:100]!r}: {str(e)}")
+                return {'prompt': prompt, 'success': False, 'error': str(e)}
+            return {'prompt': prompt, 'success': True, 'result': result}
+
+    return await asyncio.gather(*(run_one(prompt) for prompt in prompts))
+
+
+def run_batch(prompts, runner, concurrency=None):
+    """
+    Run prompts concurrently through the reflection agent.
+    
+    Args:
+        prompts: List of prompt strings
+        runner: Async callable taking a prompt and returning the agent result dict
+        concurrency: Maximum number of runs in flight (defaults to BATCH_CONCURRENCY)
+        
+    Returns:
+        list: One dict per prompt, in input order, with ``success`` and either ``result`` or ``error``
+    """
+    concurrency = max(1, concurrency or settings.BATCH_CONCURRENCY)
+    return asyncio.run(_run_batch(prompts, runner, concurrency))
+
+
+def save_batch_results(results, user):
+    """
+    Store every successful batch result as a draft Post with one bulk insert.
+    
+    Returns:
+        list: The created Post objects, in the order of the successful results
+    """
+    posts = []
+    for item in results:
+        if not item['success']:
+            continue
+        result = item['result']
+        posts.append(Post(
+            title=title_from_prompt(item['prompt']),
+            content=result.get('final_post') or '',
+            original_prompt=item['prompt'],
+            created_by=user,
+            conversation_history=result.get('conversation_history', []),
+            generation_metadata={
+                **(result.get('generation_metadata') or {}),
+                'source': 'batch',
+            },
+            status='draft',
+        ))
+    created = Post.objects.bulk_create(posts)
+    PostHistory.store_many(created)
+    # bulk_create skips save() and post_save, so store the histories and index the posts here
+    get_search_backend().index(created)
+    return created
@@ -0,0 +1,7 @@
+"""
+Offline benchmarks for the reflection graph and the post views.
+
+Everything here runs against deterministic fake LLM and search backends
+(see ``fakes``), so no OpenAI or Tavily calls are made. Run through
+``python manage.py run_benchmarks``.
+"""
@@ -0,0 +1,177 @@
+"""
+Deterministic stand-ins for the OpenAI chat model and the Tavily search tool.
+
+``fake_backends`` builds an agent stack around them (the same chains and
+graph as production, only ``llm`` and ``search_tool`` swapped) and serves
+it from the agent factory for the duration of the block.
+Artificial latency is configurable so benchmarks can model real network
+round trips or measure pure framework overhead with zero latency.
+"""
+import asyncio
+import random
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, List, Optional
+
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, BaseMessage, ToolMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+from langchain_core.tools import BaseTool
+from pydantic import BaseModel, Field
+
+from ..agents.factory import agent_factory, build_agent_stack
+from ..agents.stopping import MaxIterations, StoppingPolicy
+
+SEARCH_TOOL_NAME = "tavily_search_results_json"
+
+WORDS = (
+    "artemis orbit launch lunar mission crew rocket booster capsule telescope mars rover "
+    "station docking spacewalk payload satellite exploration discovery science nasa esa "
+    "spacex gateway landing thrust engine trajectory eclipse comet asteroid galaxy"
+).split()
+
+
+def _text(seed: str, words: int) -> str:
+    rng = random.Random(seed)
+    return " ".join(rng.choice(WORDS) for _ in range(words))
+
+
+class CallCounter:
+    """Call count shared by a fake model and the tool-bound copies ``bind_tools`` makes of it"""
+
+    def __init__(self):
+        self.value = 0
+        self._lock = threading.Lock()
+
+    def increment(self) -> int:
+        with self._lock:
+            self.value += 1
+            return self.value
+
+
+class FakeChatModel(BaseChatModel):
+    """Chat model that answers deterministically after a fixed delay"""
+
+    latency: float = 0.0
+    draft_words: int = 60
+    critique_words: int = 40
+    model_name: str = "fake-chat"
+    tools_bound: bool = False
+    counter: CallCounter = Field(default_factory=CallCounter)
+
+    @property
+    def calls(self) -> int:
+        """LLM calls made by this model and its tool-bound copies"""
+        return self.counter.value
+
+    @property
+    def _llm_type(self) -> str:
+        return "fake-chat"
+
+    @property
+    def _identifying_params(self) -> dict:
+        return {'model_name': self.model_name, 'latency': self.latency}
+
+    def bind_tools(self, tools, **kwargs: Any):
+        # A shallow copy: it shares the call counter with this model
+        return self.model_copy(update={'tools_bound': True})
+
+    def _generate(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager=None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        self.counter.increment()
+        if self.latency:
+            time.sleep(self.latency)
+        return self._respond(messages)
+
+    async def _agenerate(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager=None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        # Waits without holding a thread, like a real async HTTP call
+        self.counter.increment()
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        return self._respond(messages)
+
+    def _respond(self, messages: List[BaseMessage]) -> ChatResult:
+        seed = f"{len(messages)}:{messages[-1].content}"
+        # Like the real agent, skip the search when the request already carries pre-fetched results
+        searched = any(isinstance(m, ToolMessage) for m in messages) or "Search results:" in str(messages[0].content)
+        if self.tools_bound and not searched:
+            # First ReAct round: ask for a search, as the real agent is prompted to do
+            message = AIMessage(
+                content="",
+                tool_calls=[{'name': SEARCH_TOOL_NAME, 'args': {'query': _text(seed, 4)}, 'id': f"call_{self.calls}"}],
+                usage_metadata={'input_tokens': 0, 'output_tokens': 10, 'total_tokens': 10},
+            )
+        elif self.tools_bound:
+            message = AIMessage(content=f"Draft: {_text(seed, self.draft_words)}")
+        else:
+            message = AIMessage(content=_text(seed, self.critique_words))
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+
+class FakeSearchInput(BaseModel):
+    query: str = Field(description="search query to look up")
+
+
+class FakeSearchTool(BaseTool):
+    """Search tool with the Tavily tool's name and schema returning canned results"""
+
+    name: str = SEARCH_TOOL_NAME
+    description: str = "A search engine returning canned results for benchmarks."
+    args_schema: type = FakeSearchInput
+    response_format: str = "content_and_artifact"
+    latency: float = 0.0
+    results: int = 5
+
+    def _run(self, query: str, run_manager=None):
+        if self.latency:
+            time.sleep(self.latency)
+        return self._results(query)
+
+    async def _arun(self, query: str, run_manager=None):
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        return self._results(query)
+
+    def _results(self, query: str):
+        results = [
+            {'url': f"https://example.com/{i}", 'content': _text(f"{query}:{i}", 50)}
+            for i in range(self.results)
+        ]
+        return results, {'query': query, 'results': results}
+
+
+@contextmanager
+def fake_backends(llm_latency: float = 0.0, search_latency: float = 0.0, iterations: int = 4, models: dict = None):
+    """
+    Run the agent stack against fake backends inside this block.
+    
+    Args:
+        llm_latency: Seconds each fake LLM call sleeps
+        search_latency: Seconds each fake search sleeps
+        iterations: Number of drafts per run (the stopping policy is pinned for repeatability)
+        models: Fake chat model per role other than "final", e.g. a faster "fake-mini" for drafts
+        
+    Yields:
+        AgentStack: The fake-backed stack; ``stack.llm.calls`` counts the calls made to the final model
+        (generation and critique alike; models given in ``models`` count their own)
+    """
+    stack = build_agent_stack(
+        llm=FakeChatModel(latency=llm_latency),
+        search_tool=FakeSearchTool(latency=search_latency),
+        stopping_policy=StoppingPolicy([MaxIterations(iterations)]),
+        models=models,
+    )
+    with agent_factory.override(stack):
+        yield stack
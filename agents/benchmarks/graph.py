@@ -0,0 +1,86 @@
+"""
+Benchmarks for the reflection graph itself.
+
+- ``overhead``: end-to-end runs with zero-latency fakes, i.e. the cost of
+  LangGraph, LangChain and our node code alone, also expressed per node.
+- ``iterations``: per-node wall time and prompt size per iteration, from
+  the run's ``generation_metadata``, with the configured fake latency.
+- ``history_growth``: messages and prompt tokens sent to the model on each
+  generation round, to show how context grows through the loop.
+"""
+from langchain_core.messages import HumanMessage
+
+from ..agents import reflect_agent
+from ..agents.factory import AgentStack, agent_factory
+from .fakes import fake_backends
+from .timing import measure
+
+PROMPT = "Latest news about NASA Artemis mission and its impact on space exploration."
+
+
+def bench_overhead(repeat: int, iterations: int) -> dict:
+    with fake_backends(iterations=iterations):
+        result = reflect_agent.process_user_request(PROMPT)
+        node_count = len(result['generation_metadata']['nodes'])
+        stats = measure(lambda: reflect_agent.process_user_request(PROMPT), repeat)
+    stats['nodes_per_run'] = node_count
+    stats['mean_ms_per_node'] = round(stats['mean_ms'] / node_count, 3)
+    return stats
+
+
+def bench_iterations(llm_latency: float, search_latency: float, iterations: int) -> dict:
+    with fake_backends(llm_latency, search_latency, iterations) as stack:
+        result = reflect_agent.process_user_request(PROMPT)
+    metadata = result['generation_metadata']
+    return {
+        'llm_calls': stack.llm.calls,
+        'total_ms': metadata['total_ms'],
+        'nodes': [
+            {key: node[key] for key in ('node', 'iteration', 'duration_ms', 'input_tokens', 'llm_calls')}
+            for node in metadata['nodes']
+        ],
+        'tools': [
+            {key: tool[key] for key in ('tool', 'iteration', 'duration_ms')}
+            for tool in metadata['tools']
+        ],
+    }
+
+
+def bench_history_growth(iterations: int) -> list:
+    """Messages and estimated prompt tokens handed to the generation agent on each round"""
+    rounds = []
+    with fake_backends(iterations=iterations) as stack:
+        generation_chain = stack.generation_chain
+
+        class RecordingChain:
+            def invoke(self, payload, *args, **kwargs):
+                messages = payload['messages']
+                rounds.append({
+                    'round': len(rounds) + 1,
+                    'messages': len(messages),
+                    'characters': sum(len(str(message.content)) for message in messages),
+                })
+                return generation_chain.invoke(payload, *args, **kwargs)
+
+        recording_app = reflect_agent.create_reflection_graph(
+            RecordingChain(), stack.reflection_chain, policy=stack.stopping_policy, model_name=stack.llm.model_name
+        )
+        recording_stack = AgentStack(
+            stack.llm, stack.search_tool, stack.tools, generation_chain,
+            stack.reflection_chain, stack.stopping_policy, recording_app,
+        )
+        with agent_factory.override(recording_stack):
+            result = reflect_agent.process_user_request(PROMPT)
+
+    generate_nodes = [node for node in result['generation_metadata']['nodes'] if node['node'] == 'generate']
+    for record, node in zip(rounds, generate_nodes):
+        record['input_tokens'] = node['input_tokens']
+    return rounds
+
+
+def run(repeat: int, iterations: int, llm_latency: float, search_latency: float) -> dict:
+    return {
+        'overhead': bench_overhead(repeat, iterations),
+        'iterations': bench_iterations(llm_latency, search_latency, iterations),
+        'history_growth': bench_history_growth(iterations),
+    }
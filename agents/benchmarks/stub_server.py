@@ -0,0 +1,105 @@
+"""
+Local HTTP stub of the OpenAI chat completions and Tavily search endpoints.
+
+Unlike ``fakes.py``, which swaps out the LangChain objects, the stub keeps
+the real ``ChatOpenAI`` and Tavily tool and replaces the network peer, so the
+HTTP transport (connection pooling, keep-alive, timeouts) is exercised end
+to end. Point the clients at it with ``OPENAI_BASE_URL=<url>/v1`` and
+``TAVILY_BASE_URL=<url>``; ``stub_server`` sets both for the block.
+"""
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from .fakes import _text
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    # HTTP/1.1 so clients can keep connections open between requests
+    protocol_version = "HTTP/1.1"
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers.get('Content-Length') or 0)) or b"{}")
+        with self.server.lock:
+            self.server.requests += 1
+        time.sleep(self.server.latency)
+        if self.path.rstrip('/').endswith('/chat/completions'):
+            self._reply(self._completion(body))
+        elif self.path.rstrip('/').endswith('/search'):
+            self._reply(self._search(body))
+        else:
+            self._reply({'error': {'message': f"Unknown path {self.path}"}}, status=404)
+
+    def _completion(self, body):
+        prompt = json.dumps(body.get('messages', []))
+        return {
+            'id': 'chatcmpl-stub',
+            'object': 'chat.completion',
+            'created': int(time.time()),
+            'model': body.get('model', 'stub'),
+            'choices': [{
+                'index': 0,
+                'message': {'role': 'assistant', 'content': _text(prompt, 60)},
+                'finish_reason': 'stop',
+            }],
+            'usage': {'prompt_tokens': len(prompt) // 4, 'completion_tokens': 60, 'total_tokens': len(prompt) // 4 + 60},
+        }
+
+    def _search(self, body):
+        query = body.get('query', '')
+        return {
+            'query': query,
+            'results': [
+                {'title': f"Result {n}", 'url': f"https://example.com/{n}", 'content': _text(f"{query}-{n}", 40), 'score': 1 - n / 10}
+                for n in range(body.get('max_results') or 5)
+            ],
+        }
+
+    def _reply(self, payload, status=200):
+        data = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class StubServer(ThreadingHTTPServer):
+    daemon_threads = True
+    # Room for a burst of concurrent connects; the default backlog of 5 resets some of them
+    request_queue_size = 128
+
+
+@contextmanager
+def stub_server(latency: float = 0.0, port: int = 0):
+    """
+    Serve the stub on localhost for the duration of the block and point the OpenAI/Tavily clients at it.
+
+    Yields the server; ``server.url`` is its base URL and ``server.requests`` counts requests served.
+    """
+    server = StubServer(('127.0.0.1', port), StubHandler)
+    server.latency = latency
+    server.requests = 0
+    server.lock = threading.Lock()
+    server.url = f"http://127.0.0.1:{server.server_address[1]}"
+    thread = threading.Thread(target=server.serve_forever, name="stub-server", daemon=True)
+    thread.start()
+    overrides = {'OPENAI_BASE_URL': f"{server.url}/v1", 'TAVILY_BASE_URL': server.url}
+    saved = {name: os.environ.get(name) for name in overrides}
+    os.environ.update(overrides)
+    try:
+        yield server
+    finally:
+        for name, value in saved.items():
+            if value is None:
+                os.environ.pop(name, None)
+            else:
+                os.environ[name] = value
+        server.shutdown()
+        server.server_close()
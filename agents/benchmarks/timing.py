@@ -0,0 +1,32 @@
+"""Small timing helpers shared by the benchmarks"""
+import time
+
+from ..agents.instrumentation import percentile
+
+
+def measure(fn, repeat: int, warmup: int = 1) -> dict:
+    """
+    Call ``fn`` ``repeat`` times and summarize the wall time per call.
+    
+    Returns:
+        dict: mean/p50/p95/min/max in milliseconds and calls per second
+    """
+    for _ in range(warmup):
+        fn()
+
+    durations = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        durations.append((time.perf_counter() - start) * 1000)
+
+    total = sum(durations)
+    return {
+        'repeat': repeat,
+        'mean_ms': round(total / repeat, 3),
+        'p50_ms': round(percentile(durations, 50), 3),
+        'p95_ms': round(percentile(durations, 95), 3),
+        'min_ms': round(min(durations), 3),
+        'max_ms': round(max(durations), 3),
+        'per_second': round(repeat * 1000 / total, 2) if total else None,
+    }
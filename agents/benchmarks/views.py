@@ -0,0 +1,106 @@
+"""
+Request throughput of the generation and post management views.
+
+Uses Django's test client against a throwaway test database seeded with
+``posts`` rows for the benchmark user; the agent runs against the fakes.
+"""
+import json
+import random
+
+from django.contrib.auth.models import User
+from django.test import Client
+
+from ..models import Post, PostHistory
+from ..pagination import encode_cursor
+from ..search import get_search_backend
+from .fakes import _text, fake_backends
+from .graph import PROMPT
+from .timing import measure
+
+SEED_BATCH_SIZE = 5000
+
+
+def expect(request, status=200, redirect_prefix=None):
+    """
+    Wrap a test client call so that an unexpected response aborts the benchmark instead of being timed.
+    
+    Args:
+        request: Callable making the request
+        status: Expected status code
+        redirect_prefix: For redirects, the start of the expected Location (e.g. not the login page)
+    """
+    def call():
+        response = request()
+        location = response.get('Location', '')
+        if response.status_code != status or (redirect_prefix and not location.startswith(redirect_prefix)):
+            raise AssertionError(f"Unexpected response {response.status_code} {location}".strip())
+        return response
+    return call
+
+
+def seed_posts(user, count: int) -> None:
+    """Top the user's posts up to ``count`` rows with realistic content and history"""
+    existing = Post.objects.filter(created_by=user).count()
+    rng = random.Random(count)
+    statuses = ['draft', 'draft', 'published', 'archived']
+    history = [
+        {'content': _text(f"history:{i}", 80), 'is_feedback': i % 2 == 0}
+        for i in range(1, 8)
+    ]
+
+    for start in range(existing, count, SEED_BATCH_SIZE):
+        created = Post.objects.bulk_create([
+            Post(
+                title=_text(f"title:{i}", 6),
+                content=_text(f"content:{i}", 60),
+                original_prompt=_text(f"prompt:{i}", 12),
+                created_by=user,
+                status=rng.choice(statuses),
+                conversation_history=history,
+            )
+            for i in range(start, min(start + SEED_BATCH_SIZE, count))
+        ])
+        PostHistory.store_many(created)
+        get_search_backend().index(created)
+
+
+def last_page_cursor(user) -> str:
+    """Return the keyset cursor that opens the user's oldest page of posts"""
+    posts = Post.objects.filter(created_by=user).order_by('created_at', 'id')
+    count = posts.count()
+    if count <= 10:
+        return ''
+    # The last page holds the oldest ``count % 10`` (or 10) posts; the cursor is the post just newer than them
+    return encode_cursor(posts[count % 10 or 10])
+
+
+def run(post_counts, repeat: int, iterations: int, llm_latency: float, search_latency: float) -> dict:
+    user, _ = User.objects.get_or_create(username='benchmark-user')
+    client = Client()
+    client.force_login(user)
+
+    history_json = json.dumps([{'content': _text(f"save:{i}", 80), 'is_feedback': i % 2 == 0} for i in range(7)])
+    save_payload = {
+        'title': 'Benchmark draft',
+        'content': _text('save', 60),
+        'original_prompt': PROMPT,
+        'conversation_history': history_json,
+    }
+
+    results = {}
+    with fake_backends(llm_latency, search_latency, iterations):
+        for count in sorted(post_counts):
+            seed_posts(user, count)
+            last_page = last_page_cursor(user)
+            results[str(count)] = {
+                'process_prompt': measure(expect(lambda: client.post('/agents/process/', {'prompt': PROMPT})), repeat),
+                # A saved draft redirects to its detail page; errors redirect to the dashboard
+                'save_draft': measure(
+                    expect(lambda: client.post('/agents/save-draft/', save_payload), 302, '/agents/posts/'), repeat
+                ),
+                'post_list': measure(expect(lambda: client.get('/agents/posts/')), repeat),
+                'post_list_last_page': measure(expect(lambda: client.get('/agents/posts/', {'after': last_page})), repeat),
+                'post_list_status': measure(expect(lambda: client.get('/agents/posts/', {'status': 'draft'})), repeat),
+                'post_list_search': measure(expect(lambda: client.get('/agents/posts/', {'search': 'artemis'})), repeat),
+            }
+    return results
@@ -0,0 +1,42 @@
+"""
+Bulk status changes and deletes for a user's posts.
+
+A status change is a single ``UPDATE ... WHERE created_by = ... AND id IN
+(...)`` rather than one ``save()`` per post; it skips the model signals,
+which is fine as none of the indexed text changes. Deletes go through
+``QuerySet.delete()``, which cascades to every table referencing posts and
+sends ``post_delete``, so the signal handlers keep the search index in sync.
+"""
+from django.utils import timezone
+
+from .models import Post
+
+
+class BulkActionError(ValueError):
+    """Raised for an invalid status or id list"""
+
+
+def parse_ids(values, limit):
+    """Return the distinct integer post ids in ``values``, at most ``limit`` of them"""
+    try:
+        ids = sorted({int(value) for value in values})
+    except (TypeError, ValueError):
+        raise BulkActionError("Post ids must be integers.")
+    if not ids:
+        raise BulkActionError("Please select at least one post.")
+    if len(ids) > limit:
+        raise BulkActionError(f"At most {limit} posts can be changed at once.")
+    return ids
+
+
+def update_status(user, ids, status):
+    """Set ``status`` on the user's posts among ``ids`` in one query; returns the number updated"""
+    if status not in dict(Post.STATUS_CHOICES):
+        raise BulkActionError("Invalid status")
+    return Post.objects.filter(created_by=user, id__in=ids).update(status=status, updated_at=timezone.now())
+
+
+def delete_posts(user, ids):
+    """Delete the user's posts among ``ids`` with their histories and index entries; returns the number deleted"""
+    _, deleted = Post.objects.filter(created_by=user, id__in=ids).delete()
+    return deleted.get(Post._meta.label, 0)
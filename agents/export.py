@@ -0,0 +1,122 @@
+"""
+Streaming export of a user's posts as NDJSON or CSV.
+
+Posts are read with ``QuerySet.iterator(chunk_size=...)`` and written out one
+row at a time, so an export holds at most one chunk of posts in memory no
+matter how many the user has. Conversation histories are only read (joined
+in through ``select_related``, so still one query) when they are asked for.
+"""
+import csv
+import json
+from datetime import datetime, time
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+
+from .models import Post
+
+FORMAT_NDJSON = "ndjson"
+FORMAT_CSV = "csv"
+
+CONTENT_TYPES = {
+    FORMAT_NDJSON: "application/x-ndjson",
+    FORMAT_CSV: "text/csv",
+}
+
+FIELDS = [
+    'id', 'title', 'status', 'content', 'original_prompt',
+    'created_at', 'updated_at', 'history_steps', 'generation_metadata',
+]
+
+
+class ExportError(ValueError):
+    """Raised for an unknown format or an unparseable filter value"""
+
+
+def parse_boundary(value, end=False):
+    """
+    Parse a ``since``/``until`` filter value.
+
+    Accepts an ISO date (``2024-05-01``, covering the whole day) or datetime;
+    naive values are taken in the current time zone.
+    """
+    if not value:
+        return None
+    try:
+        # Checked first: parse_datetime also accepts a bare date, as midnight
+        day = parse_date(value)
+        moment = datetime.combine(day, time.max if end else time.min) if day else parse_datetime(value)
+    except ValueError:
+        moment = None
+    if moment is None:
+        raise ExportError(f"Invalid date: {value!r} (use YYYY-MM-DD or an ISO datetime)")
+    if timezone.is_naive(moment):
+        moment = timezone.make_aware(moment)
+    return moment
+
+
+def export_queryset(user, status=None, since=None, until=None, include_history=False):
+    """Return the user's posts to export, oldest first, filtered by status and creation date"""
+    if status and status not in dict(Post.STATUS_CHOICES):
+        raise ExportError(f"Invalid status: {status!r}")
+    posts = Post.objects.filter(created_by=user)
+    if status:
+        posts = posts.filter(status=status)
+    if since:
+        posts = posts.filter(created_at__gte=since)
+    if until:
+        posts = posts.filter(created_at__lte=until)
+    if include_history:
+        posts = posts.select_related('history_record')
+    return posts.order_by('created_at', 'id')
+
+
+def _row(post, include_history):
+    row = {field: getattr(post, field) for field in FIELDS}
+    if include_history:
+        row['conversation_history'] = post.conversation_history or []
+    return row
+
+
+def iter_ndjson(posts, include_history=False, chunk_size=None):
+    """Yield one JSON document per post, each on its own line"""
+    for post in posts.iterator(chunk_size=chunk_size or settings.EXPORT_CHUNK_SIZE):
+        yield json.dumps(_row(post, include_history), cls=DjangoJSONEncoder, ensure_ascii=False) + "\n"
+
+
+class _Echo:
+    """File-like object whose ``write`` returns the line instead of buffering it (for csv.writer)"""
+
+    def write(self, value):
+        return value
+
+
+def _csv_value(value):
+    if value is None:
+        return ""
+    if isinstance(value, (dict, list)):
+        return json.dumps(value, cls=DjangoJSONEncoder, ensure_ascii=False)
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return value
+
+
+def iter_csv(posts, include_history=False, chunk_size=None):
+    """Yield a header line and one CSV line per post; JSON columns are written as JSON text"""
+    columns = FIELDS + (['conversation_history'] if include_history else [])
+    writer = csv.writer(_Echo())
+    yield writer.writerow(columns)
+    for post in posts.iterator(chunk_size=chunk_size or settings.EXPORT_CHUNK_SIZE):
+        row = _row(post, include_history)
+        yield writer.writerow([_csv_value(row[column]) for column in columns])
+
+
+def iter_export(posts, fmt, include_history=False, chunk_size=None):
+    """Yield the export of ``posts`` in ``fmt`` ("ndjson" or "csv") line by line"""
+    if fmt == FORMAT_NDJSON:
+        return iter_ndjson(posts, include_history, chunk_size)
+    if fmt == FORMAT_CSV:
+        return iter_csv(posts, include_history, chunk_size)
+    raise ExportError(f"Unsupported export format: {fmt!r} (use {FORMAT_NDJSON} or {FORMAT_CSV})")
@@ -0,0 +1,23 @@
+"""
+Compact storage for post conversation histories.
+
+Histories are stored as zstd-compressed JSON in the PostHistory table, one
+row per post, so Post queries never carry them. Level 3 is zstd's default
+and already shrinks the repetitive draft/critique text several times over.
+"""
+import json
+
+import zstandard
+
+COMPRESSION_LEVEL = 3
+
+
+def pack_history(history) -> bytes:
+    """Serialize and compress a conversation history"""
+    raw = json.dumps(history, separators=(',', ':'), ensure_ascii=False).encode('utf-8')
+    return zstandard.ZstdCompressor(level=COMPRESSION_LEVEL).compress(raw)
+
+
+def unpack_history(data):
+    """Decompress and deserialize a history written by ``pack_history``"""
+    return json.loads(zstandard.ZstdDecompressor().decompress(bytes(data)))
@@ -0,0 +1,107 @@
+"""
+Background worker pool for reflection runs.
+
+Views create a GenerationJob row and hand it to ``enqueue``; a process-local
+thread pool then runs the reflection agent outside the request thread, so
+throughput is bounded by ``GENERATION_WORKERS`` rather than by the number of
+web workers.
+
+The queue lives in the web process's memory, so jobs do not survive a
+restart or worker recycle. Jobs still queued or running after
+``GENERATION_JOB_TIMEOUT`` seconds are taken to be lost and marked failed by
+``fail_stale_jobs``, which the job views call before reading a job.
+"""
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import close_old_connections
+from django.utils import timezone
+
+from .models import GenerationJob
+
+logger = logging.getLogger(__name__)
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def get_executor():
+    """Return the process-wide worker pool, creating it on first use"""
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(
+                    max_workers=settings.GENERATION_WORKERS,
+                    thread_name_prefix='generation-worker',
+                )
+    return _executor
+
+
+def enqueue(job, runner):
+    """
+    Schedule a queued job on the worker pool.
+    
+    Args:
+        job: The GenerationJob to run
+        runner: Callable taking the prompt and returning the agent result dict
+    """
+    return get_executor().submit(run_job, job.id, runner)
+
+
+def fail_stale_jobs(jobs=None):
+    """
+    Mark jobs queued or running for longer than GENERATION_JOB_TIMEOUT as failed.
+    
+    Args:
+        jobs: GenerationJob queryset to check (all jobs if omitted)
+        
+    Returns:
+        int: Number of jobs marked failed
+    """
+    jobs = GenerationJob.objects.all() if jobs is None else jobs
+    cutoff = timezone.now() - timedelta(seconds=settings.GENERATION_JOB_TIMEOUT)
+    stale = jobs.filter(status='queued', created_at__lt=cutoff) | jobs.filter(status='running', started_at__lt=cutoff)
+    return stale.update(
+        status='failed',
+        error='The job was lost, most likely because the server restarted. Please submit it again.',
+        finished_at=timezone.now(),
+    )
+
+
+def run_job(job_id, runner):
+    """Run a single job and persist its outcome"""
+    close_old_connections()
+    try:
+        # A job given up on as stale while it waited in the queue is not run any more
+        if not GenerationJob.objects.filter(id=job_id, status='queued').update(status='running', started_at=timezone.now()):
+            return
+        job = GenerationJob.objects.get(id=job_id)
+        
+        try:
+            result = runner(job.prompt)
+        except Exception as e:
+            logger.error(f"Generation job {job_id} failed: {str(e)}")
+            GenerationJob.objects.filter(id=job_id).update(
+                status='failed',
+                error=str(e),
+                finished_at=timezone.now(),
+            )
+            return
+        
+        GenerationJob.objects.filter(id=job_id).update(
+            status='succeeded',
+            result={
+                'final_post': result.get('final_post'),
+                'conversation_history': result.get('conversation_history', []),
+                'generation_metadata': result.get('generation_metadata'),
+                'iterations': result.get('iterations'),
+                'stop_reason': result.get('stop_reason'),
+            },
+            finished_at=timezone.now(),
+        )
+    finally:
+        close_old_connections()
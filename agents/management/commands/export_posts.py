@@ -0,0 +1,48 @@
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+
+from agents.export import FORMAT_CSV, FORMAT_NDJSON, ExportError, export_queryset, iter_export, parse_boundary
+
+
+class Command(BaseCommand):
+    help = "Stream a user's posts to a file or stdout as NDJSON or CSV"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--username', required=True, help="User whose posts are exported")
+        parser.add_argument('--format', choices=[FORMAT_NDJSON, FORMAT_CSV], default=FORMAT_NDJSON)
+        parser.add_argument('--status', help="Only export posts with this status")
+        parser.add_argument('--since', help="Only posts created on or after this date (YYYY-MM-DD or ISO datetime)")
+        parser.add_argument('--until', help="Only posts created on or before this date (YYYY-MM-DD or ISO datetime)")
+        parser.add_argument('--history', action='store_true', help="Include each post's conversation history")
+        parser.add_argument('--chunk-size', type=int, help="Rows fetched per query (default: EXPORT_CHUNK_SIZE)")
+        parser.add_argument('--output', '-o', help="File to write (default: stdout)")
+
+    def handle(self, *args, **options):
+        try:
+            user = User.objects.get(username=options['username'])
+        except User.DoesNotExist:
+            raise CommandError(f"User {options['username']!r} does not exist")
+
+        try:
+            posts = export_queryset(
+                user,
+                status=options['status'],
+                since=parse_boundary(options['since']),
+                until=parse_boundary(options['until'], end=True),
+                include_history=options['history'],
+            )
+            rows = iter_export(posts, options['format'], options['history'], options['chunk_size'])
+        except ExportError as e:
+            raise CommandError(str(e))
+
+        if not options['output']:
+            for line in rows:
+                self.stdout.write(line, ending='')
+            return
+
+        count = -1 if options['format'] == FORMAT_CSV else 0
+        with open(options['output'], 'w', encoding='utf-8', newline='') as f:
+            for line in rows:
+                f.write(line)
+                count += 1
+        self.stdout.write(self.style.SUCCESS(f"Exported {count} posts to {options['output']}"))
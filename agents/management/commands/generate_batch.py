@@ -0,0 +1,45 @@
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+
+from agents.batch import run_batch, save_batch_results
+
+
+class Command(BaseCommand):
+    help = "Generate post drafts for a list of prompts concurrently and save them for a user"
+
+    def add_arguments(self, parser):
+        parser.add_argument('prompts', nargs='*', help="Prompts to generate posts for")
+        parser.add_argument('--file', help="Text file with one prompt per line")
+        parser.add_argument('--username', required=True, help="User the drafts are saved for")
+        parser.add_argument('--concurrency', type=int, help="Maximum number of runs in flight")
+        parser.add_argument('--bypass-cache', action='store_true', help="Skip LLM response cache lookups")
+
+    def handle(self, *args, **options):
+        try:
+            user = User.objects.get(username=options['username'])
+        except User.DoesNotExist:
+            raise CommandError(f"User {options['username']!r} does not exist")
+
+        prompts = list(options['prompts'])
+        if options['file']:
+            with open(options['file'], encoding='utf-8') as f:
+                prompts.extend(line.strip() for line in f)
+        prompts = [prompt for prompt in prompts if prompt.strip()]
+        if not prompts:
+            raise CommandError("No prompts given")
+
+        from agents.agents.reflect_agent import aprocess_user_request
+
+        bypass_cache = options['bypass_cache']
+        runner = lambda prompt: aprocess_user_request(prompt, bypass_cache=bypass_cache)
+
+        self.stdout.write(f"Generating {len(prompts)} posts...")
+        results = run_batch(prompts, runner, concurrency=options['concurrency'])
+        posts = save_batch_results(results, user)
+
+        for item in results:
+            if not item['success']:
+                self.stderr.write(f"Failed: {item['prompt'][:80]} ({item['error']})")
+        self.stdout.write(self.style.SUCCESS(
+            f"Saved {len(posts)} drafts, {len(results) - len(posts)} failed"
+        ))
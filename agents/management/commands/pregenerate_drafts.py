@@ -0,0 +1,47 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from agents.pregeneration import FAILED, GENERATED, prune_drafts, refresh_drafts, seed_prompts
+
+
+class Command(BaseCommand):
+    help = "Pre-generate drafts for the seed prompts so the dashboard can offer them instantly (run from cron)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('prompts', nargs='*', help="Seed prompts (default: PREGENERATION_PROMPTS)")
+        parser.add_argument('--file', help="Text file with one seed prompt per line")
+        parser.add_argument('--ttl-hours', type=float, help="How long drafts are offered (default: PREGENERATION_TTL_HOURS)")
+        parser.add_argument('--force', action='store_true', help="Regenerate even if the search results have not changed")
+
+    def handle(self, *args, **options):
+        prompts = list(options['prompts'])
+        if options['file']:
+            with open(options['file'], encoding='utf-8') as f:
+                prompts.extend(line.strip() for line in f)
+        prompts = [prompt for prompt in prompts if prompt.strip()] or seed_prompts()
+        if not prompts:
+            raise CommandError("No seed prompts given and PREGENERATION_PROMPTS is empty")
+
+        from agents.agents.factory import get_agent
+        from agents.agents.reflect_agent import process_user_request
+
+        self.stdout.write(f"Refreshing {len(prompts)} pre-generated drafts...")
+        outcomes = refresh_drafts(
+            prompts,
+            process_user_request,
+            search_tool=get_agent().search_tool,
+            ttl_hours=options['ttl_hours'],
+            force=options['force'],
+        )
+        pruned = prune_drafts(keep_prompts=prompts)
+
+        counts = {GENERATED: 0, FAILED: 0}
+        for item in outcomes:
+            counts[item['status']] = counts.get(item['status'], 0) + 1
+            if item['status'] == FAILED:
+                self.stderr.write(f"Failed: {item['prompt'][:80]} ({item['error']})")
+            else:
+                self.stdout.write(f"{item['status'].capitalize()}: {item['prompt'][:80]}")
+        self.stdout.write(self.style.SUCCESS(
+            f"Generated {counts[GENERATED]}, kept {len(outcomes) - counts[GENERATED] - counts[FAILED]} unchanged, "
+            f"{counts[FAILED]} failed; removed {pruned} expired drafts"
+        ))
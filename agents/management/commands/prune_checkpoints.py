@@ -0,0 +1,26 @@
+from django.core.management.base import BaseCommand, CommandError
+
+
+class Command(BaseCommand):
+    help = "Delete saved progress of failed reflection runs older than the retention period"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--hours', type=float, default=None,
+            help="Delete runs older than this many hours (default: CHECKPOINT_RETENTION_HOURS)",
+        )
+
+    def handle(self, *args, **options):
+        from agents.agents.checkpoints import default_checkpointer
+
+        saver = default_checkpointer()
+        if saver is None:
+            raise CommandError("Checkpointing is disabled (CHECKPOINT_ENABLED=false)")
+
+        older_than = options['hours'] * 3600 if options['hours'] is not None else None
+        deleted = saver.prune(older_than)
+        stats = saver.stats()
+        self.stdout.write(self.style.SUCCESS(
+            f"Deleted {deleted} expired runs; {stats['threads']} resumable runs remain "
+            f"({stats['checkpoints']} checkpoints, {stats['bytes']} bytes)"
+        ))
@@ -0,0 +1,12 @@
+from django.core.management.base import BaseCommand
+
+from agents.search import get_search_backend
+
+
+class Command(BaseCommand):
+    help = "Rebuild the full-text search index for posts"
+
+    def handle(self, *args, **options):
+        backend = get_search_backend()
+        count = backend.rebuild()
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt {backend.name} search index ({count} posts)"))
@@ -0,0 +1,85 @@
+import json
+import platform
+import subprocess
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test.utils import setup_test_environment, teardown_test_environment
+
+from agents.benchmarks import graph, views
+
+
+class Command(BaseCommand):
+    help = "Run the offline graph and view benchmarks against fake LLM/search backends and write JSON results"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--output', default='bench_output.json', help="Where to write the JSON results")
+        parser.add_argument('--compare', help="Previous results file to compare mean timings against")
+        parser.add_argument('--posts', type=int, nargs='+', default=[1000, 100000],
+                            help="Database sizes (posts) to benchmark the views against")
+        parser.add_argument('--repeat', type=int, default=20, help="Timed calls per measurement")
+        parser.add_argument('--iterations', type=int, default=4, help="Drafts per reflection run")
+        parser.add_argument('--llm-latency', type=float, default=0.0, help="Seconds per fake LLM call")
+        parser.add_argument('--search-latency', type=float, default=0.0, help="Seconds per fake search")
+        parser.add_argument('--skip-views', action='store_true', help="Only run the graph benchmarks")
+
+    def handle(self, *args, **options):
+        config = {
+            key: options[key]
+            for key in ('posts', 'repeat', 'iterations', 'llm_latency', 'search_latency')
+        }
+        results = {
+            'commit': self._commit(),
+            'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+            'python': platform.python_version(),
+            'config': config,
+        }
+
+        self.stdout.write("Benchmarking reflection graph...")
+        results['graph'] = graph.run(
+            options['repeat'], options['iterations'], options['llm_latency'], options['search_latency']
+        )
+
+        if not options['skip_views']:
+            self.stdout.write("Benchmarking views against a test database...")
+            setup_test_environment()
+            old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True)
+            try:
+                results['views'] = views.run(
+                    options['posts'], options['repeat'], options['iterations'],
+                    options['llm_latency'], options['search_latency'],
+                )
+            finally:
+                connection.creation.destroy_test_db(old_name, verbosity=0)
+                teardown_test_environment()
+
+        with open(options['output'], 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
+        self.stdout.write(self.style.SUCCESS(f"Wrote {options['output']}"))
+
+        if options['compare']:
+            with open(options['compare'], encoding='utf-8') as f:
+                self._compare(json.load(f), results)
+
+    def _commit(self):
+        try:
+            return subprocess.run(
+                ['git', 'rev-parse', '--short', 'HEAD'],
+                cwd=settings.BASE_DIR, capture_output=True, text=True, check=True,
+            ).stdout.strip()
+        except (OSError, subprocess.CalledProcessError):
+            return None
+
+    def _compare(self, before, after, path=''):
+        """Print the change in every mean_ms measurement present in both result sets"""
+        for key, value in after.items():
+            if key not in before:
+                continue
+            if isinstance(value, dict) and 'mean_ms' in value and 'mean_ms' in before[key]:
+                old, new = before[key]['mean_ms'], value['mean_ms']
+                change = (new - old) / old * 100 if old else 0.0
+                self.stdout.write(f"{path}{key}: {old:.2f} ms -> {new:.2f} ms ({change:+.1f}%)")
+            elif isinstance(value, dict) and isinstance(before[key], dict):
+                self._compare(before[key], value, f"{path}{key}.")
@@ -0,0 +1,12 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from agents.agents.factory import agent_factory
+
+
+class Command(BaseCommand):
+    help = "Build the agent stack (LLM, search tool, ReAct agent and reflection graph) and report how long it took"
+
+    def handle(self, *args, **options):
+        if not agent_factory.warm_up():
+            raise CommandError(f"Agent initialization failed: {agent_factory.state()['error']}")
+        self.stdout.write(self.style.SUCCESS(f"Agent ready in {agent_factory.state()['init_ms']} ms"))
@@ -0,0 +1,45 @@
+from django.db import migrations
+
+FTS_TABLE = "agents_post_fts"
+
+
+# The DDL is frozen here rather than imported from agents.search, so later changes to the app
+# cannot change what this migration does
+
+
+def create_index(apps, schema_editor):
+    conn = schema_editor.connection
+    if conn.vendor != 'sqlite':
+        return
+    with conn.cursor() as cursor:
+        cursor.execute("SELECT sqlite_compileoption_used('ENABLE_FTS5')")
+        if not cursor.fetchone()[0]:
+            return
+        cursor.execute(
+            f"CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5("
+            " title, content, original_prompt,"
+            " tokenize = 'unicode61 remove_diacritics 2')"
+        )
+        cursor.execute(
+            f"INSERT INTO {FTS_TABLE} (rowid, title, content, original_prompt)"
+            " SELECT id, title, content, original_prompt FROM agents_post"
+        )
+
+
+def drop_index(apps, schema_editor):
+    conn = schema_editor.connection
+    if conn.vendor != 'sqlite':
+        return
+    with conn.cursor() as cursor:
+        cursor.execute(f"DROP TABLE IF EXISTS {FTS_TABLE}")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('agents', '0002_generationjob'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_index, drop_index),
+    ]
@@ -0,0 +1,87 @@
+# Generated by Django 5.0.6 on 2026-10-18 09:03
+
+import json
+
+import django.db.models.deletion
+import zstandard
+from django.db import migrations, models
+
+BATCH_SIZE = 500
+
+
+# Frozen copies of agents.history as of this migration, so later changes to the storage
+# format cannot change how existing histories are moved
+
+def pack_history(history):
+    raw = json.dumps(history, separators=(',', ':'), ensure_ascii=False).encode('utf-8')
+    return zstandard.ZstdCompressor(level=3).compress(raw)
+
+
+def unpack_history(data):
+    return json.loads(zstandard.ZstdDecompressor().decompress(bytes(data)))
+
+
+def move_histories(apps, schema_editor):
+    Post = apps.get_model('agents', 'Post')
+    PostHistory = apps.get_model('agents', 'PostHistory')
+    last_id = 0
+    while True:
+        posts = list(
+            Post.objects.filter(id__gt=last_id).exclude(conversation_history=None)
+            .order_by('id').only('id', 'conversation_history')[:BATCH_SIZE]
+        )
+        if not posts:
+            break
+        last_id = posts[-1].id
+        records = []
+        for post in posts:
+            post.history_steps = len(post.conversation_history or [])
+            if post.conversation_history:
+                data = pack_history(post.conversation_history)
+                records.append(PostHistory(post_id=post.id, data=data, raw_size=zstandard.frame_content_size(data)))
+        PostHistory.objects.bulk_create(records)
+        Post.objects.bulk_update(posts, ['history_steps'])
+
+
+def restore_histories(apps, schema_editor):
+    Post = apps.get_model('agents', 'Post')
+    PostHistory = apps.get_model('agents', 'PostHistory')
+    posts = []
+    for record in PostHistory.objects.iterator(chunk_size=BATCH_SIZE):
+        posts.append(Post(id=record.post_id, conversation_history=unpack_history(record.data)))
+        if len(posts) >= BATCH_SIZE:
+            Post.objects.bulk_update(posts, ['conversation_history'])
+            posts = []
+    Post.objects.bulk_update(posts, ['conversation_history'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('agents', '0004_post_list_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PostHistory',
+            fields=[
+                ('post', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='history_record', serialize=False, to='agents.post')),
+                ('data', models.BinaryField(help_text='zstd-compressed JSON conversation history')),
+                ('raw_size', models.PositiveIntegerField(default=0, help_text='Uncompressed size in bytes')),
+            ],
+            options={
+                'verbose_name': 'Post History',
+                'verbose_name_plural': 'Post Histories',
+            },
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='history_steps',
+            field=models.PositiveIntegerField(default=0, help_text='Number of steps in the conversation history'),
+        ),
+        migrations.RunPython(move_histories, restore_histories),
+        migrations.RemoveField(
+            model_name='post',
+            name='conversation_history',
+        ),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 5.0.6 on 2026-10-18 09:27
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('agents', '0005_post_history'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PregeneratedDraft',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('prompt', models.TextField(help_text='The seed prompt the draft was generated for')),
+                ('prompt_key', models.CharField(help_text='Hash of the normalized prompt', max_length=32, unique=True)),
+                ('final_post', models.TextField(help_text='The generated post')),
+                ('result', models.JSONField(default=dict, help_text='Conversation history, generation metadata and stop reason of the run')),
+                ('search_fingerprint', models.CharField(blank=True, default='', help_text='Hash of the search results the draft was based on; a change triggers regeneration', max_length=32)),
+                ('generated_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('expires_at', models.DateTimeField(db_index=True)),
+            ],
+            options={
+                'verbose_name': 'Pre-generated Draft',
+                'verbose_name_plural': 'Pre-generated Drafts',
+                'ordering': ['-generated_at'],
+            },
+        ),
+    ]
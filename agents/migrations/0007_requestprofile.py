@@ -0,0 +1,38 @@
+# Generated by Django 5.0.6 on 2026-10-18 09:39
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('agents', '0006_pregenerateddraft'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RequestProfile',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('path', models.CharField(max_length=255)),
+                ('view_name', models.CharField(blank=True, help_text='Resolved view name, used to group requests by endpoint', max_length=200)),
+                ('method', models.CharField(max_length=10)),
+                ('status_code', models.PositiveSmallIntegerField()),
+                ('streamed', models.BooleanField(default=False)),
+                ('total_ms', models.FloatField(help_text='Time spent in the view and middleware, plus producing the body of a streamed response')),
+                ('db_queries', models.PositiveIntegerField(default=0)),
+                ('db_ms', models.FloatField(default=0)),
+                ('template_ms', models.FloatField(default=0, help_text='Template rendering, excluding queries run while rendering')),
+                ('agent_ms', models.FloatField(default=0, help_text='Generation runs, excluding database queries')),
+                ('serialize_ms', models.FloatField(default=0, help_text='JSON serialization of results and conversation histories')),
+                ('profile', models.BinaryField(blank=True, help_text='zstd-compressed cProfile stats (PROFILING_CPROFILE)', null=True)),
+                ('created_at', models.DateTimeField(db_index=True, default=django.utils.timezone.now)),
+            ],
+            options={
+                'verbose_name': 'Request Profile',
+                'verbose_name_plural': 'Request Profiles',
+                'ordering': ['-created_at'],
+            },
+        ),
+    ]
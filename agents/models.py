@@ -1,7 +1,13 @@
+import xxhash
+import zstandard
 from django.db import models
 from django.contrib.auth.models import User
 from django.utils import timezone
 
+from .history import pack_history, unpack_history
+
+_UNSET = object()
+
 
 class Post(models.Model):
     """Model for storing generated social media post drafts"""
@@ -22,11 +28,10 @@ class Post(models.Model):
     updated_at = models.DateTimeField(auto_now=True)
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='draft')
     
-    # Generation details
-    conversation_history = models.JSONField(
-        null=True, 
-        blank=True, 
-        help_text="Full conversation history from the generation process"
+    # Generation details (the conversation history itself lives in PostHistory)
+    history_steps = models.PositiveIntegerField(
+        default=0,
+        help_text="Number of steps in the conversation history"
     )
     generation_metadata = models.JSONField(
         null=True, 
@@ -38,10 +43,49 @@ class Post(models.Model):
         ordering = ['-created_at']
         verbose_name = "Post Draft"
         verbose_name_plural = "Post Drafts"
+        indexes = [
+            # Serve the post list (owner, optional status filter, newest first) and its keyset cursor from an index
+            models.Index(fields=['created_by', 'status', 'created_at', 'id'], name='agents_post_owner_status_idx'),
+            models.Index(fields=['created_by', 'created_at', 'id'], name='agents_post_owner_created_idx'),
+        ]
     
     def __str__(self):
         return f"{self.title} ({self.status}) - {self.created_at.strftime('%Y-%m-%d')}"
     
+    _pending_history = _UNSET
+    
+    @property
+    def conversation_history(self):
+        """Full conversation history from the generation process, fetched and decompressed on first access"""
+        if self._pending_history is not _UNSET:
+            return self._pending_history
+        if not hasattr(self, '_history_cache'):
+            try:
+                self._history_cache = self.history_record.history if self.pk else None
+            except PostHistory.DoesNotExist:
+                self._history_cache = None
+        return self._history_cache
+    
+    @conversation_history.setter
+    def conversation_history(self, history):
+        self._pending_history = history
+        self.history_steps = len(history or [])
+    
+    def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)
+        if self._pending_history is not _UNSET:
+            PostHistory.store(self, self._pending_history)
+            self._history_cache = self._pending_history
+            self._pending_history = _UNSET
+    
+    @classmethod
+    def status_counts(cls, user):
+        """Return ``{status: count}`` for the user's posts (one grouped query over the owner/status index)"""
+        counts = {status: 0 for status, _ in cls.STATUS_CHOICES}
+        rows = cls.objects.filter(created_by=user).order_by().values_list('status').annotate(models.Count('id'))
+        counts.update(dict(rows))
+        return counts
+    
     @property
     def content_preview(self):
         """Return a truncated version of the content for display"""
@@ -57,12 +101,23 @@ class Post(models.Model):
     def mark_as_published(self):
         """Mark the post as published"""
         self.status = 'published'
-        self.save()
+        self.save(update_fields=['status', 'updated_at'])
     
     def mark_as_archived(self):
         """Mark the post as archived"""
         self.status = 'archived'
-        self.save()
+        self.save(update_fields=['status', 'updated_at'])
+    
+    @property
+    def generation_timing(self):
+        """Return per-node timing rows from the generation metadata with their share of the run"""
+        metadata = self.generation_metadata or {}
+        nodes = metadata.get('nodes') or []
+        total_ms = metadata.get('total_ms') or sum(node.get('duration_ms', 0) for node in nodes)
+        return [
+            {**node, 'share': round(node.get('duration_ms', 0) * 100 / total_ms) if total_ms else 0}
+            for node in nodes
+        ]
     
     @property
     def status_css_class(self):
@@ -73,3 +128,194 @@ class Post(models.Model):
             'archived': 'bg-secondary',
         }
         return status_classes.get(self.status, 'bg-secondary')
+
+
+class PostHistory(models.Model):
+    """zstd-compressed conversation history of a post, kept out of the Post row"""
+    
+    post = models.OneToOneField(Post, on_delete=models.CASCADE, primary_key=True, related_name='history_record')
+    data = models.BinaryField(help_text="zstd-compressed JSON conversation history")
+    raw_size = models.PositiveIntegerField(default=0, help_text="Uncompressed size in bytes")
+    
+    class Meta:
+        verbose_name = "Post History"
+        verbose_name_plural = "Post Histories"
+    
+    def __str__(self):
+        return f"History of post #{self.post_id} ({len(self.data)} bytes compressed)"
+    
+    @property
+    def history(self):
+        return unpack_history(self.data)
+    
+    @classmethod
+    def build(cls, post, history):
+        """Return an unsaved record holding ``history`` for ``post``"""
+        data = pack_history(history)
+        return cls(post=post, data=data, raw_size=zstandard.frame_content_size(data))
+    
+    @classmethod
+    def store(cls, post, history):
+        """Create, replace or (for an empty history) remove the record for ``post``"""
+        if not history:
+            cls.objects.filter(post=post).delete()
+            return
+        record = cls.build(post, history)
+        cls.objects.update_or_create(post=post, defaults={'data': record.data, 'raw_size': record.raw_size})
+    
+    @classmethod
+    def store_many(cls, posts):
+        """Write the pending histories of freshly bulk-created posts (bulk_create bypasses ``Post.save``)"""
+        records = []
+        for post in posts:
+            if post._pending_history is not _UNSET:
+                if post._pending_history:
+                    records.append(cls.build(post, post._pending_history))
+                post._history_cache = post._pending_history
+                post._pending_history = _UNSET
+        cls.objects.bulk_create(records)
+
+
+class GenerationJob(models.Model):
+    """A reflection run queued for the background worker pool"""
+    
+    STATUS_CHOICES = [
+        ('queued', 'Queued'),
+        ('running', 'Running'),
+        ('succeeded', 'Succeeded'),
+        ('failed', 'Failed'),
+    ]
+    
+    prompt = models.TextField(help_text="The user prompt to run through the reflection agent")
+    created_by = models.ForeignKey(User, on_delete=models.CASCADE, related_name='generation_jobs')
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='queued')
+    
+    # Outcome
+    result = models.JSONField(
+        null=True,
+        blank=True,
+        help_text="Final post and conversation history once the run has finished"
+    )
+    error = models.TextField(blank=True, default='', help_text="Error message if the run failed")
+    
+    # Timing
+    created_at = models.DateTimeField(default=timezone.now)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+    
+    class Meta:
+        ordering = ['-created_at']
+        verbose_name = "Generation Job"
+        verbose_name_plural = "Generation Jobs"
+    
+    def __str__(self):
+        return f"Job #{self.id} ({self.status}) - {self.prompt[:50]}"
+    
+    @property
+    def is_finished(self):
+        """Return True once the job has either succeeded or failed"""
+        return self.status in ('succeeded', 'failed')
+    
+    def to_dict(self):
+        """Return a JSON-serializable representation for the status endpoint"""
+        result = self.result or {}
+        return {
+            'id': self.id,
+            'status': self.status,
+            'prompt': self.prompt,
+            'created_at': self.created_at.isoformat(),
+            'started_at': self.started_at.isoformat() if self.started_at else None,
+            'finished_at': self.finished_at.isoformat() if self.finished_at else None,
+            'final_post': result.get('final_post'),
+            'conversation_history': result.get('conversation_history', []),
+            'stop_reason': result.get('stop_reason'),
+            'error': self.error,
+        }
+
+
+class PregeneratedDraft(models.Model):
+    """A draft generated ahead of time for a popular seed prompt, offered on the dashboard while fresh"""
+    
+    prompt = models.TextField(help_text="The seed prompt the draft was generated for")
+    prompt_key = models.CharField(max_length=32, unique=True, help_text="Hash of the normalized prompt")
+    final_post = models.TextField(help_text="The generated post")
+    result = models.JSONField(
+        default=dict,
+        help_text="Conversation history, generation metadata and stop reason of the run"
+    )
+    search_fingerprint = models.CharField(
+        max_length=32,
+        blank=True,
+        default='',
+        help_text="Hash of the search results the draft was based on; a change triggers regeneration"
+    )
+    generated_at = models.DateTimeField(default=timezone.now)
+    expires_at = models.DateTimeField(db_index=True)
+    
+    class Meta:
+        ordering = ['-generated_at']
+        verbose_name = "Pre-generated Draft"
+        verbose_name_plural = "Pre-generated Drafts"
+    
+    def __str__(self):
+        return f"{self.prompt[:50]} ({self.generated_at.strftime('%Y-%m-%d %H:%M')})"
+    
+    @staticmethod
+    def key_for(prompt):
+        from .agents.search_cache import normalize_query
+        return xxhash.xxh3_128_hexdigest(normalize_query(prompt))
+    
+    @classmethod
+    def fresh(cls):
+        """Drafts that have not expired yet"""
+        return cls.objects.filter(expires_at__gt=timezone.now())
+    
+    @property
+    def is_fresh(self):
+        return self.expires_at > timezone.now()
+    
+    @property
+    def content_preview(self):
+        """Return a truncated version of the post for display"""
+        if len(self.final_post) > 160:
+            return self.final_post[:160] + "..."
+        return self.final_post
+
+
+
+class RequestProfile(models.Model):
+    """Timing breakdown of one sampled request (see agents/profiling.py), kept to the most recent PROFILING_MAX_RECORDS"""
+    
+    path = models.CharField(max_length=255)
+    view_name = models.CharField(max_length=200, blank=True, help_text="Resolved view name, used to group requests by endpoint")
+    method = models.CharField(max_length=10)
+    status_code = models.PositiveSmallIntegerField()
+    streamed = models.BooleanField(default=False)
+    total_ms = models.FloatField(help_text="Time spent in the view and middleware, plus producing the body of a streamed response")
+    db_queries = models.PositiveIntegerField(default=0)
+    db_ms = models.FloatField(default=0)
+    template_ms = models.FloatField(default=0, help_text="Template rendering, excluding queries run while rendering")
+    agent_ms = models.FloatField(default=0, help_text="Generation runs, excluding database queries")
+    serialize_ms = models.FloatField(default=0, help_text="JSON serialization of results and conversation histories")
+    profile = models.BinaryField(null=True, blank=True, help_text="zstd-compressed cProfile stats (PROFILING_CPROFILE)")
+    created_at = models.DateTimeField(default=timezone.now, db_index=True)
+    
+    class Meta:
+        ordering = ['-created_at']
+        verbose_name = "Request Profile"
+        verbose_name_plural = "Request Profiles"
+    
+    def __str__(self):
+        return f"{self.method} {self.path} ({self.total_ms:.0f} ms)"
+    
+    @property
+    def other_ms(self):
+        """Time not accounted for by the database, templates, the agent or serialization"""
+        return max(0.0, self.total_ms - self.db_ms - self.template_ms - self.agent_ms - self.serialize_ms)
+    
+    @classmethod
+    def record(cls, max_records, **fields):
+        """Save a profile and drop the ones that fall out of the ring buffer"""
+        profile = cls.objects.create(**fields)
+        cls.objects.filter(id__lte=profile.id - max_records).delete()
+        return profile
@@ -0,0 +1,100 @@
+"""
+Keyset (cursor) pagination over ``(created_at, id)``.
+
+Instead of ``OFFSET n`` each page link carries an opaque cursor holding the
+sort key of the last (or first) row shown, and the next page is fetched with
+a range condition on that key. With the composite indexes on Post this is an
+index seek, so page 500 costs the same as page 1, and no COUNT(*) is needed to
+know whether there is another page.
+"""
+import base64
+from datetime import datetime
+
+from django.db.models import Q
+
+
+def encode_cursor(post):
+    """Return an opaque cursor pointing at ``post``'s position in the ordering"""
+    raw = f"{post.created_at.isoformat()}|{post.id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    """Return ``(created_at, id)`` from a cursor, or None if it is malformed"""
+    if not cursor:
+        return None
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)).decode()
+        created_at, post_id = raw.split('|')
+        return datetime.fromisoformat(created_at), int(post_id)
+    except (ValueError, UnicodeDecodeError):
+        return None
+
+
+class KeysetPage:
+    """One page of keyset-paginated posts, newest first"""
+
+    def __init__(self, object_list, has_next, has_previous):
+        self.object_list = object_list
+        self._has_next = has_next
+        self._has_previous = has_previous
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def has_next(self):
+        return self._has_next
+
+    def has_previous(self):
+        return self._has_previous
+
+    def has_other_pages(self):
+        return self._has_next or self._has_previous
+
+    @property
+    def next_cursor(self):
+        return encode_cursor(self.object_list[-1]) if self._has_next else None
+
+    @property
+    def previous_cursor(self):
+        return encode_cursor(self.object_list[0]) if self._has_previous else None
+
+
+def keyset_paginate(queryset, after=None, before=None, per_page=10):
+    """
+    Return a KeysetPage of ``queryset`` ordered by ``(-created_at, -id)``
+    
+    Args:
+        queryset: Posts to page through (any existing ordering is replaced)
+        after: Cursor of the last post on the previous page ("Older")
+        before: Cursor of the first post on the next page ("Newer")
+        per_page: Number of posts per page
+        
+    Returns:
+        KeysetPage: The posts on the requested page; malformed cursors yield the first page
+    """
+    after_key = decode_cursor(after)
+    before_key = decode_cursor(before) if after_key is None else None
+
+    if before_key is not None:
+        created_at, post_id = before_key
+        rows = list(
+            queryset.filter(Q(created_at__gt=created_at) | Q(created_at=created_at, id__gt=post_id))
+            .order_by('created_at', 'id')[:per_page + 1]
+        )
+        if len(rows) <= per_page:
+            # Reached the newest posts: show a full first page rather than a short one
+            return keyset_paginate(queryset, per_page=per_page)
+        rows = rows[:per_page]
+        rows.reverse()
+        return KeysetPage(rows, has_next=True, has_previous=True)
+
+    ordered = queryset.order_by('-created_at', '-id')
+    if after_key is not None:
+        created_at, post_id = after_key
+        ordered = ordered.filter(Q(created_at__lt=created_at) | Q(created_at=created_at, id__lt=post_id))
+    rows = list(ordered[:per_page + 1])
+    return KeysetPage(rows[:per_page], has_next=len(rows) > per_page, has_previous=after_key is not None)
@@ -0,0 +1,118 @@
+"""
+Scheduled pre-generation of drafts for popular seed prompts.
+
+Run off-peak (the ``pregenerate_drafts`` command, from cron), this generates
+a draft for each seed prompt ahead of time and stores it as a
+PregeneratedDraft with the time it was generated and when it expires. The
+dashboard offers fresh drafts instantly instead of making the user wait for
+a full reflection run.
+
+Before regenerating an unexpired draft, the seed prompt's search queries are
+run again and the result URLs are hashed: if the fingerprint still matches
+the one the draft was generated from, the news has not moved and the draft
+is kept as is.
+"""
+import json
+import logging
+from datetime import timedelta
+
+import xxhash
+from django.conf import settings
+from django.utils import timezone
+
+from .models import PregeneratedDraft
+
+logger = logging.getLogger(__name__)
+
+GENERATED = "generated"
+UNCHANGED = "unchanged"
+FAILED = "failed"
+
+
+def seed_prompts():
+    """The configured seed prompts (PREGENERATION_PROMPTS)"""
+    return [prompt for prompt in settings.PREGENERATION_PROMPTS if prompt.strip()]
+
+
+def search_fingerprint(prompt, search_tool):
+    """Hash of the URLs the prompt's pre-fetch searches return, or "" if every search failed"""
+    from .agents.prefetch import SearchPrefetch
+
+    results = SearchPrefetch(search_tool).fetch(prompt)
+    if not results:
+        return ""
+    keys = sorted(result['url'] or result['content'] for result in results)
+    return xxhash.xxh3_128_hexdigest(json.dumps(keys))
+
+
+def refresh_draft(prompt, runner, search_tool=None, ttl_hours=None, force=False):
+    """
+    Generate the draft for ``prompt`` unless a fresh one based on the same search results exists.
+
+    Args:
+        prompt: Seed prompt
+        runner: Callable taking a prompt and ``bypass_cache`` and returning the agent result dict
+        search_tool: Search tool used to fingerprint the current results (skipped if None)
+        ttl_hours: How long the draft is offered (defaults to PREGENERATION_TTL_HOURS)
+        force: Regenerate even if the draft is fresh and the results are unchanged
+
+    Returns:
+        tuple: (status, draft) where status is "generated" or "unchanged"
+    """
+    ttl_hours = ttl_hours if ttl_hours is not None else settings.PREGENERATION_TTL_HOURS
+    key = PregeneratedDraft.key_for(prompt)
+    existing = PregeneratedDraft.objects.filter(prompt_key=key).first()
+    fingerprint = search_fingerprint(prompt, search_tool) if search_tool is not None else ""
+
+    if existing is not None and existing.is_fresh and not force:
+        # Without a fingerprint there is nothing to compare against, so keep the draft until it expires
+        if not fingerprint or fingerprint == existing.search_fingerprint:
+            return UNCHANGED, existing
+
+    # A draft already exists, so its cached LLM responses are what we want to get away from
+    result = runner(prompt, bypass_cache=existing is not None)
+    now = timezone.now()
+    draft, _ = PregeneratedDraft.objects.update_or_create(
+        prompt_key=key,
+        defaults={
+            'prompt': prompt,
+            'final_post': result.get('final_post') or "",
+            'result': {
+                'conversation_history': result.get('conversation_history', []),
+                'generation_metadata': result.get('generation_metadata'),
+                'iterations': result.get('iterations'),
+                'stop_reason': result.get('stop_reason'),
+            },
+            'search_fingerprint': fingerprint,
+            'generated_at': now,
+            'expires_at': now + timedelta(hours=ttl_hours),
+        },
+    )
+    return GENERATED, draft
+
+
+def refresh_drafts(prompts, runner, search_tool=None, ttl_hours=None, force=False):
+    """
+    Refresh the drafts of all ``prompts`` one after another; a failing prompt does not stop the rest.
+
+    Returns:
+        list: One dict per prompt with ``prompt``, ``status`` and ``draft`` or ``error``
+    """
+    outcomes = []
+    for prompt in prompts:
+        try:
+            status, draft = refresh_draft(prompt, runner, search_tool, ttl_hours, force)
+        except Exception as e:
+            logger.error(f"Pre-generation failed for prompt {prompt[:100]!r}: {str(e)}")
+            outcomes.append({'prompt': prompt, 'status': FAILED, 'error': str(e)})
+            continue
+        outcomes.append({'prompt': prompt, 'status': status, 'draft': draft})
+    return outcomes
+
+
+def prune_drafts(keep_prompts=()):
+    """Delete expired drafts of prompts that are no longer seeded; returns the number deleted"""
+    keep = [PregeneratedDraft.key_for(prompt) for prompt in keep_prompts]
+    expired = PregeneratedDraft.objects.filter(expires_at__lte=timezone.now()).exclude(prompt_key__in=keep)
+    deleted, _ = expired.delete()
+    return deleted
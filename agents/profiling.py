@@ -0,0 +1,311 @@
+"""
+Sampled, request-scoped profiling.
+
+``ProfilingMiddleware`` picks ``PROFILING_SAMPLE_PERCENT`` percent of requests
+and records, for each one, the total time and how it splits between database
+queries, template rendering, the agent run and JSON serialization, plus an
+optional cProfile dump. The records go to the ``RequestProfile`` table, kept
+to the last ``PROFILING_MAX_RECORDS`` rows, and the admin lists the slowest
+endpoints from it.
+
+The timings are collected through a context variable, so code deeper down
+only pays for a lookup when its request is not sampled:
+
+* every database connection gets an execute wrapper counting queries;
+* ``ProfiledDjangoTemplates`` (the template backend in settings) times each
+  top-level ``render``;
+* the views time the agent and their ``json.dumps`` calls with ``section``.
+
+Each section's time excludes the queries run inside it, so the parts add up
+to at most the total; what is left is view code, middleware and the like.
+Streaming responses are timed until their last chunk is produced. With the
+sample rate at 0 the middleware removes itself at startup.
+"""
+import cProfile
+import marshal
+import pstats
+import random
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from io import StringIO
+from typing import Optional
+
+import zstandard
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.template import TemplateDoesNotExist
+from django.template.backends.django import DjangoTemplates, Template, reraise
+
+SECTION_TEMPLATE = 'template'
+SECTION_AGENT = 'agent'
+SECTION_SERIALIZE = 'serialize'
+SECTIONS = (SECTION_TEMPLATE, SECTION_AGENT, SECTION_SERIALIZE)
+
+_current_timer: ContextVar[Optional["RequestTimer"]] = ContextVar("request_timer", default=None)
+_current_section: ContextVar[Optional[str]] = ContextVar("profiled_section", default=None)
+
+# One cProfile at a time: a second profiler in the process would fail to start (or skew both)
+_profiler_lock = threading.Lock()
+
+
+class RequestTimer:
+    """Timings of one sampled request"""
+
+    def __init__(self, cprofile: bool = False):
+        self.total_ms = 0.0
+        self.db_queries = 0
+        self.db_ms = 0.0
+        self.sections = {name: 0.0 for name in SECTIONS}
+        self.profiler = None
+        self._want_profile = cprofile
+        self._lock = threading.Lock()
+
+    def add_query(self, duration_ms: float) -> None:
+        with self._lock:
+            self.db_queries += 1
+            self.db_ms += duration_ms
+
+    def add(self, section: str, duration_ms: float) -> None:
+        with self._lock:
+            self.sections[section] += duration_ms
+
+    @contextmanager
+    def running(self):
+        """Make this the current request's timer for the block and add its wall time to the total"""
+        token = _current_timer.set(self)
+        profiling = self._want_profile and _profiler_lock.acquire(blocking=False)
+        if profiling:
+            self.profiler = self.profiler or cProfile.Profile()
+            self.profiler.enable()
+        start = time.perf_counter()
+        try:
+            yield self
+        finally:
+            self.total_ms += (time.perf_counter() - start) * 1000
+            if profiling:
+                self.profiler.disable()
+                _profiler_lock.release()
+            _current_timer.reset(token)
+
+    def profile_data(self) -> Optional[bytes]:
+        """The cProfile stats in ``pstats`` dump format, zstd-compressed (None if no profile was taken)"""
+        if self.profiler is None:
+            return None
+        self.profiler.create_stats()
+        return zstandard.ZstdCompressor().compress(marshal.dumps(self.profiler.stats))
+
+
+@contextmanager
+def section(name: str):
+    """Time the block as part of ``name`` (one of SECTIONS) for a sampled request; a no-op otherwise"""
+    timer = _current_timer.get()
+    # Nested blocks of the same section (e.g. the concurrent runs of a batch) are already timed by the outer one
+    if timer is None or _current_section.get() == name:
+        yield
+        return
+
+    token = _current_section.set(name)
+    db_ms = timer.db_ms
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        timer.add(name, (time.perf_counter() - start) * 1000 - (timer.db_ms - db_ms))
+        _current_section.reset(token)
+
+
+def _time_query(execute, sql, params, many, context):
+    timer = _current_timer.get()
+    if timer is None:
+        return execute(sql, params, many, context)
+    start = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        timer.add_query((time.perf_counter() - start) * 1000)
+
+
+def _install_query_timer(connection, **kwargs):
+    if _time_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(_time_query)
+
+
+class ProfiledTemplate(Template):
+    """Django template that reports its render time to the current request's timer"""
+
+    def render(self, context=None, request=None):
+        with section(SECTION_TEMPLATE):
+            return super().render(context, request)
+
+
+class ProfiledDjangoTemplates(DjangoTemplates):
+    """The Django template backend with render timing for sampled requests"""
+
+    def from_string(self, template_code):
+        return ProfiledTemplate(self.engine.from_string(template_code), self)
+
+    def get_template(self, template_name):
+        try:
+            return ProfiledTemplate(self.engine.get_template(template_name), self)
+        except TemplateDoesNotExist as exc:
+            reraise(exc, self)
+
+
+def summarize_profiles(profiles) -> list:
+    """
+    Aggregate request profiles by endpoint.
+
+    Returns:
+        list: One row per view with count, p50/p95/max total time and the mean breakdown, slowest p95 first
+    """
+    from .agents.instrumentation import percentile
+
+    groups = {}
+    for profile in profiles:
+        groups.setdefault(profile.view_name or profile.path, []).append(profile)
+
+    mean = lambda values: sum(values) / len(values)
+    rows = []
+    for endpoint, records in groups.items():
+        totals = [record.total_ms for record in records]
+        rows.append({
+            'endpoint': endpoint,
+            'count': len(records),
+            'p50_ms': percentile(totals, 50),
+            'p95_ms': percentile(totals, 95),
+            'max_ms': max(totals),
+            'mean_db_queries': mean([record.db_queries for record in records]),
+            'mean_db_ms': mean([record.db_ms for record in records]),
+            'mean_template_ms': mean([record.template_ms for record in records]),
+            'mean_agent_ms': mean([record.agent_ms for record in records]),
+            'mean_serialize_ms': mean([record.serialize_ms for record in records]),
+            'mean_other_ms': mean([record.other_ms for record in records]),
+        })
+    return sorted(rows, key=lambda row: row['p95_ms'], reverse=True)
+
+
+class _LoadedProfile:
+    # pstats.Stats accepts anything with create_stats() and a stats dict, like a cProfile.Profile
+    def __init__(self, data: bytes):
+        self.stats = marshal.loads(zstandard.ZstdDecompressor().decompress(bytes(data)))
+
+    def create_stats(self):
+        pass
+
+
+def format_profile(data: bytes, limit: int = 30) -> str:
+    """The top ``limit`` functions by cumulative time from a compressed dump made by ``RequestTimer.profile_data``"""
+    output = StringIO()
+    pstats.Stats(_LoadedProfile(data), stream=output).sort_stats(pstats.SortKey.CUMULATIVE).print_stats(limit)
+    return output.getvalue()
+
+
+class ProfilingMiddleware:
+    """Profile a random sample of requests into RequestProfile (PROFILING_SAMPLE_PERCENT, off by default)"""
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.sample_rate = getattr(settings, 'PROFILING_SAMPLE_PERCENT', 0) / 100
+        if self.sample_rate <= 0:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.max_records = getattr(settings, 'PROFILING_MAX_RECORDS', 1000)
+        self.cprofile = getattr(settings, 'PROFILING_CPROFILE', False)
+        self.skip_prefixes = tuple(getattr(settings, 'PROFILING_SKIP_PREFIXES', ()))
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+        # Connections opened from now on get the query timer when they connect; add it to those already open
+        connection_created.connect(_install_query_timer, dispatch_uid='agents.profiling')
+        for connection in connections.all(initialized_only=True):
+            _install_query_timer(connection)
+
+    def _sampled(self, request) -> bool:
+        return not request.path.startswith(self.skip_prefixes) and random.random() < self.sample_rate
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        if not self._sampled(request):
+            return self.get_response(request)
+
+        # cProfile only sees the calling thread, so it is limited to sync requests
+        timer = RequestTimer(cprofile=self.cprofile)
+        with timer.running():
+            response = self.get_response(request)
+        if response.streaming:
+            self._time_stream(request, response, timer)
+        else:
+            self._save(request, response, timer)
+        return response
+
+    async def __acall__(self, request):
+        if not self._sampled(request):
+            return await self.get_response(request)
+
+        timer = RequestTimer()
+        with timer.running():
+            response = await self.get_response(request)
+        if response.streaming:
+            self._time_stream(request, response, timer)
+        else:
+            await sync_to_async(self._save)(request, response, timer)
+        return response
+
+    def _time_stream(self, request, response, timer):
+        """Keep timing while the streamed body is produced and save the record after its last chunk"""
+        content = response.streaming_content
+
+        def timed():
+            iterator = iter(content)
+            try:
+                while True:
+                    with timer.running():
+                        chunk = next(iterator, None)
+                    if chunk is None:
+                        break
+                    yield chunk
+            finally:
+                self._save(request, response, timer)
+
+        async def atimed():
+            iterator = aiter(content)
+            try:
+                while True:
+                    with timer.running():
+                        chunk = await anext(iterator, None)
+                    if chunk is None:
+                        break
+                    yield chunk
+            finally:
+                await sync_to_async(self._save)(request, response, timer)
+
+        response.streaming_content = atimed() if response.is_async else timed()
+
+    def _save(self, request, response, timer):
+        from .models import RequestProfile
+
+        match = request.resolver_match
+        RequestProfile.record(
+            self.max_records,
+            path=request.path[:255],
+            view_name=match.view_name if match else '',
+            method=request.method,
+            status_code=response.status_code,
+            streamed=response.streaming,
+            total_ms=timer.total_ms,
+            db_queries=timer.db_queries,
+            db_ms=timer.db_ms,
+            template_ms=timer.sections[SECTION_TEMPLATE],
+            agent_ms=timer.sections[SECTION_AGENT],
+            serialize_ms=timer.sections[SECTION_SERIALIZE],
+            profile=timer.profile_data(),
+        )
@@ -0,0 +1,171 @@
+"""
+Full-text search for posts.
+
+The backend is chosen from ``POST_SEARCH_BACKEND`` ("auto" by default):
+
+- ``sqlite``: an FTS5 virtual table (``agents_post_fts``) keyed by post id,
+  kept in sync from the Post save/delete signals and ranked with bm25.
+- ``postgres``: ``tsvector``/``tsquery`` ranking via django.contrib.postgres.
+- ``basic``: the original ``icontains`` filters, for any other database.
+
+Every backend's ``search`` takes a Post queryset and returns it filtered to
+matching posts and ordered by relevance.
+"""
+import re
+
+from django.conf import settings
+from django.db import connection
+from django.db.models import Q
+
+FTS_TABLE = "agents_post_fts"
+
+SEARCH_FIELDS = ('title', 'content', 'original_prompt')
+
+
+def fts5_available(conn=None):
+    """Return True if the SQLite library behind ``conn`` was built with FTS5"""
+    conn = conn or connection
+    if conn.vendor != 'sqlite':
+        return False
+    with conn.cursor() as cursor:
+        cursor.execute("SELECT sqlite_compileoption_used('ENABLE_FTS5')")
+        return bool(cursor.fetchone()[0])
+
+
+def create_fts_table(conn):
+    """Create the FTS5 index table if it does not exist yet"""
+    with conn.cursor() as cursor:
+        cursor.execute(
+            f"CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5("
+            " title, content, original_prompt,"
+            " tokenize = 'unicode61 remove_diacritics 2')"
+        )
+
+
+class BasicSearchBackend:
+    """Substring search with icontains (no index, no ranking)"""
+
+    name = 'basic'
+
+    def search(self, queryset, query):
+        return queryset.filter(
+            Q(title__icontains=query) |
+            Q(content__icontains=query) |
+            Q(original_prompt__icontains=query)
+        )
+
+    def index(self, posts):
+        pass
+
+    def remove(self, post_ids):
+        pass
+
+    def rebuild(self):
+        return 0
+
+
+class SQLiteFTSBackend:
+    """SQLite FTS5 index ranked by bm25"""
+
+    name = 'sqlite'
+
+    def match_expression(self, query):
+        # Quote every word so user input can never be parsed as FTS5 syntax; prefix-match like a typeahead
+        words = re.findall(r"\w+", query)
+        return " ".join(f'"{word}"*' for word in words)
+
+    def search(self, queryset, query):
+        match = self.match_expression(query)
+        if not match:
+            return queryset.none()
+        table = queryset.model._meta.db_table
+        # Join the index once rather than re-running MATCH per row for the rank; the unary + stops SQLite
+        # from probing the FTS table once per post, so the match always drives the join
+        return queryset.extra(
+            select={'search_rank': f"{FTS_TABLE}.rank"},
+            tables=[FTS_TABLE],
+            where=[f"+{FTS_TABLE}.rowid = {table}.id", f"{FTS_TABLE} MATCH %s"],
+            params=[match],
+        ).order_by('search_rank', '-created_at')
+
+    def index(self, posts):
+        rows = [(post.id, post.title, post.content, post.original_prompt) for post in posts]
+        if not rows:
+            return
+        with connection.cursor() as cursor:
+            cursor.executemany(f"DELETE FROM {FTS_TABLE} WHERE rowid = %s", [(row[0],) for row in rows])
+            cursor.executemany(
+                f"INSERT INTO {FTS_TABLE} (rowid, title, content, original_prompt) VALUES (%s, %s, %s, %s)", rows
+            )
+
+    def remove(self, post_ids):
+        if not post_ids:
+            return
+        with connection.cursor() as cursor:
+            cursor.executemany(f"DELETE FROM {FTS_TABLE} WHERE rowid = %s", [(post_id,) for post_id in post_ids])
+
+    def rebuild(self):
+        from .models import Post
+
+        create_fts_table(connection)
+        with connection.cursor() as cursor:
+            cursor.execute(f"DELETE FROM {FTS_TABLE}")
+            cursor.execute(
+                f"INSERT INTO {FTS_TABLE} (rowid, title, content, original_prompt)"
+                f" SELECT id, title, content, original_prompt FROM {Post._meta.db_table}"
+            )
+            cursor.execute(f"INSERT INTO {FTS_TABLE} ({FTS_TABLE}) VALUES ('optimize')")
+        return Post.objects.count()
+
+
+class PostgresSearchBackend:
+    """
+    PostgreSQL full-text search ranked with ts_rank.
+    
+    The tsvector is computed in the query; add a GIN expression index on the
+    same vector in production so the match does not scan the table.
+    """
+
+    name = 'postgres'
+
+    def search(self, queryset, query):
+        from django.contrib.postgres.search import SearchQuery, SearchRank, SearchVector
+
+        vector = SearchVector(*SEARCH_FIELDS)
+        search_query = SearchQuery(query, search_type='websearch')
+        return queryset.annotate(
+            search_rank=SearchRank(vector, search_query)
+        ).filter(search_rank__gt=0).order_by('-search_rank', '-created_at')
+
+    def index(self, posts):
+        pass
+
+    def remove(self, post_ids):
+        pass
+
+    def rebuild(self):
+        return 0
+
+
+BACKENDS = {
+    backend.name: backend
+    for backend in (BasicSearchBackend, SQLiteFTSBackend, PostgresSearchBackend)
+}
+
+_backend = None
+
+
+def get_search_backend():
+    """Return the configured search backend, resolving "auto" from the database vendor"""
+    global _backend
+    if _backend is None:
+        name = getattr(settings, 'POST_SEARCH_BACKEND', 'auto')
+        if name == 'auto':
+            if connection.vendor == 'sqlite' and fts5_available():
+                name = 'sqlite'
+            elif connection.vendor == 'postgresql':
+                name = 'postgres'
+            else:
+                name = 'basic'
+        _backend = BACKENDS[name]()
+    return _backend
@@ -0,0 +1,19 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .models import Post
+from .search import get_search_backend
+
+
+@receiver(post_save, sender=Post)
+def index_post(sender, instance, update_fields=None, **kwargs):
+    """Keep the full-text index in sync when a post's text changes"""
+    if update_fields is not None and not set(update_fields) & {'title', 'content', 'original_prompt'}:
+        return
+    get_search_backend().index([instance])
+
+
+@receiver(post_delete, sender=Post)
+def unindex_post(sender, instance, **kwargs):
+    """Remove a deleted post from the full-text index"""
+    get_search_backend().remove([instance.id])
@@ -0,0 +1,132 @@
+import json
+
+from django.contrib.auth.models import User
+from django.contrib.messages import get_messages
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from ..models import Post
+
+
+class BulkViewTestCase(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('writer')
+        self.other = User.objects.create_user('other')
+        self.posts = [self.make_post(self.user, f"Post {i}") for i in range(3)]
+        self.foreign = self.make_post(self.other, "Someone else's post")
+        self.client.force_login(self.user)
+
+    def make_post(self, user, title):
+        return Post.objects.create(title=title, content=title, original_prompt=title, created_by=user)
+
+    def post_json(self, name, data):
+        response = self.client.post(reverse(name), json.dumps(data), content_type='application/json')
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def ids(self, *posts):
+        return [post.id for post in posts]
+
+
+class BulkStatusTests(BulkViewTestCase):
+    def test_updates_only_the_users_posts(self):
+        data = self.post_json('agents:post_bulk_status', {
+            'ids': self.ids(self.posts[0], self.posts[1], self.foreign),
+            'status': 'published',
+        })
+
+        self.assertEqual(data, {'success': True, 'status': 'published', 'updated': 2})
+        statuses = dict(Post.objects.values_list('title', 'status'))
+        self.assertEqual(statuses, {
+            "Post 0": 'published',
+            "Post 1": 'published',
+            "Post 2": 'draft',
+            "Someone else's post": 'draft',
+        })
+
+    def test_invalid_status_is_rejected(self):
+        data = self.post_json('agents:post_bulk_status', {'ids': self.ids(self.posts[0]), 'status': 'deleted'})
+
+        self.assertEqual(data, {'success': False, 'error': "Invalid status"})
+        self.assertFalse(Post.objects.exclude(status='draft').exists())
+
+    def test_empty_selection_is_rejected(self):
+        data = self.post_json('agents:post_bulk_status', {'ids': [], 'status': 'published'})
+
+        self.assertEqual(data, {'success': False, 'error': "Please select at least one post."})
+
+    def test_non_integer_ids_are_rejected(self):
+        data = self.post_json('agents:post_bulk_status', {'ids': ['1; DROP TABLE'], 'status': 'published'})
+
+        self.assertEqual(data, {'success': False, 'error': "Post ids must be integers."})
+
+    @override_settings(BULK_MAX_POSTS=2)
+    def test_selection_is_capped(self):
+        data = self.post_json('agents:post_bulk_status', {'ids': self.ids(*self.posts), 'status': 'published'})
+
+        self.assertEqual(data, {'success': False, 'error': "At most 2 posts can be changed at once."})
+        self.assertFalse(Post.objects.exclude(status='draft').exists())
+
+
+class BulkDeleteTests(BulkViewTestCase):
+    def test_deletes_only_the_users_posts(self):
+        data = self.post_json('agents:post_bulk_delete', {'ids': self.ids(self.posts[0], self.foreign)})
+
+        self.assertEqual(data, {'success': True, 'deleted': 1})
+        self.assertQuerySetEqual(
+            Post.objects.order_by('title').values_list('title', flat=True),
+            ["Post 1", "Post 2", "Someone else's post"],
+        )
+
+    def test_only_foreign_ids_delete_nothing(self):
+        data = self.post_json('agents:post_bulk_delete', {'ids': self.ids(self.foreign)})
+
+        self.assertEqual(data, {'success': True, 'deleted': 0})
+        self.assertTrue(Post.objects.filter(pk=self.foreign.pk).exists())
+
+    def test_empty_selection_is_rejected(self):
+        data = self.post_json('agents:post_bulk_delete', {'ids': []})
+
+        self.assertEqual(data, {'success': False, 'error': "Please select at least one post."})
+        self.assertEqual(Post.objects.count(), 4)
+
+
+class BulkActionFormTests(BulkViewTestCase):
+    def submit(self, **data):
+        return self.client.post(reverse('agents:post_bulk_action'), data)
+
+    def messages(self, response):
+        return [str(message) for message in get_messages(response.wsgi_request)]
+
+    def test_status_change_redirects_to_next(self):
+        next_url = reverse('agents:post_list') + '?status=draft'
+        response = self.submit(action='archived', ids=self.ids(self.posts[0], self.foreign), next=next_url)
+
+        self.assertRedirects(response, next_url, fetch_redirect_response=False)
+        self.assertEqual(self.messages(response), ["1 post archived."])
+        self.assertEqual(Post.objects.get(pk=self.posts[0].pk).status, 'archived')
+        self.assertEqual(Post.objects.get(pk=self.foreign.pk).status, 'draft')
+
+    def test_delete(self):
+        response = self.submit(action='delete', ids=self.ids(*self.posts, self.foreign))
+
+        self.assertEqual(self.messages(response), ["3 posts deleted."])
+        self.assertQuerySetEqual(Post.objects.values_list('pk', flat=True), [self.foreign.pk])
+
+    def test_off_site_next_is_refused(self):
+        response = self.submit(action='published', ids=self.ids(self.posts[0]), next='https://evil.example/')
+
+        self.assertRedirects(response, reverse('agents:post_list'), fetch_redirect_response=False)
+
+    def test_unknown_action_is_rejected(self):
+        response = self.submit(action='purge', ids=self.ids(self.posts[0]))
+
+        self.assertRedirects(response, reverse('agents:post_list'), fetch_redirect_response=False)
+        self.assertEqual(self.messages(response), ["Please choose an action."])
+        self.assertEqual(Post.objects.count(), 4)
+
+    def test_empty_selection_is_rejected(self):
+        response = self.submit(action='published')
+
+        self.assertEqual(self.messages(response), ["Please select at least one post."])
+        self.assertFalse(Post.objects.exclude(status='draft').exists())
@@ -0,0 +1,218 @@
+import asyncio
+import os
+import sqlite3
+import tempfile
+from typing import Dict
+from unittest import mock
+
+from django.test import SimpleTestCase
+from langchain_core.messages import AIMessage, HumanMessage
+from langgraph.checkpoint.base import empty_checkpoint
+from pydantic import Field
+
+from ..agents.checkpoints import ResumableRunError, SQLiteCheckpointSaver
+from ..agents.factory import agent_factory, build_agent_stack
+from ..agents.reflect_agent import aresume_user_request, process_user_request, resume_user_request
+from ..agents.stopping import MaxIterations, StoppingPolicy
+from ..benchmarks.fakes import FakeChatModel, FakeSearchTool
+
+ZSTD_MAGIC = b'\x28\xb5\x2f\xfd'
+
+
+def config(thread_id, checkpoint_id=None):
+    configurable = {'thread_id': thread_id, 'checkpoint_ns': ''}
+    if checkpoint_id:
+        configurable['checkpoint_id'] = checkpoint_id
+    return {'configurable': configurable}
+
+
+def checkpoint_with(messages):
+    checkpoint = empty_checkpoint()
+    checkpoint['channel_values'] = {'__root__': messages}
+    return checkpoint
+
+
+class FakeClock:
+    def __init__(self, now=1_000_000.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+class SQLiteCheckpointSaverTests(SimpleTestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.path = os.path.join(tmp.name, 'checkpoints.sqlite3')
+        self.clock = FakeClock()
+        patcher = mock.patch('agents.agents.checkpoints.time.time', self.clock)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.saver = SQLiteCheckpointSaver(self.path, retention=3600, prune_interval=300)
+
+    def put(self, thread_id, text, parent=None):
+        checkpoint = checkpoint_with([HumanMessage(content="Write a post"), AIMessage(content=text)])
+        return self.saver.put(config(thread_id, parent), checkpoint, {'source': 'loop', 'step': 1}, {})
+
+    def test_put_get_round_trip_is_compressed(self):
+        saved = self.put('thread', "draft " * 200)
+        item = self.saver.get_tuple(config('thread'))
+        self.assertEqual(item.config, saved)
+        self.assertEqual(item.checkpoint['channel_values']['__root__'][1].content, "draft " * 200)
+        self.assertEqual(item.metadata['step'], 1)
+        with sqlite3.connect(self.path) as conn:
+            data, = conn.execute("SELECT checkpoint FROM checkpoints").fetchone()
+        self.assertTrue(data.startswith(ZSTD_MAGIC))
+        self.assertLess(len(data), len("draft " * 200))
+
+    def test_pending_writes_round_trip(self):
+        saved = self.put('thread', "draft")
+        self.saver.put_writes(saved, [('__root__', [AIMessage(content="Feedback: shorter")])], 'task-1')
+        item = self.saver.get_tuple(config('thread'))
+        (task_id, channel, value), = item.pending_writes
+        self.assertEqual((task_id, channel, value[0].content), ('task-1', '__root__', "Feedback: shorter"))
+
+    def test_list_is_newest_first_and_honours_limit_and_before(self):
+        first = self.put('thread', "one")
+        second = self.put('thread', "two", parent=first['configurable']['checkpoint_id'])
+        third = self.put('thread', "three", parent=second['configurable']['checkpoint_id'])
+        self.put('other', "elsewhere")
+
+        items = list(self.saver.list(config('thread')))
+        self.assertEqual([item.config for item in items], [third, second, first])
+        self.assertEqual(items[0].parent_config['configurable']['checkpoint_id'], second['configurable']['checkpoint_id'])
+        self.assertEqual([item.config for item in self.saver.list(config('thread'), limit=2)], [third, second])
+        self.assertEqual([item.config for item in self.saver.list(config('thread'), before=second)], [first])
+        # get_tuple without a checkpoint id returns the latest
+        self.assertEqual(self.saver.get_tuple(config('thread')).config, third)
+
+    def test_async_methods_match_the_sync_ones(self):
+        async def run():
+            saved = await self.saver.aput(config('thread'), checkpoint_with([]), {}, {})
+            item = await self.saver.aget_tuple(config('thread'))
+            listed = [entry async for entry in self.saver.alist(config('thread'))]
+            await self.saver.adelete_thread('thread')
+            return saved, item, listed
+
+        saved, item, listed = asyncio.run(run())
+        self.assertEqual(item.config, saved)
+        self.assertEqual([entry.config for entry in listed], [saved])
+        self.assertFalse(self.saver.has_thread('thread'))
+
+    def test_prune_drops_threads_past_retention(self):
+        self.put('old', "draft")
+        self.clock.now += 3000
+        self.put('recent', "draft")
+        self.clock.now += 601
+        self.assertEqual(self.saver.prune(), 1)
+        self.assertFalse(self.saver.has_thread('old'))
+        self.assertTrue(self.saver.has_thread('recent'))
+
+    def test_a_recent_checkpoint_keeps_the_whole_thread(self):
+        first = self.put('thread', "one")
+        self.clock.now += 3000
+        self.put('thread', "two", parent=first['configurable']['checkpoint_id'])
+        self.clock.now += 601
+        self.assertEqual(self.saver.prune(), 0)
+        self.assertEqual(len(list(self.saver.list(config('thread')))), 2)
+
+    def test_maybe_prune_runs_at_most_once_per_interval(self):
+        with mock.patch.object(self.saver, 'prune') as prune:
+            self.saver.maybe_prune()
+            self.clock.now += 299
+            self.saver.maybe_prune()
+            self.assertEqual(prune.call_count, 1)
+            self.clock.now += 2
+            self.saver.maybe_prune()
+            self.assertEqual(prune.call_count, 2)
+
+
+class FlakyChatModel(FakeChatModel):
+    """Fake model whose critiques fail while ``failures['critiques']`` is above zero"""
+
+    # Shared with the tool-bound copies, like the call counter
+    failures: Dict[str, int] = Field(default_factory=lambda: {'critiques': 0, 'drafts': 0})
+
+    def _respond(self, messages):
+        kind = 'drafts' if self.tools_bound else 'critiques'
+        if self.failures[kind] > 0:
+            self.failures[kind] -= 1
+            raise ConnectionError(f"{kind} upstream is down")
+        return super()._respond(messages)
+
+
+class ResumeTests(SimpleTestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.checkpointer = SQLiteCheckpointSaver(os.path.join(tmp.name, 'checkpoints.sqlite3'))
+        self.llm = FlakyChatModel()
+        stack = build_agent_stack(
+            llm=self.llm,
+            search_tool=FakeSearchTool(),
+            stopping_policy=StoppingPolicy([MaxIterations(2)]),
+            checkpointer=self.checkpointer,
+        )
+        for patcher in (agent_factory.override(stack), mock.patch('agents.agents.reflect_agent.get_singleflight', return_value=None)):
+            patcher.__enter__()
+            self.addCleanup(patcher.__exit__, None, None, None)
+
+    def fail_after_first_draft(self):
+        self.llm.failures['critiques'] = 1
+        with self.assertRaises(ResumableRunError) as raised:
+            process_user_request("Latest Artemis news", thread_id='1-interrupted')
+        self.assertEqual(raised.exception.thread_id, '1-interrupted')
+        self.assertIsInstance(raised.exception.error, ConnectionError)
+        self.assertTrue(self.checkpointer.has_thread('1-interrupted'))
+        return self.llm.calls
+
+    def test_interrupted_run_resumes_from_its_last_node(self):
+        self.fail_after_first_draft()
+        saved = self.checkpointer.get_tuple(config('1-interrupted')).checkpoint['channel_values']['__root__']
+        result = resume_user_request('1-interrupted')
+
+        self.assertEqual(result['iterations'], 2)
+        self.assertEqual(result['stop_reason'], 'max_iterations')
+        # The saved first draft is kept and only the nodes after it run
+        self.assertEqual([step['content'] for step in result['conversation_history'][:2]], [m.content for m in saved])
+        self.assertEqual([node['node'] for node in result['generation_metadata']['nodes']], ['reflect', 'generate'])
+        # Finished runs drop their checkpoints
+        self.assertFalse(self.checkpointer.has_thread('1-interrupted'))
+
+    def test_async_resume(self):
+        self.fail_after_first_draft()
+        result = asyncio.run(aresume_user_request('1-interrupted'))
+        self.assertEqual(result['iterations'], 2)
+        self.assertFalse(self.checkpointer.has_thread('1-interrupted'))
+
+    def test_failing_again_while_resuming_stays_resumable(self):
+        self.fail_after_first_draft()
+        self.llm.failures['critiques'] = 1
+        with self.assertRaises(ResumableRunError) as raised:
+            resume_user_request('1-interrupted')
+        self.assertEqual(raised.exception.thread_id, '1-interrupted')
+        self.assertEqual(resume_user_request('1-interrupted')['iterations'], 2)
+
+    def test_failure_in_the_first_draft_resumes_from_the_input(self):
+        # The graph checkpoints its input before the first node, so even this run can be picked up again
+        self.llm.failures['drafts'] = 1
+        with self.assertRaises(ResumableRunError):
+            process_user_request("Latest Artemis news", thread_id='1-early')
+        result = resume_user_request('1-early')
+        self.assertEqual(result['iterations'], 2)
+        self.assertEqual(result['conversation_history'][0]['content'], "Latest Artemis news")
+
+    def test_errors_are_not_wrapped_without_a_checkpointer(self):
+        with mock.patch.dict(os.environ, {'CHECKPOINT_ENABLED': 'false'}):
+            stack = build_agent_stack(
+                llm=self.llm, search_tool=FakeSearchTool(), stopping_policy=StoppingPolicy([MaxIterations(2)])
+            )
+        self.llm.failures['critiques'] = 1
+        with agent_factory.override(stack), self.assertRaises(ConnectionError) as raised:
+            process_user_request("Latest Artemis news")
+        self.assertNotIsInstance(raised.exception, ResumableRunError)
+
+    def test_unknown_thread_cannot_be_resumed(self):
+        with self.assertRaises(ValueError):
+            resume_user_request('1-missing')
@@ -0,0 +1,117 @@
+import csv
+import io
+import json
+from datetime import datetime, timezone as dt_timezone
+
+from django.contrib.auth.models import User
+from django.test import TestCase
+from django.urls import reverse
+
+from ..export import FIELDS
+from ..models import Post
+
+HISTORY = [{'content': "Latest Artemis news", 'is_feedback': False}]
+
+
+def utc(*args):
+    return datetime(*args, tzinfo=dt_timezone.utc)
+
+
+class ExportViewTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('writer')
+        self.other = User.objects.create_user('other')
+        self.make_post(self.user, "Artemis, crewed", 'published', utc(2024, 5, 1, 9), history=HISTORY)
+        self.make_post(self.user, "Lunar \"Gateway\"\nupdate", 'draft', utc(2024, 5, 2, 23, 59))
+        self.make_post(self.user, "Old news", 'archived', utc(2024, 4, 1))
+        self.make_post(self.other, "Someone else's post", 'draft', utc(2024, 5, 1))
+        self.client.force_login(self.user)
+
+    def make_post(self, user, title, status, created_at, history=None):
+        post = Post(title=title, content=title, original_prompt=title, created_by=user,
+                    status=status, created_at=created_at, generation_metadata={'iterations': 1})
+        if history is not None:
+            post.conversation_history = history
+        post.save()
+        return post
+
+    def export(self, **params):
+        return self.client.get(reverse('agents:post_export'), params)
+
+    def body(self, response):
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        return b''.join(response.streaming_content).decode('utf-8')
+
+    def ndjson(self, **params):
+        response = self.export(format='ndjson', **params)
+        self.assertEqual(response['Content-Type'], "application/x-ndjson; charset=utf-8")
+        return [json.loads(line) for line in self.body(response).splitlines()]
+
+    def csv_rows(self, **params):
+        response = self.export(format='csv', **params)
+        self.assertEqual(response['Content-Type'], "text/csv; charset=utf-8")
+        return list(csv.reader(io.StringIO(self.body(response), newline='')))
+
+    def test_ndjson_has_one_object_per_line_for_the_owners_posts(self):
+        response = self.export()
+        self.assertRegex(response['Content-Disposition'], r'^attachment; filename="posts-\d{8}-\d{6}\.ndjson"$')
+
+        rows = self.ndjson()
+        self.assertEqual([row['title'] for row in rows],
+                         ["Old news", "Artemis, crewed", "Lunar \"Gateway\"\nupdate"])
+        self.assertEqual(list(rows[0]), FIELDS)
+        self.assertEqual(rows[1]['status'], 'published')
+        self.assertEqual(rows[1]['generation_metadata'], {'iterations': 1})
+        self.assertEqual(rows[1]['created_at'], "2024-05-01T09:00:00Z")
+
+    def test_ndjson_includes_history_on_request(self):
+        rows = self.ndjson(history='1')
+
+        self.assertEqual(rows[1]['conversation_history'], HISTORY)
+        self.assertEqual(rows[0]['conversation_history'], [])
+
+    def test_csv_has_a_header_row_and_one_row_per_post(self):
+        header, *rows = self.csv_rows()
+
+        self.assertEqual(header, FIELDS)
+        self.assertEqual(len(rows), 3)
+        records = [dict(zip(header, row)) for row in rows]
+        self.assertEqual(records[2]['title'], "Lunar \"Gateway\"\nupdate")
+        self.assertEqual(records[1]['created_at'], "2024-05-01T09:00:00+00:00")
+        self.assertEqual(json.loads(records[1]['generation_metadata']), {'iterations': 1})
+
+    def test_csv_history_column(self):
+        header, *rows = self.csv_rows(history='true')
+
+        self.assertEqual(header, FIELDS + ['conversation_history'])
+        self.assertEqual(json.loads(rows[1][-1]), HISTORY)
+
+    def test_filters_by_status(self):
+        self.assertEqual([row['title'] for row in self.ndjson(status='draft')], ["Lunar \"Gateway\"\nupdate"])
+
+    def test_filters_by_date_range_covering_whole_days(self):
+        rows = self.ndjson(since='2024-05-01', until='2024-05-02')
+        self.assertEqual([row['title'] for row in rows], ["Artemis, crewed", "Lunar \"Gateway\"\nupdate"])
+
+        rows = self.ndjson(until='2024-05-01T12:00:00Z')
+        self.assertEqual([row['title'] for row in rows], ["Old news", "Artemis, crewed"])
+
+    def test_unknown_format_is_rejected(self):
+        response = self.export(format='xlsx')
+
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("Unsupported export format", response.json()['error'])
+
+    def test_invalid_status_is_rejected(self):
+        response = self.export(status='deleted')
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json(), {'success': False, 'error': "Invalid status: 'deleted'"})
+
+    def test_invalid_date_is_rejected(self):
+        for value in ['last tuesday', '2024-13-01']:
+            response = self.export(since=value)
+
+            self.assertEqual(response.status_code, 400)
+            self.assertIn("Invalid date", response.json()['error'])
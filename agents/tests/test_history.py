@@ -0,0 +1,16 @@
+from django.test import SimpleTestCase
+
+from ..history import pack_history, unpack_history
+
+
+class HistoryStorageTests(SimpleTestCase):
+    def test_pack_unpack_round_trip(self):
+        history = [
+            {'content': "Écrire un post sur Artemis 🚀", 'is_feedback': False},
+            {'content': "Feedback: add a source", 'is_feedback': True},
+        ]
+        self.assertEqual(unpack_history(pack_history(history)), history)
+
+    def test_unpack_accepts_memoryview(self):
+        # Database drivers hand BinaryField values back as memoryview
+        self.assertEqual(unpack_history(memoryview(pack_history([]))), [])
@@ -0,0 +1,20 @@
+from django.test import SimpleTestCase
+
+from ..agents.instrumentation import percentile
+
+
+class PercentileTests(SimpleTestCase):
+    def test_nearest_rank(self):
+        values = [35, 20, 50, 15, 40]
+        self.assertEqual(percentile(values, 0), 15)
+        self.assertEqual(percentile(values, 30), 20)
+        self.assertEqual(percentile(values, 40), 20)
+        self.assertEqual(percentile(values, 50), 35)
+        self.assertEqual(percentile(values, 100), 50)
+
+    def test_p95_of_small_samples_is_the_maximum(self):
+        self.assertEqual(percentile(list(range(1, 11)), 95), 10)
+        self.assertEqual(percentile([7], 95), 7)
+
+    def test_empty(self):
+        self.assertIsNone(percentile([], 50))
@@ -0,0 +1,146 @@
+import json
+from datetime import timedelta
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from .. import jobs
+from ..models import GenerationJob
+
+RESULT = {
+    'final_post': "Artemis II is go.",
+    'conversation_history': [{'content': "Latest Artemis news", 'is_feedback': False}],
+    'generation_metadata': {'iterations': 1},
+    'iterations': 1,
+    'stop_reason': 'max_iterations',
+    'raw_response': object(),
+}
+
+
+class RunJobTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('writer')
+        self.job = GenerationJob.objects.create(prompt="Latest Artemis news", created_by=self.user)
+
+    def test_successful_run_stores_the_result(self):
+        runner = mock.Mock(return_value=RESULT)
+        jobs.run_job(self.job.id, runner)
+
+        runner.assert_called_once_with("Latest Artemis news")
+        self.job.refresh_from_db()
+        self.assertEqual(self.job.status, 'succeeded')
+        self.assertEqual(self.job.result['final_post'], "Artemis II is go.")
+        self.assertEqual(self.job.result['stop_reason'], 'max_iterations')
+        self.assertNotIn('raw_response', self.job.result)
+        self.assertIsNotNone(self.job.started_at)
+        self.assertIsNotNone(self.job.finished_at)
+
+    def test_failed_run_stores_the_error(self):
+        with self.assertLogs('agents.jobs', 'ERROR'):
+            jobs.run_job(self.job.id, mock.Mock(side_effect=RuntimeError("LLM unavailable")))
+        self.job.refresh_from_db()
+        self.assertEqual(self.job.status, 'failed')
+        self.assertEqual(self.job.error, "LLM unavailable")
+        self.assertIsNone(self.job.result)
+        self.assertIsNotNone(self.job.finished_at)
+
+    def test_a_job_only_runs_once(self):
+        runner = mock.Mock(return_value=RESULT)
+        jobs.run_job(self.job.id, runner)
+        jobs.run_job(self.job.id, runner)
+        self.assertEqual(runner.call_count, 1)
+
+    def test_a_running_job_is_not_started_again(self):
+        GenerationJob.objects.filter(id=self.job.id).update(status='running', started_at=timezone.now())
+        runner = mock.Mock(return_value=RESULT)
+        jobs.run_job(self.job.id, runner)
+        runner.assert_not_called()
+        self.job.refresh_from_db()
+        self.assertEqual(self.job.status, 'running')
+
+
+@override_settings(GENERATION_JOB_TIMEOUT=60)
+class StaleJobTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('writer')
+        now = timezone.now()
+        self.old = now - timedelta(seconds=61)
+        self.recent = now - timedelta(seconds=30)
+
+    def job(self, status, created_at, started_at=None):
+        return GenerationJob.objects.create(
+            prompt="p", created_by=self.user, status=status, created_at=created_at, started_at=started_at
+        )
+
+    def test_jobs_queued_or_running_past_the_timeout_fail(self):
+        lost_queued = self.job('queued', self.old)
+        lost_running = self.job('running', self.old, started_at=self.old)
+        waiting = self.job('queued', self.recent)
+        # A running job's clock starts when it was picked up
+        running = self.job('running', self.old, started_at=self.recent)
+        finished = self.job('succeeded', self.old, started_at=self.old)
+
+        self.assertEqual(jobs.fail_stale_jobs(), 2)
+        statuses = {job.id: job.status for job in GenerationJob.objects.all()}
+        self.assertEqual(statuses[lost_queued.id], 'failed')
+        self.assertEqual(statuses[lost_running.id], 'failed')
+        self.assertEqual(statuses[waiting.id], 'queued')
+        self.assertEqual(statuses[running.id], 'running')
+        self.assertEqual(statuses[finished.id], 'succeeded')
+        self.assertIn("restarted", GenerationJob.objects.get(id=lost_queued.id).error)
+
+    def test_only_the_given_jobs_are_checked(self):
+        target = self.job('queued', self.old)
+        other = self.job('queued', self.old)
+        self.assertEqual(jobs.fail_stale_jobs(GenerationJob.objects.filter(id=target.id)), 1)
+        self.assertEqual(GenerationJob.objects.get(id=other.id).status, 'queued')
+
+    def test_a_job_failed_as_stale_is_not_run(self):
+        job = self.job('queued', self.old)
+        jobs.fail_stale_jobs()
+        runner = mock.Mock(return_value=RESULT)
+        jobs.run_job(job.id, runner)
+        runner.assert_not_called()
+
+
+@override_settings(GENERATION_JOB_TIMEOUT=60)
+class JobViewTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('writer')
+        self.other = User.objects.create_user('other')
+        self.job = GenerationJob.objects.create(prompt="Latest Artemis news", created_by=self.user)
+        self.client.force_login(self.user)
+
+    def test_submit_queues_a_job(self):
+        with mock.patch.object(jobs, 'enqueue') as enqueue:
+            response = self.client.post(
+                reverse('agents:submit_job'), json.dumps({'prompt': "Mars sample return"}), content_type='application/json'
+            )
+        self.assertEqual(response.status_code, 202)
+        job = GenerationJob.objects.get(id=response.json()['job_id'])
+        self.assertEqual((job.prompt, job.created_by, job.status), ("Mars sample return", self.user, 'queued'))
+        enqueue.assert_called_once()
+
+    def test_owner_sees_the_job_status(self):
+        response = self.client.get(reverse('agents:job_status', args=[self.job.id]))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['job']['status'], 'queued')
+
+    def test_other_users_cannot_see_the_job(self):
+        self.client.force_login(self.other)
+        self.assertEqual(self.client.get(reverse('agents:job_status', args=[self.job.id])).status_code, 404)
+        self.assertEqual(self.client.get(reverse('agents:job_result', args=[self.job.id])).status_code, 404)
+
+    def test_status_reports_a_lost_job_as_failed(self):
+        GenerationJob.objects.filter(id=self.job.id).update(created_at=timezone.now() - timedelta(seconds=61))
+        response = self.client.get(reverse('agents:job_status', args=[self.job.id]))
+        self.assertEqual(response.json()['job']['status'], 'failed')
+
+    def test_result_page_of_a_finished_job(self):
+        jobs.run_job(self.job.id, mock.Mock(return_value=RESULT))
+        response = self.client.get(reverse('agents:job_result', args=[self.job.id]))
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, "Artemis II is go.")
@@ -0,0 +1,96 @@
+import json
+import os
+import tempfile
+from unittest import mock
+
+from django.test import SimpleTestCase
+from langchain_core.messages import AIMessage, HumanMessage
+from langchain_core.outputs import ChatGeneration
+
+from ..agents.llm_cache import SQLiteLLMCache, bypass_llm_cache
+from ..benchmarks.fakes import FakeChatModel
+
+
+def llm_string(model="gpt-4o", temperature=0):
+    return json.dumps({'lc': 1, 'kwargs': {'model_name': model, 'temperature': temperature}}) + "---[('stop', None)]"
+
+
+def generations(text):
+    return [ChatGeneration(message=AIMessage(content=text))]
+
+
+class FakeClock:
+    def __init__(self, now=1_000_000.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+class SQLiteLLMCacheTests(SimpleTestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.path = os.path.join(tmp.name, 'llm_cache.sqlite3')
+        self.clock = FakeClock()
+        patcher = mock.patch('agents.agents.llm_cache.time.time', self.clock)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_identical_prompt_hits(self):
+        cache = SQLiteLLMCache(self.path)
+        cache.update("prompt", llm_string(), generations("cached answer"))
+        hit = cache.lookup("prompt", llm_string())
+        self.assertEqual(hit[0].message.content, "cached answer")
+        self.assertEqual(cache.stats()['hits'], 1)
+
+    def test_different_prompt_or_params_miss(self):
+        cache = SQLiteLLMCache(self.path)
+        cache.update("prompt", llm_string(), generations("cached answer"))
+        self.assertIsNone(cache.lookup("another prompt", llm_string()))
+        self.assertIsNone(cache.lookup("prompt", llm_string(model="gpt-4o-mini")))
+        self.assertIsNone(cache.lookup("prompt", llm_string(temperature=0.3)))
+        self.assertEqual(cache.stats()['misses'], 3)
+
+    def test_sampled_responses_expire_after_the_ttl(self):
+        cache = SQLiteLLMCache(self.path, sampled_ttl=60)
+        cache.update("sampled", llm_string(temperature=0.7), generations("variation"))
+        cache.update("deterministic", llm_string(temperature=0), generations("fixed"))
+        self.clock.now += 59
+        self.assertIsNotNone(cache.lookup("sampled", llm_string(temperature=0.7)))
+        self.clock.now += 2
+        self.assertIsNone(cache.lookup("sampled", llm_string(temperature=0.7)))
+        self.assertIsNotNone(cache.lookup("deterministic", llm_string(temperature=0)))
+        self.assertEqual(cache.stats()['sampled_entries'], 0)
+
+    def test_least_recently_used_entries_are_evicted_over_max_bytes(self):
+        cache = SQLiteLLMCache(self.path)
+        cache.update("a", llm_string(), generations("answer a"))
+        cache.max_bytes = cache.stats()['bytes'] * 2
+        self.clock.now += 1
+        cache.update("b", llm_string(), generations("answer b"))
+        self.clock.now += 1
+        cache.lookup("a", llm_string())
+        self.clock.now += 1
+        cache.update("c", llm_string(), generations("answer c"))
+
+        self.assertEqual(cache.stats()['entries'], 2)
+        self.assertIsNone(cache.lookup("b", llm_string()))
+        self.assertIsNotNone(cache.lookup("a", llm_string()))
+        self.assertIsNotNone(cache.lookup("c", llm_string()))
+
+    def test_bypass_skips_lookups_but_still_stores(self):
+        cache = SQLiteLLMCache(self.path)
+        cache.update("prompt", llm_string(), generations("old"))
+        with bypass_llm_cache():
+            self.assertIsNone(cache.lookup("prompt", llm_string()))
+            cache.update("prompt", llm_string(), generations("fresh"))
+        self.assertEqual(cache.lookup("prompt", llm_string())[0].message.content, "fresh")
+        self.assertEqual(cache.stats()['bypassed'], 1)
+
+    def test_chat_model_serves_repeated_prompts_from_the_cache(self):
+        model = FakeChatModel(cache=SQLiteLLMCache(self.path))
+        first = model.invoke([HumanMessage(content="Write a post")])
+        second = model.invoke([HumanMessage(content="Write a post")])
+        self.assertEqual(second.content, first.content)
+        self.assertEqual(model.calls, 1)
@@ -0,0 +1,75 @@
+from datetime import timedelta
+
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from ..models import Post
+from ..pagination import decode_cursor, encode_cursor, keyset_paginate
+
+
+class CursorPaginationTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('writer')
+        now = timezone.now()
+        # Pairs of posts share a timestamp, so the id has to break the ties
+        self.posts = [
+            Post.objects.create(
+                title=f"Post {i}", content="content", original_prompt="prompt",
+                created_by=self.user, created_at=now - timedelta(minutes=i // 2),
+            )
+            for i in range(7)
+        ]
+
+    def test_cursor_round_trip(self):
+        post = self.posts[3]
+        self.assertEqual(decode_cursor(encode_cursor(post)), (post.created_at, post.id))
+
+    def test_malformed_cursor_decodes_to_none(self):
+        for cursor in ('', None, 'not-a-cursor', encode_cursor(self.posts[0])[:-3]):
+            self.assertIsNone(decode_cursor(cursor))
+
+    def test_pages_cover_every_post_once_in_order(self):
+        queryset = Post.objects.filter(created_by=self.user)
+        seen, cursor = [], None
+        while True:
+            page = keyset_paginate(queryset, after=cursor, per_page=3)
+            seen.extend(post.id for post in page)
+            if not page.has_next():
+                break
+            cursor = page.next_cursor
+        expected = list(queryset.order_by('-created_at', '-id').values_list('id', flat=True))
+        self.assertEqual(seen, expected)
+
+    def test_before_cursor_returns_the_newer_page(self):
+        queryset = Post.objects.filter(created_by=self.user)
+        first = keyset_paginate(queryset, per_page=3)
+        second = keyset_paginate(queryset, after=first.next_cursor, per_page=3)
+        back = keyset_paginate(queryset, before=second.previous_cursor, per_page=3)
+        self.assertEqual([post.id for post in back], [post.id for post in first])
+        self.assertTrue(second.has_previous())
+
+
+class StatusCountTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('writer')
+        other = User.objects.create_user('other')
+        for status in ('draft', 'draft', 'published'):
+            Post.objects.create(title="t", content="c", original_prompt="p", created_by=self.user, status=status)
+        Post.objects.create(title="t", content="c", original_prompt="p", created_by=other, status='archived')
+        self.client.force_login(self.user)
+
+    def test_counts_are_exact_and_per_user(self):
+        self.assertEqual(Post.status_counts(self.user), {'draft': 2, 'published': 1, 'archived': 0})
+
+    def test_post_list_runs_one_grouped_count_and_no_page_count(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse('agents:post_list'))
+        self.assertEqual(response.status_code, 200)
+        counts = [query['sql'] for query in queries.captured_queries if 'COUNT(' in query['sql'].upper()]
+        self.assertEqual(len(counts), 1, counts)
+        self.assertIn('GROUP BY', counts[0].upper())
+        self.assertEqual(response.context['total_posts'], 3)
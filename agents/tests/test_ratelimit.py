@@ -0,0 +1,21 @@
+import asyncio
+
+from django.test import SimpleTestCase
+from langchain_core.messages import HumanMessage
+
+from ..agents.ratelimit import ChatRateLimiter, RateLimiter, TokenMeteredChatMixin
+from ..benchmarks.fakes import FakeChatModel
+
+
+class MeteredFakeChatModel(TokenMeteredChatMixin, FakeChatModel):
+    pass
+
+
+class TokenMeteringTests(SimpleTestCase):
+    def test_async_call_debits_tokens_per_minute(self):
+        limiter = RateLimiter('test-llm', requests_per_minute=0, tokens_per_minute=1000)
+        # A tool-bound fake asks for a search first, reporting 10 tokens of usage
+        model = MeteredFakeChatModel(rate_limiter=ChatRateLimiter(limiter), tools_bound=True)
+        asyncio.run(model.ainvoke([HumanMessage(content="Write a post")]))
+        self.assertAlmostEqual(limiter.tokens._tokens, 990, delta=1)
+        self.assertEqual(limiter.stats()['admitted'], 1)
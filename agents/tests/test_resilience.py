@@ -0,0 +1,166 @@
+import asyncio
+import time
+from typing import Any, List
+
+import httpx
+import openai
+from django.test import SimpleTestCase
+from langchain_core.messages import AIMessage, HumanMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+from pydantic import Field
+
+from ..agents.instrumentation import record_run
+from ..agents.resilience import ResilientChatMixin, ResiliencePolicy, RunDeadlineExceeded
+from ..benchmarks.fakes import FakeChatModel
+
+PROMPT = [HumanMessage(content="Write a post")]
+
+
+def connection_error():
+    return openai.APIConnectionError(request=httpx.Request('POST', 'https://api.openai.com/v1/chat/completions'))
+
+
+class ScriptedChatModel(FakeChatModel):
+    """Fake model whose n-th call sleeps and then answers or fails as ``steps[n]`` says (the last step repeats)"""
+
+    steps: List[Any] = Field(default_factory=list)
+    timeouts: List[float] = Field(default_factory=list)
+
+    def _step(self, timeout):
+        index = self.counter.increment() - 1
+        self.timeouts.append(timeout)
+        return self.steps[min(index, len(self.steps) - 1)]
+
+    @staticmethod
+    def _outcome(outcome):
+        if isinstance(outcome, BaseException):
+            raise outcome
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content=outcome))])
+
+    def _generate(self, messages, stop=None, run_manager=None, timeout=None, **kwargs):
+        delay, outcome = self._step(timeout)
+        time.sleep(delay)
+        return self._outcome(outcome)
+
+    async def _agenerate(self, messages, stop=None, run_manager=None, timeout=None, **kwargs):
+        delay, outcome = self._step(timeout)
+        await asyncio.sleep(delay)
+        return self._outcome(outcome)
+
+
+class ResilientScriptedChatModel(ResilientChatMixin, ScriptedChatModel):
+    pass
+
+
+def policy(**kwargs):
+    return ResiliencePolicy(**{'call_timeout': 5, 'run_timeout': 30, 'backoff_base': 0.001, 'backoff_max': 0.01, **kwargs})
+
+
+def hedging_policy():
+    resilience = policy(hedging=True, hedge_min_samples=5)
+    for _ in range(5):
+        resilience._observe(0.02)
+    return resilience
+
+
+class RetryTests(SimpleTestCase):
+    def test_transient_failures_are_retried_until_a_call_succeeds(self):
+        model = ResilientScriptedChatModel(
+            resilience=policy(max_retries=3),
+            steps=[(0, connection_error()), (0, connection_error()), (0, "recovered")],
+        )
+        with record_run('fake') as recorder:
+            self.assertEqual(model.invoke(PROMPT).content, "recovered")
+        self.assertEqual(model.calls, 3)
+        self.assertEqual(recorder.events, {'retries': 2})
+        # Each attempt gets the call deadline as its request timeout
+        self.assertEqual(model.timeouts, [5, 5, 5])
+
+    def test_the_last_error_is_raised_once_retries_run_out(self):
+        model = ResilientScriptedChatModel(resilience=policy(max_retries=1), steps=[(0, connection_error())])
+        with record_run('fake') as recorder, self.assertRaises(openai.APIConnectionError):
+            model.invoke(PROMPT)
+        self.assertEqual(model.calls, 2)
+        self.assertEqual(recorder.events, {'retries': 1})
+
+    def test_non_transient_errors_are_not_retried(self):
+        model = ResilientScriptedChatModel(resilience=policy(), steps=[(0, ValueError("bad request"))])
+        with self.assertRaises(ValueError):
+            model.invoke(PROMPT)
+        self.assertEqual(model.calls, 1)
+
+    def test_async_call_past_its_deadline_times_out_and_is_retried(self):
+        model = ResilientScriptedChatModel(
+            resilience=policy(call_timeout=0.05), steps=[(1, "too late"), (0, "in time")]
+        )
+
+        async def run():
+            with record_run('fake') as recorder:
+                return (await model.ainvoke(PROMPT)).content, recorder.events
+
+        content, events = asyncio.run(run())
+        self.assertEqual(content, "in time")
+        self.assertEqual(events, {'timeouts': 1, 'retries': 1})
+
+
+class RunDeadlineTests(SimpleTestCase):
+    def test_deadline_exceeded_once_the_run_budget_is_spent(self):
+        resilience = policy(run_timeout=0.2, max_retries=50, backoff_base=0.02, backoff_max=0.02)
+        model = ResilientScriptedChatModel(resilience=resilience, steps=[(0.05, connection_error())])
+        with record_run('fake') as recorder, resilience.run_deadline(), self.assertRaises(RunDeadlineExceeded):
+            model.invoke(PROMPT)
+        self.assertEqual(recorder.events['deadline_exceeded'], 1)
+        self.assertLess(model.calls, 51)
+        # Later calls only get what is left of the run's budget
+        self.assertLess(model.timeouts[-1], model.timeouts[0])
+        self.assertLessEqual(model.timeouts[0], 0.2)
+
+    def test_async_deadline_exceeded(self):
+        resilience = policy(run_timeout=0.2, max_retries=50, backoff_base=0.02, backoff_max=0.02)
+        model = ResilientScriptedChatModel(resilience=resilience, steps=[(0.05, connection_error())])
+
+        async def run():
+            with record_run('fake') as recorder, resilience.run_deadline():
+                with self.assertRaises(RunDeadlineExceeded):
+                    await model.ainvoke(PROMPT)
+            return recorder.events
+
+        self.assertEqual(asyncio.run(run())['deadline_exceeded'], 1)
+
+
+class HedgingTests(SimpleTestCase):
+    def test_no_hedging_until_enough_latencies_are_observed(self):
+        resilience = policy(hedging=True, hedge_min_samples=5)
+        self.assertIsNone(resilience.hedge_delay())
+        for _ in range(5):
+            resilience._observe(0.02)
+        self.assertEqual(resilience.hedge_delay(), 0.02)
+
+    def test_hedge_fires_after_p95_and_the_faster_answer_wins(self):
+        model = ResilientScriptedChatModel(resilience=hedging_policy(), steps=[(1, "slow"), (0, "fast")])
+        started = time.perf_counter()
+        with record_run('fake') as recorder:
+            self.assertEqual(model.invoke(PROMPT).content, "fast")
+        self.assertLess(time.perf_counter() - started, 0.5)
+        self.assertEqual(model.calls, 2)
+        self.assertEqual(recorder.events, {'hedges': 1, 'hedge_wins': 1})
+
+    def test_fast_first_call_is_not_hedged(self):
+        model = ResilientScriptedChatModel(resilience=hedging_policy(), steps=[(0, "fast")])
+        with record_run('fake') as recorder:
+            self.assertEqual(model.invoke(PROMPT).content, "fast")
+        self.assertEqual(model.calls, 1)
+        self.assertEqual(recorder.events, {})
+
+    def test_async_hedge_wins_and_the_slow_call_is_cancelled(self):
+        model = ResilientScriptedChatModel(resilience=hedging_policy(), steps=[(1, "slow"), (0, "fast")])
+
+        async def run():
+            with record_run('fake') as recorder:
+                return (await model.ainvoke(PROMPT)).content, recorder.events
+
+        started = time.perf_counter()
+        content, events = asyncio.run(run())
+        self.assertEqual(content, "fast")
+        self.assertLess(time.perf_counter() - started, 0.5)
+        self.assertEqual(events, {'hedges': 1, 'hedge_wins': 1})
@@ -0,0 +1,100 @@
+from unittest import skipUnless
+
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test import TestCase
+
+from ..models import Post
+from ..search import FTS_TABLE, SQLiteFTSBackend, fts5_available, get_search_backend
+
+
+def indexed_ids():
+    with connection.cursor() as cursor:
+        cursor.execute(f"SELECT rowid FROM {FTS_TABLE} ORDER BY rowid")
+        return [row[0] for row in cursor.fetchall()]
+
+
+@skipUnless(fts5_available(), "SQLite FTS5 is not available")
+class SQLiteFTSBackendTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('writer')
+        self.backend = SQLiteFTSBackend()
+
+    def post(self, title, content, prompt="space news"):
+        return Post.objects.create(title=title, content=content, original_prompt=prompt, created_by=self.user)
+
+    def search(self, query):
+        return [post.title for post in self.backend.search(Post.objects.filter(created_by=self.user), query)]
+
+    def test_prefix_and_multiple_terms(self):
+        self.post("Artemis crew", "Four astronauts will fly around the Moon.")
+        self.post("Mars rover", "Perseverance drills a new sample on Mars.")
+        self.post("Artemis delays", "The heat shield needs more testing before launch.")
+
+        self.assertEqual(set(self.search("arte")), {"Artemis crew", "Artemis delays"})
+        # Every word has to match
+        self.assertEqual(self.search("artemis astronauts"), ["Artemis crew"])
+        self.assertEqual(self.search("artemis perseverance"), [])
+
+    def test_fts_syntax_in_the_query_is_taken_literally(self):
+        self.post("Artemis crew", "Four astronauts will fly around the Moon.")
+        self.post("Mars rover", "Perseverance drills a new sample.")
+
+        self.assertEqual(self.backend.match_expression('artemis" OR *'), '"artemis"* "OR"*')
+        # OR is a search word here, not an operator, so the Mars post does not match
+        self.assertEqual(self.search("artemis OR mars"), [])
+        # Likewise NEAR and column filters are plain words that no post contains
+        self.assertEqual(self.search("NEAR(artemis moon)"), [])
+        self.assertEqual(self.search("title:artemis"), [])
+        for query in ('"artemis', 'artemis*', '(artemis moon)', '{artemis}', '-artemis', '^artemis', 'artemis: "moon'):
+            self.assertEqual(self.search(query), ["Artemis crew"], query)
+        self.assertEqual(self.search('"*()'), [])
+
+    def test_results_are_ordered_by_bm25(self):
+        self.post("Launch roundup", "Rockets, satellites and a brief mention of Artemis among many other missions.")
+        self.post("Artemis", "Artemis Artemis: everything about Artemis.")
+        self.post("Weekly space notes", "Artemis news and other stories from the week.")
+
+        self.assertEqual(self.search("artemis")[0], "Artemis")
+        self.assertEqual(self.search("artemis")[-1], "Launch roundup")
+
+    def test_prompt_text_is_searched(self):
+        self.post("Untitled", "A post.", prompt="Summarize the Europa Clipper launch")
+        self.assertEqual(self.search("europa"), ["Untitled"])
+
+
+@skipUnless(fts5_available() and get_search_backend().name == 'sqlite', "the SQLite FTS5 backend is not in use")
+class SearchIndexSignalTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('writer')
+
+    def search(self, query):
+        return list(get_search_backend().search(Post.objects.all(), query))
+
+    def test_saving_a_post_indexes_it(self):
+        post = Post.objects.create(title="Europa", content="Clipper arrives.", original_prompt="p", created_by=self.user)
+        self.assertEqual(indexed_ids(), [post.id])
+        self.assertEqual(self.search("clipper"), [post])
+
+    def test_editing_a_post_updates_the_index(self):
+        post = Post.objects.create(title="Europa", content="Clipper arrives.", original_prompt="p", created_by=self.user)
+        post.content = "Juice flies by Venus."
+        post.save()
+        self.assertEqual(self.search("clipper"), [])
+        self.assertEqual(self.search("venus"), [post])
+        self.assertEqual(indexed_ids(), [post.id])
+
+    def test_status_only_saves_leave_the_index_alone(self):
+        post = Post.objects.create(title="Europa", content="Clipper arrives.", original_prompt="p", created_by=self.user)
+        with connection.cursor() as cursor:
+            cursor.execute(f"DELETE FROM {FTS_TABLE}")
+        post.status = 'published'
+        post.save(update_fields=['status'])
+        self.assertEqual(indexed_ids(), [])
+
+    def test_deleting_a_post_removes_it_from_the_index(self):
+        post = Post.objects.create(title="Europa", content="Clipper arrives.", original_prompt="p", created_by=self.user)
+        kept = Post.objects.create(title="Mars", content="Sample return.", original_prompt="p", created_by=self.user)
+        post.delete()
+        self.assertEqual(indexed_ids(), [kept.id])
+        self.assertEqual(self.search("clipper"), [])
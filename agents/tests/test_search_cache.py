@@ -0,0 +1,133 @@
+import asyncio
+import os
+import tempfile
+import threading
+from unittest import mock
+
+from django.test import SimpleTestCase
+
+from ..agents.search_cache import CachedSearchTool, SearchCache, normalize_query
+from ..benchmarks.fakes import FakeSearchTool
+
+
+class CountingSearchTool(FakeSearchTool):
+    """Fake search that counts its calls and can fail the way the Tavily tool does"""
+
+    calls: int = 0
+    fail: bool = False
+
+    def _results(self, query):
+        self.calls += 1
+        if self.fail:
+            # TavilySearchResults reports errors as (repr(error), {}) instead of raising
+            return repr(ConnectionError("Tavily is down")), {}
+        return super()._results(query)
+
+
+class FakeClock:
+    def __init__(self, now=1_000_000.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+class SearchCacheTests(SimpleTestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.path = os.path.join(tmp.name, 'search_cache.sqlite3')
+        self.clock = FakeClock()
+        patcher = mock.patch('agents.agents.search_cache.time.time', self.clock)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_entries_expire_after_the_ttl(self):
+        cache = SearchCache(ttl=60)
+        cache.set('key', ['content'])
+        self.clock.now += 59
+        self.assertEqual(cache.get('key'), ['content'])
+        self.clock.now += 2
+        self.assertIsNone(cache.get('key'))
+        self.assertEqual(cache.stats()['misses'], 1)
+
+    def test_least_recently_used_entry_is_evicted_at_max_entries(self):
+        cache = SearchCache(max_entries=2)
+        cache.set('a', 1)
+        cache.set('b', 2)
+        cache.get('a')
+        cache.set('c', 3)
+        self.assertIsNone(cache.get('b'))
+        self.assertEqual((cache.get('a'), cache.get('c')), (1, 3))
+        self.assertEqual(cache.stats()['evictions'], 1)
+
+    def test_new_instance_reads_the_sqlite_tier(self):
+        SearchCache(ttl=60, path=self.path).set('key', {'results': [1, 2]})
+        cache = SearchCache(ttl=60, path=self.path)
+        self.assertEqual(cache.get('key'), {'results': [1, 2]})
+        self.assertEqual(cache.stats()['disk_hits'], 1)
+        # The disk hit is promoted to the memory tier
+        self.assertEqual(cache.get('key'), {'results': [1, 2]})
+        self.assertEqual(cache.stats()['hits'], 1)
+
+    def test_expired_sqlite_entries_are_not_served(self):
+        SearchCache(ttl=60, path=self.path).set('key', 'value')
+        self.clock.now += 61
+        self.assertIsNone(SearchCache(ttl=60, path=self.path).get('key'))
+
+    def test_async_access_runs_the_sqlite_tier_off_the_event_loop(self):
+        cache = SearchCache(path=self.path)
+        threads = []
+        get = cache.get
+
+        def recording_get(key):
+            threads.append(threading.get_ident())
+            return get(key)
+
+        async def lookup():
+            await cache.aset('key', 'value')
+            return await cache.aget('key')
+
+        with mock.patch.object(cache, 'get', recording_get):
+            self.assertEqual(asyncio.run(lookup()), 'value')
+        self.assertNotIn(threading.get_ident(), threads)
+
+
+class NormalizeQueryTests(SimpleTestCase):
+    def test_case_and_whitespace_variants_share_a_key(self):
+        variants = ["Latest Artemis news", "  latest   ARTEMIS\tnews ", "latest artemis news?"]
+        self.assertEqual({normalize_query(query) for query in variants}, {"latest artemis news"})
+
+
+class CachedSearchToolTests(SimpleTestCase):
+    def setUp(self):
+        self.search = CountingSearchTool()
+        self.tool = CachedSearchTool.wrap(self.search, SearchCache())
+
+    def test_keeps_the_wrapped_tool_interface(self):
+        self.assertEqual(self.tool.name, self.search.name)
+        self.assertIs(self.tool.args_schema, self.search.args_schema)
+
+    def test_equivalent_queries_hit_the_cache(self):
+        first = self.tool._run("Latest Artemis news")
+        second = self.tool._run("latest  artemis NEWS")
+        self.assertEqual(second, first)
+        self.assertEqual(self.search.calls, 1)
+
+    def test_failed_search_is_not_cached(self):
+        self.search.fail = True
+        content, artifact = self.tool._run("artemis")
+        self.assertEqual(artifact, {})
+        self.assertIn("Tavily is down", content)
+        self.search.fail = False
+        self.tool._run("artemis")
+        self.tool._run("artemis")
+        self.assertEqual(self.search.calls, 2)
+
+    def test_failed_async_search_is_not_cached(self):
+        self.search.fail = True
+        self.assertEqual(asyncio.run(self.tool._arun("artemis"))[1], {})
+        self.search.fail = False
+        asyncio.run(self.tool._arun("artemis"))
+        asyncio.run(self.tool._arun("Artemis"))
+        self.assertEqual(self.search.calls, 2)
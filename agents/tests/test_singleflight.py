@@ -0,0 +1,151 @@
+import asyncio
+import tempfile
+import threading
+import time
+
+from django.test import SimpleTestCase
+
+from ..agents.checkpoints import ResumableRunError
+from ..agents.ratelimit import RateLimitExceeded
+from ..agents.singleflight import CoalescedRunError, SingleFlight
+
+CALLERS = 8
+
+
+def wait_for(condition, timeout=5):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            raise AssertionError("timed out")
+        time.sleep(0.005)
+
+
+class SingleFlightTests(SimpleTestCase):
+    def run_concurrently(self, flight, fn):
+        """Call ``flight.do`` from CALLERS threads; ``fn`` only returns once every caller has joined"""
+        outcomes = [None] * CALLERS
+
+        def call(index):
+            try:
+                outcomes[index] = ('result', flight.do('key', fn))
+            except Exception as exc:
+                outcomes[index] = ('error', exc)
+
+        threads = [threading.Thread(target=call, args=(index,)) for index in range(CALLERS)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join(10)
+        return outcomes
+
+    def blocking(self, flight, result=None, error=None):
+        calls = []
+
+        def fn():
+            calls.append(threading.get_ident())
+            wait_for(lambda: flight.stats()['coalesced'] == CALLERS - 1)
+            if error is not None:
+                raise error
+            return result
+
+        return fn, calls
+
+    def test_concurrent_identical_calls_share_one_run(self):
+        flight = SingleFlight()
+        fn, calls = self.blocking(flight, result={'final_post': 'post', 'generation_metadata': {'iterations': 2}})
+        outcomes = self.run_concurrently(flight, fn)
+
+        self.assertEqual(len(calls), 1)
+        self.assertEqual({kind for kind, _ in outcomes}, {'result'})
+        self.assertEqual({result['final_post'] for _, result in outcomes}, {'post'})
+        coalesced = [result['generation_metadata'].get('coalesced', False) for _, result in outcomes]
+        self.assertEqual(coalesced.count(True), CALLERS - 1)
+        self.assertEqual(flight.stats(), {'leaders': 1, 'coalesced': CALLERS - 1, 'cross_process_coalesced': 0, 'in_flight': 0})
+
+    def test_leader_failure_reaches_every_waiter_without_its_thread_id(self):
+        flight = SingleFlight()
+        cause = RateLimitExceeded('llm', 12)
+        fn, calls = self.blocking(flight, error=ResumableRunError('1-leader', cause))
+        outcomes = self.run_concurrently(flight, fn)
+
+        self.assertEqual(len(calls), 1)
+        errors = [error for kind, error in outcomes if kind == 'error']
+        self.assertEqual(len(errors), CALLERS)
+        leaders = [error for error in errors if isinstance(error, ResumableRunError)]
+        waiters = [error for error in errors if isinstance(error, CoalescedRunError)]
+        self.assertEqual((len(leaders), len(waiters)), (1, CALLERS - 1))
+        self.assertEqual(leaders[0].thread_id, '1-leader')
+        for error in waiters:
+            self.assertIsNone(getattr(error, 'thread_id', None))
+            self.assertEqual(str(error), str(cause))
+            self.assertIs(error.error, cause)
+
+    def test_failed_key_can_run_again(self):
+        flight = SingleFlight()
+
+        def fail():
+            raise ValueError("boom")
+
+        with self.assertRaises(ValueError):
+            flight.do('key', fail)
+        self.assertEqual(flight.do('key', lambda: {'final_post': 'retry'}), {'final_post': 'retry'})
+
+    def test_async_calls_share_one_run(self):
+        flight = SingleFlight()
+        calls = []
+
+        async def afn():
+            calls.append(1)
+            await asyncio.sleep(0.05)
+            return {'final_post': 'post'}
+
+        async def main():
+            return await asyncio.gather(*(flight.ado('key', afn) for _ in range(CALLERS)))
+
+        results = asyncio.run(main())
+        self.assertEqual(len(calls), 1)
+        self.assertEqual({result['final_post'] for result in results}, {'post'})
+
+
+class CrossProcessSingleFlightTests(SimpleTestCase):
+    """Two SingleFlight instances on one lock directory stand in for two worker processes"""
+
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.lock_dir = tmp.name
+
+    def test_waiting_process_reads_the_holders_result(self):
+        holder = SingleFlight(lock_dir=self.lock_dir, poll_interval=0.01)
+        waiter = SingleFlight(lock_dir=self.lock_dir, poll_interval=0.01)
+        release = threading.Event()
+        results = {}
+
+        def hold():
+            release.wait(5)
+            return {'final_post': 'post', 'raw_response': object(), 'generation_metadata': {}}
+
+        thread = threading.Thread(target=lambda: results.setdefault('holder', holder.do('key', hold)))
+        thread.start()
+        wait_for(lambda: holder.stats()['in_flight'] == 1)
+        waiter_thread = threading.Thread(
+            target=lambda: results.setdefault('waiter', waiter.do('key', lambda: self.fail("waiter ran the call")))
+        )
+        waiter_thread.start()
+        # Let the waiter find the lock file held before the holder finishes
+        wait_for(lambda: waiter.stats()['in_flight'] == 1)
+        time.sleep(0.05)
+        release.set()
+        thread.join(5)
+        waiter_thread.join(5)
+
+        self.assertEqual(results['waiter']['final_post'], 'post')
+        self.assertTrue(results['waiter']['generation_metadata']['coalesced'])
+        # Message objects stay in the process that produced them
+        self.assertNotIn('raw_response', results['waiter'])
+        self.assertEqual(waiter.stats()['cross_process_coalesced'], 1)
+
+    def test_result_from_an_earlier_request_is_not_reused(self):
+        SingleFlight(lock_dir=self.lock_dir).do('key', lambda: {'final_post': 'old'})
+        later = SingleFlight(lock_dir=self.lock_dir)
+        self.assertEqual(later.do('key', lambda: {'final_post': 'new'}), {'final_post': 'new'})
@@ -0,0 +1,44 @@
+from django.test import SimpleTestCase
+from langchain_core.messages import AIMessage, HumanMessage
+
+from ..agents.stopping import (
+    DraftSimilarity,
+    MaxIterations,
+    ReflectionApproval,
+    StoppingPolicy,
+    parse_verdict,
+)
+
+
+class StoppingPolicyTests(SimpleTestCase):
+    def state(self, *texts):
+        return [HumanMessage(content="Write a post")] + [AIMessage(content=text) for text in texts]
+
+    def test_max_iterations_counts_drafts_not_feedback(self):
+        policy = StoppingPolicy([MaxIterations(2)])
+        self.assertIsNone(policy.check(self.state("draft one", "Feedback: shorter")))
+        self.assertEqual(policy.check(self.state("draft one", "Feedback: shorter", "draft two")), "max_iterations")
+
+    def test_similar_drafts_converge(self):
+        policy = StoppingPolicy([MaxIterations(10), DraftSimilarity(0.9)])
+        draft = "Artemis II will fly four astronauts around the Moon next year."
+        self.assertIsNone(policy.check(self.state(draft, "Feedback: add a hook", "Something else entirely.")))
+        self.assertEqual(policy.check(self.state(draft, "Feedback: fine", draft)), "converged")
+
+    def test_approval_only_fires_after_feedback(self):
+        policy = StoppingPolicy([MaxIterations(10), ReflectionApproval()])
+        approved = AIMessage(content="Feedback: looks good", additional_kwargs={'verdict': 'approve'})
+        self.assertEqual(policy.check(self.state("draft") + [approved]), "approved")
+        revise = AIMessage(content="Feedback: needs work", additional_kwargs={'verdict': 'revise'})
+        self.assertIsNone(policy.check(self.state("draft") + [revise]))
+        self.assertTrue(policy.wants_verdict)
+
+    def test_first_matching_criterion_wins(self):
+        policy = StoppingPolicy([MaxIterations(2), DraftSimilarity(0.5)])
+        self.assertEqual(policy.check(self.state("same", "Feedback: ok", "same")), "max_iterations")
+        self.assertEqual(policy.max_iterations, 2)
+
+    def test_parse_verdict(self):
+        critique, verdict = parse_verdict("Tighten the intro.\nVERDICT: Approve\n")
+        self.assertEqual((critique, verdict), ("Tighten the intro.", "approve"))
+        self.assertEqual(parse_verdict("No verdict here"), ("No verdict here", None))
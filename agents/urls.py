@@ -1,18 +1,39 @@
+from django.conf import settings
 from django.urls import path
 from . import views
 
+# Under ASGI the generation views await the agent instead of blocking a thread per request
+if settings.ASYNC_GENERATION_VIEWS:
+    process_prompt, process_prompt_ajax = views.process_prompt_async, views.process_prompt_ajax_async
+else:
+    process_prompt, process_prompt_ajax = views.process_prompt, views.process_prompt_ajax
+
 app_name = 'agents'
 
 urlpatterns = [
     path('', views.agent_dashboard, name='dashboard'),
-    path('process/', views.process_prompt, name='process_prompt'),
-    path('api/process/', views.process_prompt_ajax, name='process_prompt_ajax'),
+    path('process/', process_prompt, name='process_prompt'),
+    path('process/resume/', views.resume_prompt, name='resume_prompt'),
+    path('drafts/<int:draft_id>/', views.pregenerated_draft, name='pregenerated_draft'),
+    path('api/process/', process_prompt_ajax, name='process_prompt_ajax'),
+    path('api/process/stream/', views.process_prompt_stream, name='process_prompt_stream'),
+    path('api/batch/', views.process_batch, name='process_batch'),
+    path('api/health/', views.health, name='health'),
+    
+    # Background generation jobs
+    path('api/jobs/', views.submit_job, name='submit_job'),
+    path('api/jobs/<int:job_id>/', views.job_status, name='job_status'),
+    path('jobs/<int:job_id>/', views.job_result, name='job_result'),
     
     # Post management URLs
     path('save-draft/', views.save_draft, name='save_draft'),
     path('posts/', views.post_list, name='post_list'),
+    path('posts/export/', views.post_export, name='post_export'),
+    path('posts/bulk/', views.post_bulk_action, name='post_bulk_action'),
     path('posts/<int:post_id>/', views.post_detail, name='post_detail'),
     path('posts/<int:post_id>/edit/', views.post_edit, name='post_edit'),
     path('posts/<int:post_id>/delete/', views.post_delete, name='post_delete'),
     path('api/posts/<int:post_id>/status/', views.post_status_update, name='post_status_update'),
+    path('api/posts/bulk/status/', views.post_bulk_status, name='post_bulk_status'),
+    path('api/posts/bulk/delete/', views.post_bulk_delete, name='post_bulk_delete'),
 ]
@@ -1,35 +1,174 @@
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth.decorators import login_required
+from django.contrib.auth.views import redirect_to_login
 from django.contrib.auth import views as auth_views
 from django.contrib import messages
-from django.http import JsonResponse
+from django.http import JsonResponse, StreamingHttpResponse
 from django.views.decorators.csrf import csrf_exempt
 from django.core.paginator import Paginator
-from django.db.models import Q
-from .models import Post
+from django.urls import reverse
+from django.utils import timezone
+from django.utils.http import url_has_allowed_host_and_scheme
+from urllib.parse import urlencode
+from .models import Post, GenerationJob, PregeneratedDraft
+from . import jobs
+from .batch import run_batch, save_batch_results
+from .search import get_search_backend
+from .pagination import keyset_paginate
+from .bulk import BulkActionError, delete_posts, parse_ids, update_status
+from .export import CONTENT_TYPES, ExportError, export_queryset, iter_export, parse_boundary
+from .profiling import SECTION_AGENT, SECTION_SERIALIZE, section
+from django.conf import settings
+from asgiref.sync import sync_to_async
+from functools import wraps
 import json
 import logging
+import uuid
 
-# Import our reflection agent
-try:
-    from .agents.reflect_agent import process_user_request
-except ImportError:
-    # Fallback for development
-    def process_user_request(user_input):
-        return {
-            'final_post': f"Mock response for: {user_input}",
-            'conversation_history': [
-                {'content': f"Processing: {user_input}", 'is_feedback': False},
-                {'content': "Feedback: This is a mock feedback", 'is_feedback': True},
-            ]
-        }
+# The reflection agent is imported and built on first use (see agents/agents/factory.py),
+# so workers that only serve post pages or the admin never load it. Runs count as agent
+# time for requests sampled by the profiling middleware.
+def process_user_request(user_input, bypass_cache=False, thread_id=None, models=None):
+    from .agents.reflect_agent import process_user_request as run
+    with section(SECTION_AGENT):
+        return run(user_input, bypass_cache=bypass_cache, thread_id=thread_id, models=models)
+
+async def aprocess_user_request(user_input, bypass_cache=False, thread_id=None, models=None):
+    from .agents.reflect_agent import aprocess_user_request as run
+    with section(SECTION_AGENT):
+        return await run(user_input, bypass_cache=bypass_cache, thread_id=thread_id, models=models)
+
+def stream_user_request(user_input, bypass_cache=False, thread_id=None):
+    from .agents.reflect_agent import stream_user_request as run
+    events = run(user_input, bypass_cache=bypass_cache, thread_id=thread_id)
+    while True:
+        with section(SECTION_AGENT):
+            event = next(events, None)
+        if event is None:
+            return
+        yield event
+
+def resume_user_request(thread_id, bypass_cache=False):
+    from .agents.reflect_agent import resume_user_request as run
+    with section(SECTION_AGENT):
+        return run(thread_id, bypass_cache=bypass_cache)
+
+async def aresume_user_request(thread_id, bypass_cache=False):
+    from .agents.reflect_agent import aresume_user_request as run
+    with section(SECTION_AGENT):
+        return await run(thread_id, bypass_cache=bypass_cache)
+
+def _new_thread_id(user):
+    """Checkpoint thread id for a run; prefixed with the user id so only its owner can resume it"""
+    return f"{user.id}-{uuid.uuid4().hex}"
+
+def _owns_thread(user, thread_id):
+    return bool(thread_id) and thread_id.startswith(f"{user.id}-")
+
+def _retry_after(error):
+    """Seconds to wait before retrying if upstream admission control rejected the run, else None"""
+    error = getattr(error, 'error', error)  # unwrap ResumableRunError
+    return getattr(error, 'retry_after', None)
+
+def _error_response(error, log_message):
+    """JSON error for the API views: 429 with Retry-After when the upstream services are busy"""
+    logger.error(f"{log_message}: {str(error)}")
+    payload = {'success': False, 'error': str(error)}
+    if getattr(error, 'thread_id', None):
+        payload['thread_id'] = error.thread_id
+    retry_after = _retry_after(error)
+    if retry_after is None:
+        return JsonResponse(payload)
+    payload['retry_after'] = retry_after
+    response = JsonResponse(payload, status=429)
+    response['Retry-After'] = str(retry_after)
+    return response
+
+def _start_stream_run(request, user_prompt, bypass_cache):
+    """Register a run for process_prompt_stream to attach to and return its id"""
+    # Runs are only started from (CSRF-protected) POSTs; the SSE GET can just pick up a pending one
+    run_id = uuid.uuid4().hex
+    stream_runs = request.session.get('stream_runs', {})
+    stream_runs[run_id] = {'prompt': user_prompt, 'bypass_cache': bypass_cache}
+    request.session['stream_runs'] = stream_runs
+    return run_id
+
+def _stream_url(run_id):
+    return f"{reverse('agents:process_prompt_stream')}?{urlencode({'run': run_id})}"
+
+def _stream_context(request, user_prompt, bypass_cache):
+    """Result page context that streams the run in from process_prompt_stream"""
+    return {
+        'user_prompt': user_prompt,
+        'streaming': True,
+        'stream_url': _stream_url(_start_stream_run(request, user_prompt, bypass_cache)),
+        'conversation_history_json': '[]',
+        'generation_metadata_json': 'null',
+    }
+
+def _result_context(user_prompt, result):
+    """Result page context for a finished run"""
+    with section(SECTION_SERIALIZE):
+        conversation_history_json = json.dumps(result.get('conversation_history', []))
+        generation_metadata_json = json.dumps(result.get('generation_metadata'))
+    return {
+        'user_prompt': user_prompt,
+        'final_post': result.get('final_post'),
+        'conversation_history': result.get('conversation_history', []),
+        'conversation_history_json': conversation_history_json,
+        'generation_metadata_json': generation_metadata_json,
+        'stop_reason': result.get('stop_reason'),
+        'success': True
+    }
+
+def _result_response(result):
+    """JSON response for a finished run"""
+    with section(SECTION_SERIALIZE):
+        return JsonResponse({
+            'success': True,
+            'final_post': result.get('final_post'),
+            'conversation_history': result.get('conversation_history', []),
+            'generation_metadata': result.get('generation_metadata'),
+            'iterations': result.get('iterations'),
+            'stop_reason': result.get('stop_reason'),
+        })
+
+def _requested_models(data):
+    """Per-role model overrides from an API request body, e.g. {"draft": "gpt-4o-mini"}"""
+    models = data.get('models') or None
+    if models is not None and not isinstance(models, dict):
+        raise ValueError('"models" must map roles (final, draft, reflect, router) to model names.')
+    return models
+
+def _remember_resumable(request, error, user_prompt):
+    """Offer to resume a failed run from the dashboard if it saved progress"""
+    thread_id = getattr(error, 'thread_id', None)
+    if _owns_thread(request.user, thread_id):
+        request.session['resumable_run'] = {'thread_id': thread_id, 'prompt': user_prompt}
 
 logger = logging.getLogger(__name__)
 
 @login_required
 def agent_dashboard(request):
     """Main dashboard for the reflection agent"""
-    return render(request, 'agents/dashboard.html')
+    pregenerated_drafts = PregeneratedDraft.fresh().defer('result')[:settings.PREGENERATION_DASHBOARD_LIMIT]
+    return render(request, 'agents/dashboard.html', {
+        'resumable_run': request.session.get('resumable_run'),
+        'pregenerated_drafts': pregenerated_drafts,
+    })
+
+@login_required
+def pregenerated_draft(request, draft_id):
+    """Render the result page for a pre-generated draft straight from the stored run"""
+    draft = get_object_or_404(PregeneratedDraft, id=draft_id)
+    
+    if not draft.is_fresh:
+        messages.info(request, 'That pre-generated draft has expired. Please generate it again.')
+        return redirect('agents:dashboard')
+    
+    context = _result_context(draft.prompt, {'final_post': draft.final_post, **draft.result})
+    context['pregenerated_at'] = draft.generated_at
+    return render(request, 'agents/result.html', context)
 
 @login_required
 def process_prompt(request):
@@ -37,31 +176,58 @@ def process_prompt(request):
     if request.method == 'POST':
         try:
             user_prompt = request.POST.get('prompt', '').strip()
+            bypass_cache = bool(request.POST.get('bypass_cache'))
             
             if not user_prompt:
                 messages.error(request, 'Please enter a prompt.')
-                return redirect('agent_dashboard')
+                return redirect('agents:dashboard')
+            
+            # Render the page straight away and let the browser stream the steps in
+            if request.POST.get('stream'):
+                return render(request, 'agents/result.html', _stream_context(request, user_prompt, bypass_cache))
             
             # Process through the reflection agent
             logger.info(f"Processing prompt: {user_prompt[:100]}...")
-            result = process_user_request(user_prompt)
-            
-            context = {
-                'user_prompt': user_prompt,
-                'final_post': result.get('final_post'),
-                'conversation_history': result.get('conversation_history', []),
-                'conversation_history_json': json.dumps(result.get('conversation_history', [])),
-                'success': True
-            }
+            result = process_user_request(
+                user_prompt, bypass_cache=bypass_cache, thread_id=_new_thread_id(request.user)
+            )
             
-            return render(request, 'agents/result.html', context)
+            return render(request, 'agents/result.html', _result_context(user_prompt, result))
             
         except Exception as e:
             logger.error(f"Error processing prompt: {str(e)}")
+            _remember_resumable(request, e, user_prompt)
             messages.error(request, f'Error processing your request: {str(e)}')
-            return redirect('agent_dashboard')
+            return redirect('agents:dashboard')
     
-    return redirect('agent_dashboard')
+    return redirect('agents:dashboard')
+
+@login_required
+def resume_prompt(request):
+    """Continue a failed run from its last completed node instead of starting over"""
+    if request.method == 'POST':
+        thread_id = request.POST.get('thread_id', '')
+        resumable_run = request.session.get('resumable_run') or {}
+        user_prompt = request.POST.get('prompt') or resumable_run.get('prompt', '')
+        
+        if not _owns_thread(request.user, thread_id):
+            messages.error(request, 'That run cannot be resumed.')
+            return redirect('agents:dashboard')
+        
+        try:
+            logger.info(f"Resuming run {thread_id}")
+            result = resume_user_request(thread_id, bypass_cache=bool(request.POST.get('bypass_cache')))
+        except Exception as e:
+            logger.error(f"Error resuming run {thread_id}: {str(e)}")
+            if not getattr(e, 'thread_id', None):
+                request.session.pop('resumable_run', None)
+            messages.error(request, f'Error resuming your request: {str(e)}')
+            return redirect('agents:dashboard')
+        
+        request.session.pop('resumable_run', None)
+        return render(request, 'agents/result.html', _result_context(user_prompt, result))
+    
+    return redirect('agents:dashboard')
 
 @login_required
 @csrf_exempt
@@ -71,24 +237,281 @@ def process_prompt_ajax(request):
         try:
             data = json.loads(request.body)
             user_prompt = data.get('prompt', '').strip()
+            thread_id = data.get('thread_id')
+            bypass_cache = bool(data.get('bypass_cache'))
+            models = _requested_models(data)
+            
+            # Resume a failed run when its thread_id is sent back
+            if thread_id:
+                if not _owns_thread(request.user, thread_id):
+                    return JsonResponse({'success': False, 'error': 'That run cannot be resumed.'})
+                result = resume_user_request(thread_id, bypass_cache=bypass_cache)
+            elif not user_prompt:
+                return JsonResponse({'success': False, 'error': 'Please enter a prompt.'})
+            else:
+                result = process_user_request(
+                    user_prompt, bypass_cache=bypass_cache, thread_id=_new_thread_id(request.user), models=models
+                )
+            
+            return _result_response(result)
             
+        except Exception as e:
+            return _error_response(e, "AJAX Error processing prompt")
+    
+    return JsonResponse({'success': False, 'error': 'Invalid request method'})
+
+# Async variants of the generation views, routed instead of the sync ones under ASGI
+# (ASYNC_GENERATION_VIEWS): a run awaits app.ainvoke rather than holding a worker thread,
+# so one process can keep many network-bound generations in flight
+
+def async_login_required(view):
+    """login_required for async views (Django 5.0's decorator only wraps sync ones)"""
+    @wraps(view)
+    async def wrapper(request, *args, **kwargs):
+        user = await request.auser()
+        if not user.is_authenticated:
+            return redirect_to_login(request.get_full_path())
+        return await view(request, *args, **kwargs)
+    return wrapper
+
+@async_login_required
+async def process_prompt_async(request):
+    """Async process_prompt built on app.ainvoke"""
+    if request.method == 'POST':
+        user = await request.auser()
+        user_prompt = request.POST.get('prompt', '').strip()
+        bypass_cache = bool(request.POST.get('bypass_cache'))
+        try:
             if not user_prompt:
+                messages.error(request, 'Please enter a prompt.')
+                return redirect('agents:dashboard')
+            
+            # Templates, the session and request.user touch the database, so rendering stays sync
+            if request.POST.get('stream'):
+                context = await sync_to_async(_stream_context)(request, user_prompt, bypass_cache)
+                return await sync_to_async(render)(request, 'agents/result.html', context)
+            
+            logger.info(f"Processing prompt: {user_prompt[:100]}...")
+            result = await aprocess_user_request(user_prompt, bypass_cache=bypass_cache, thread_id=_new_thread_id(user))
+            
+            return await sync_to_async(render)(request, 'agents/result.html', _result_context(user_prompt, result))
+            
+        except Exception as e:
+            logger.error(f"Error processing prompt: {str(e)}")
+            await sync_to_async(_remember_resumable)(request, e, user_prompt)
+            messages.error(request, f'Error processing your request: {str(e)}')
+            return redirect('agents:dashboard')
+    
+    return redirect('agents:dashboard')
+
+@async_login_required
+@csrf_exempt
+async def process_prompt_ajax_async(request):
+    """Async process_prompt_ajax built on app.ainvoke"""
+    if request.method == 'POST':
+        try:
+            user = await request.auser()
+            data = json.loads(request.body)
+            user_prompt = data.get('prompt', '').strip()
+            thread_id = data.get('thread_id')
+            bypass_cache = bool(data.get('bypass_cache'))
+            models = _requested_models(data)
+            
+            # Resume a failed run when its thread_id is sent back
+            if thread_id:
+                if not _owns_thread(user, thread_id):
+                    return JsonResponse({'success': False, 'error': 'That run cannot be resumed.'})
+                result = await aresume_user_request(thread_id, bypass_cache=bypass_cache)
+            elif not user_prompt:
                 return JsonResponse({'success': False, 'error': 'Please enter a prompt.'})
+            else:
+                result = await aprocess_user_request(
+                    user_prompt, bypass_cache=bypass_cache, thread_id=_new_thread_id(user), models=models
+                )
             
-            result = process_user_request(user_prompt)
+            return _result_response(result)
+            
+        except Exception as e:
+            return _error_response(e, "AJAX Error processing prompt")
+    
+    return JsonResponse({'success': False, 'error': 'Invalid request method'})
+
+def _sse_event(event, data):
+    """Format a single Server-Sent Events message"""
+    with section(SECTION_SERIALIZE):
+        return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+@login_required
+def process_prompt_stream(request):
+    """
+    Server-Sent Events endpoint streaming each generate/reflect step as it finishes.
+    
+    POST (JSON or form data with ``prompt``) registers a run and returns its id and stream URL;
+    GET ``?run=<id>`` then starts that run and streams it. Each run can be streamed once.
+    """
+    if request.method == 'POST':
+        if request.content_type == 'application/json':
+            try:
+                data = json.loads(request.body)
+            except json.JSONDecodeError:
+                return JsonResponse({'success': False, 'error': 'Invalid JSON data'}, status=400)
+        else:
+            data = request.POST
+        user_prompt = str(data.get('prompt') or '').strip()
+        if not user_prompt:
+            return JsonResponse({'success': False, 'error': 'Please enter a prompt.'}, status=400)
+        run_id = _start_stream_run(request, user_prompt, bool(data.get('bypass_cache')))
+        return JsonResponse({'success': True, 'run_id': run_id, 'stream_url': _stream_url(run_id)})
+    
+    if request.method != 'GET':
+        return JsonResponse({'success': False, 'error': 'Invalid request method'}, status=405)
+    
+    stream_runs = request.session.get('stream_runs', {})
+    run = stream_runs.pop(request.GET.get('run', ''), None)
+    if run is None:
+        return JsonResponse({'success': False, 'error': 'Unknown or already streamed run.'}, status=404)
+    request.session['stream_runs'] = stream_runs
+    user_prompt, bypass_cache = run['prompt'], run['bypass_cache']
+    
+    thread_id = _new_thread_id(request.user)
+    
+    def event_stream():
+        logger.info(f"Streaming prompt: {user_prompt[:100]}...")
+        try:
+            for event in stream_user_request(user_prompt, bypass_cache=bypass_cache, thread_id=thread_id):
+                yield _sse_event(event.pop('type'), event)
+        except Exception as e:
+            logger.error(f"Stream Error processing prompt: {str(e)}")
+            yield _sse_event('error', {
+                'error': str(e),
+                'thread_id': getattr(e, 'thread_id', None),
+                'retry_after': _retry_after(e),
+            })
+    
+    response = StreamingHttpResponse(event_stream(), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'
+    return response
+
+@login_required
+@csrf_exempt
+def process_batch(request):
+    """Generate drafts for a list of prompts concurrently and save them as Post drafts"""
+    if request.method == 'POST':
+        try:
+            data = json.loads(request.body)
+            prompts = [p.strip() for p in data.get('prompts', []) if isinstance(p, str) and p.strip()]
+            
+            if not prompts:
+                return JsonResponse({'success': False, 'error': 'Please provide at least one prompt.'})
+            
+            if len(prompts) > settings.BATCH_MAX_PROMPTS:
+                return JsonResponse({
+                    'success': False,
+                    'error': f'A batch can contain at most {settings.BATCH_MAX_PROMPTS} prompts.'
+                })
+            
+            # Clients may ask for less concurrency than BATCH_CONCURRENCY, never more
+            concurrency = data.get('concurrency') or settings.BATCH_CONCURRENCY
+            if isinstance(concurrency, bool) or not str(concurrency).isdigit():
+                return JsonResponse({'success': False, 'error': 'concurrency must be a positive integer.'}, status=400)
+            concurrency = max(1, min(int(concurrency), settings.BATCH_CONCURRENCY))
+            
+            bypass_cache = bool(data.get('bypass_cache'))
+            runner = lambda prompt: aprocess_user_request(prompt, bypass_cache=bypass_cache)
+            
+            logger.info(f"Processing batch of {len(prompts)} prompts")
+            with section(SECTION_AGENT):
+                results = run_batch(prompts, runner, concurrency=concurrency)
+            posts = iter(save_batch_results(results, request.user))
+            
+            items = []
+            for item in results:
+                if item['success']:
+                    items.append({'prompt': item['prompt'], 'success': True, 'post_id': next(posts).id})
+                else:
+                    items.append({'prompt': item['prompt'], 'success': False, 'error': item['error']})
             
             return JsonResponse({
                 'success': True,
-                'final_post': result.get('final_post'),
-                'conversation_history': result.get('conversation_history', [])
+                'saved': sum(1 for item in items if item['success']),
+                'failed': sum(1 for item in items if not item['success']),
+                'results': items,
             })
             
         except Exception as e:
-            logger.error(f"AJAX Error processing prompt: {str(e)}")
+            logger.error(f"Batch Error processing prompts: {str(e)}")
             return JsonResponse({'success': False, 'error': str(e)})
     
     return JsonResponse({'success': False, 'error': 'Invalid request method'})
 
+def health(request):
+    """Report whether this worker's agent stack has been initialized, with coalescing, rate limit, cache and connection pool metrics"""
+    from .agents.factory import STATUS_FAILED, agent_factory, cache_stats
+    from .agents.ratelimit import rate_limit_stats
+    from .agents.singleflight import get_singleflight
+    from .agents.transport import transport_stats
+    
+    agent_state = agent_factory.state()
+    flight = get_singleflight()
+    return JsonResponse(
+        {
+            'status': 'error' if agent_state['status'] == STATUS_FAILED else 'ok',
+            'agent': agent_state,
+            'singleflight': flight.stats() if flight else None,
+            'rate_limits': rate_limit_stats(),
+            'caches': cache_stats(),
+            'http_pools': transport_stats(),
+        },
+        status=503 if agent_state['status'] == STATUS_FAILED else 200,
+    )
+
+@login_required
+@csrf_exempt
+def submit_job(request):
+    """Queue a prompt for the background worker pool and return the job id"""
+    if request.method == 'POST':
+        try:
+            data = json.loads(request.body)
+            user_prompt = data.get('prompt', '').strip()
+            
+            if not user_prompt:
+                return JsonResponse({'success': False, 'error': 'Please enter a prompt.'})
+            
+            job = GenerationJob.objects.create(prompt=user_prompt, created_by=request.user)
+            jobs.enqueue(job, process_user_request)
+            
+            return JsonResponse({'success': True, 'job_id': job.id, 'status': job.status}, status=202)
+            
+        except Exception as e:
+            logger.error(f"Error queueing job: {str(e)}")
+            return JsonResponse({'success': False, 'error': str(e)})
+    
+    return JsonResponse({'success': False, 'error': 'Invalid request method'})
+
+@login_required
+def job_status(request, job_id):
+    """Return the status, and the result once finished, of a generation job"""
+    jobs.fail_stale_jobs(GenerationJob.objects.filter(id=job_id))
+    job = get_object_or_404(GenerationJob, id=job_id, created_by=request.user)
+    return JsonResponse({'success': True, 'job': job.to_dict()})
+
+@login_required
+def job_result(request, job_id):
+    """Render the result page for a finished generation job"""
+    jobs.fail_stale_jobs(GenerationJob.objects.filter(id=job_id))
+    job = get_object_or_404(GenerationJob, id=job_id, created_by=request.user)
+    
+    if job.status == 'failed':
+        messages.error(request, f'Error processing your request: {job.error}')
+        return redirect('agents:dashboard')
+    
+    if not job.is_finished:
+        messages.info(request, 'Your request is still being processed. Please check back shortly.')
+        return redirect('agents:dashboard')
+    
+    return render(request, 'agents/result.html', _result_context(job.prompt, job.result or {}))
+
 @login_required
 def save_draft(request):
     """Save generated content as a draft post"""
@@ -98,14 +521,15 @@ def save_draft(request):
             content = request.POST.get('content', '').strip()
             original_prompt = request.POST.get('original_prompt', '').strip()
             conversation_history_json = request.POST.get('conversation_history', '[]')
+            generation_metadata_json = request.POST.get('generation_metadata', 'null')
             
             if not title:
                 messages.error(request, 'Please provide a title for your draft.')
-                return redirect('agent_dashboard')
+                return redirect('agents:dashboard')
             
             if not content:
                 messages.error(request, 'No content to save.')
-                return redirect('agent_dashboard')
+                return redirect('agents:dashboard')
             
             # Parse conversation history
             try:
@@ -113,6 +537,14 @@ def save_draft(request):
             except json.JSONDecodeError:
                 conversation_history = []
             
+            # Parse per-node timing and token metrics from the generation run
+            try:
+                generation_metadata = json.loads(generation_metadata_json)
+            except json.JSONDecodeError:
+                generation_metadata = None
+            if not isinstance(generation_metadata, dict):
+                generation_metadata = None
+            
             # Create the post draft
             post = Post.objects.create(
                 title=title,
@@ -120,6 +552,7 @@ def save_draft(request):
                 original_prompt=original_prompt,
                 created_by=request.user,
                 conversation_history=conversation_history,
+                generation_metadata=generation_metadata,
                 status='draft'
             )
             
@@ -129,9 +562,9 @@ def save_draft(request):
         except Exception as e:
             logger.error(f"Error saving draft: {str(e)}")
             messages.error(request, f'Error saving draft: {str(e)}')
-            return redirect('agent_dashboard')
+            return redirect('agents:dashboard')
     
-    return redirect('agent_dashboard')
+    return redirect('agents:dashboard')
 
 @login_required
 def post_list(request):
@@ -146,22 +579,28 @@ def post_list(request):
     # Search functionality
     search_query = request.GET.get('search', '')
     if search_query:
-        posts = posts.filter(
-            Q(title__icontains=search_query) |
-            Q(content__icontains=search_query) |
-            Q(original_prompt__icontains=search_query)
-        )
+        posts = get_search_backend().search(posts, search_query)
     
-    # Pagination
-    paginator = Paginator(posts, 10)  # Show 10 posts per page
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
+    # Pagination: ranked search results page by offset; the plain list uses keyset cursors over (created_at, id)
+    if search_query:
+        paginator = Paginator(posts, 10)  # Show 10 posts per page
+        page_obj = paginator.get_page(request.GET.get('page'))
+    else:
+        page_obj = keyset_paginate(posts, after=request.GET.get('after'), before=request.GET.get('before'))
+    
+    status_counts = Post.status_counts(request.user)
     
     context = {
         'page_obj': page_obj,
+        'keyset_pagination': not search_query,
         'status_filter': status_filter,
         'search_query': search_query,
-        'total_posts': posts.count(),
+        'status_counts': status_counts,
+        'total_posts': (
+            paginator.count if search_query
+            else status_counts.get(status_filter, 0) if status_filter
+            else sum(status_counts.values())
+        ),
         # Add boolean flags to avoid template == syntax issues
         'draft_selected': status_filter == 'draft',
         'published_selected': status_filter == 'published',
@@ -170,10 +609,32 @@ def post_list(request):
     
     return render(request, 'agents/post_list.html', context)
 
+@login_required
+def post_export(request):
+    """Stream the user's posts as NDJSON or CSV, filtered by status and creation date"""
+    fmt = request.GET.get('format', 'ndjson')
+    include_history = request.GET.get('history', '').lower() in ('1', 'true', 'yes')
+    try:
+        posts = export_queryset(
+            request.user,
+            status=request.GET.get('status') or None,
+            since=parse_boundary(request.GET.get('since')),
+            until=parse_boundary(request.GET.get('until'), end=True),
+            include_history=include_history,
+        )
+        rows = iter_export(posts, fmt, include_history=include_history)
+    except ExportError as e:
+        return JsonResponse({'success': False, 'error': str(e)}, status=400)
+    
+    response = StreamingHttpResponse(rows, content_type=f"{CONTENT_TYPES[fmt]}; charset=utf-8")
+    filename = f"posts-{timezone.now():%Y%m%d-%H%M%S}.{fmt}"
+    response['Content-Disposition'] = f'attachment; filename="{filename}"'
+    return response
+
 @login_required
 def post_detail(request, post_id):
     """View details of a specific post"""
-    post = get_object_or_404(Post, id=post_id, created_by=request.user)
+    post = get_object_or_404(Post.objects.select_related('history_record'), id=post_id, created_by=request.user)
     
     context = {
         'post': post,
@@ -248,7 +709,7 @@ def post_status_update(request, post_id):
             
             if new_status in ['draft', 'published', 'archived']:
                 post.status = new_status
-                post.save()
+                post.save(update_fields=['status', 'updated_at'])
                 return JsonResponse({'success': True, 'status': new_status})
             else:
                 return JsonResponse({'success': False, 'error': 'Invalid status'})
@@ -258,6 +719,63 @@ def post_status_update(request, post_id):
     
     return JsonResponse({'success': False, 'error': 'Invalid request method'})
 
+@login_required
+def post_bulk_status(request):
+    """Set the status of several posts via AJAX in a single query"""
+    if request.method == 'POST':
+        try:
+            data = json.loads(request.body)
+            ids = parse_ids(data.get('ids') or [], settings.BULK_MAX_POSTS)
+            updated = update_status(request.user, ids, data.get('status'))
+            return JsonResponse({'success': True, 'status': data.get('status'), 'updated': updated})
+        except Exception as e:
+            return JsonResponse({'success': False, 'error': str(e)})
+    
+    return JsonResponse({'success': False, 'error': 'Invalid request method'})
+
+@login_required
+def post_bulk_delete(request):
+    """Delete several posts via AJAX in a single statement"""
+    if request.method == 'POST':
+        try:
+            data = json.loads(request.body)
+            ids = parse_ids(data.get('ids') or [], settings.BULK_MAX_POSTS)
+            return JsonResponse({'success': True, 'deleted': delete_posts(request.user, ids)})
+        except Exception as e:
+            return JsonResponse({'success': False, 'error': str(e)})
+    
+    return JsonResponse({'success': False, 'error': 'Invalid request method'})
+
+BULK_ACTIONS = {
+    'draft': 'moved to drafts',
+    'published': 'published',
+    'archived': 'archived',
+    'delete': 'deleted',
+}
+
+@login_required
+def post_bulk_action(request):
+    """Apply a status change or delete to the posts selected on the post list"""
+    next_url = request.POST.get('next')
+    if not url_has_allowed_host_and_scheme(next_url, allowed_hosts={request.get_host()}):
+        next_url = reverse('agents:post_list')
+    
+    if request.method == 'POST':
+        action = request.POST.get('action')
+        try:
+            if action not in BULK_ACTIONS:
+                raise BulkActionError('Please choose an action.')
+            ids = parse_ids(request.POST.getlist('ids'), settings.BULK_MAX_POSTS)
+            if action == 'delete':
+                count = delete_posts(request.user, ids)
+            else:
+                count = update_status(request.user, ids, action)
+            messages.success(request, f'{count} post{"" if count == 1 else "s"} {BULK_ACTIONS[action]}.')
+        except BulkActionError as e:
+            messages.error(request, str(e))
+    
+    return redirect(next_url)
+
 # Custom login view to redirect to dashboard after login
 class CustomLoginView(auth_views.LoginView):
     template_name = 'registration/login.html'
@@ -12,5 +12,7 @@ import os
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "config.settings")
+# Generation views run natively async under ASGI; WSGI deployments keep the sync ones
+os.environ.setdefault("ASYNC_GENERATION_VIEWS", "true")
 
 application = get_asgi_application()
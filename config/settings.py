@@ -11,7 +11,7 @@ https://docs.djangoproject.com/en/5.0/ref/settings/
 """
 
 from pathlib import Path
-from decouple import config
+from decouple import Csv, config
 import os
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -43,6 +43,8 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    # Outermost so the session and auth queries of sampled requests are counted too
+    "agents.profiling.ProfilingMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
@@ -56,7 +58,8 @@ ROOT_URLCONF = "config.urls"
 
 TEMPLATES = [
     {
-        "BACKEND": "django.template.backends.django.DjangoTemplates",
+        # DjangoTemplates with render timing for requests sampled by ProfilingMiddleware
+        "BACKEND": "agents.profiling.ProfiledDjangoTemplates",
         "DIRS": [BASE_DIR / 'templates'],
         "APP_DIRS": True,
         "OPTIONS": {
@@ -132,3 +135,43 @@ DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
 LOGIN_URL = '/login/'
 LOGIN_REDIRECT_URL = '/agents/'
 LOGOUT_REDIRECT_URL = '/login/'
+
+# Background generation worker pool
+GENERATION_WORKERS = config('GENERATION_WORKERS', default=4, cast=int)
+# Seconds after which a job still queued or running is taken to have been lost (jobs do not survive a restart)
+GENERATION_JOB_TIMEOUT = config('GENERATION_JOB_TIMEOUT', default=1800, cast=int)
+
+# Serve process_prompt/process_prompt_ajax as async views (config/asgi.py turns this on)
+ASYNC_GENERATION_VIEWS = config('ASYNC_GENERATION_VIEWS', default=False, cast=bool)
+
+# Batch generation
+BATCH_CONCURRENCY = config('BATCH_CONCURRENCY', default=4, cast=int)
+BATCH_MAX_PROMPTS = config('BATCH_MAX_PROMPTS', default=100, cast=int)
+
+# Most posts a single bulk status change or delete may touch
+BULK_MAX_POSTS = config('BULK_MAX_POSTS', default=1000, cast=int)
+
+# Build the agent stack when the app loads instead of on the first generation request
+AGENT_WARMUP = config('AGENT_WARMUP', default=False, cast=bool)
+
+# Post search: "auto" picks SQLite FTS5 or PostgreSQL full-text search from the database, "basic" uses icontains
+POST_SEARCH_BACKEND = config('POST_SEARCH_BACKEND', default='auto')
+
+# Rows fetched per database round trip when streaming post exports
+EXPORT_CHUNK_SIZE = config('EXPORT_CHUNK_SIZE', default=500, cast=int)
+
+# Pre-generated drafts (see the pregenerate_drafts command): seed prompts separated by ";" and how long each draft is offered
+PREGENERATION_PROMPTS = config(
+    'PREGENERATION_PROMPTS',
+    default='Latest space exploration news;Latest news about NASA Artemis mission',
+    cast=Csv(delimiter=';'),
+)
+PREGENERATION_TTL_HOURS = config('PREGENERATION_TTL_HOURS', default=12, cast=float)
+PREGENERATION_DASHBOARD_LIMIT = config('PREGENERATION_DASHBOARD_LIMIT', default=6, cast=int)
+
+# Request profiling (agents.profiling.ProfilingMiddleware): percentage of requests sampled (0 = off),
+# whether to keep a cProfile dump of each, how many records to keep and path prefixes never sampled
+PROFILING_SAMPLE_PERCENT = config('PROFILING_SAMPLE_PERCENT', default=0, cast=float)
+PROFILING_CPROFILE = config('PROFILING_CPROFILE', default=False, cast=bool)
+PROFILING_MAX_RECORDS = config('PROFILING_MAX_RECORDS', default=1000, cast=int)
+PROFILING_SKIP_PREFIXES = config('PROFILING_SKIP_PREFIXES', default='/static/', cast=Csv())